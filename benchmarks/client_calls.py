@@ -0,0 +1,156 @@
+"""Benchmarks the CPU per call of the DynamoDB repositories.
+
+SessionsDynamoDBRepo, on the boto3 resource, and SessionsDynamoDBClientRepo,
+on the low-level client, make the same calls against canned responses:
+requests are built, signed and their responses parsed as usual, but never
+sent, so the report compares the client-side work of each repository:
+
+    python -m benchmarks.client_calls --sizes 10 200 --repeat 200
+"""
+from argparse import ArgumentParser
+from json import dumps
+from os import environ
+from statistics import median
+from sys import stdout
+from time import process_time, time
+
+from benchmarks.serialization import wire_items
+
+SIZES = (2, 10, 50, 200)
+
+REPOS = ("resource", "client")
+
+
+class _Body:
+    def __init__(self, content):
+        self.content = content
+
+    def stream(self, **_):
+        yield self.content
+
+
+def _responder(responses):
+    """Returns a before-send handler answering every operation from responses."""
+    from botocore.awsrequest import AWSResponse
+
+    def respond(request, **_):
+        operation = request.headers["X-Amz-Target"].decode().split(".")[-1]
+
+        return AWSResponse(
+            request.url, 200, {}, _Body(dumps(responses[operation]).encode())
+        )
+
+    return respond
+
+
+def _repo(name, responses):
+    for variable in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        environ.setdefault(variable, "testing")
+
+    environ.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+
+    from pointing_poker.aws.repositories.client import SessionsDynamoDBClientRepo
+    from pointing_poker.aws.repositories.sessions import SessionsDynamoDBRepo
+
+    if name == "client":
+        repo = SessionsDynamoDBClientRepo()
+        clients = (repo.table.meta.client, repo.client)
+    else:
+        repo = SessionsDynamoDBRepo()
+        clients = (repo.table.meta.client,)
+
+    for client in clients:
+        client.meta.events.register("before-send.dynamodb", _responder(responses))
+
+    return repo
+
+
+def _responses(items):
+    session_item, participant_item = items[0], items[1]
+
+    return {
+        "Query": {"Items": items, "Count": len(items), "ScannedCount": len(items)},
+        "GetItem": {"Item": {"version": {"N": "3"}}},
+        "BatchGetItem": {
+            "Responses": {"sessions": [participant_item, session_item]},
+            "UnprocessedKeys": {},
+        },
+        "UpdateItem": {"Attributes": {"version": {"N": "4"}}},
+        "TransactWriteItems": {},
+    }
+
+
+def _calls(repo):
+    """Yields each benchmarked call by name."""
+    session_id, participant_id = "session", "participant-0001"
+    vote = {"points": 3, "abstained": False}
+    tally = {"count": 1, "sum": 3, "abstentions": 0, "histogram": {"3": 1}}
+
+    yield "get", lambda: repo.get(session_id)
+    yield "get_version", lambda: repo.get_version(session_id)
+    yield "get_participant_in_session", lambda: repo.get_participant_in_session(
+        session_id, participant_id
+    )
+    yield "cast_vote", lambda: repo.cast_vote(
+        session_id, participant_id, vote, voting_round=1, version=3, tally=tally
+    )
+    yield "set_reviewing_issue", lambda: repo.set_reviewing_issue(
+        session_id, {"title": "IS-1", "url": None, "description": None}, version=3
+    )
+
+
+def run(sizes=SIZES, repeat=50):
+    """Returns median CPU seconds per call keyed by call/size, then by repository."""
+    results = {}
+
+    for size in sizes:
+        responses = _responses(wire_items(max(size, 1)))
+
+        for name in REPOS:
+            repo = _repo(name, responses)
+
+            for call_name, call in _calls(repo):
+                # The first call builds what later calls reuse, like a
+                # warm Lambda container does.
+                call()
+
+                timings = []
+
+                for _ in range(repeat):
+                    start = process_time()
+
+                    call()
+
+                    timings.append(process_time() - start)
+
+                results.setdefault(f"{call_name}/{size}", {})[name] = median(timings)
+
+    return results
+
+
+def format_results(results):
+    lines = [f"{'call/size':<32}{'resource us':>13}{'client us':>11}{'saved':>8}"]
+
+    for key, result in results.items():
+        saved = 1 - result["client"] / result["resource"] if result["resource"] else 0
+
+        lines.append(
+            f"{key:<32}{result['resource'] * 1e6:>13.1f}"
+            f"{result['client'] * 1e6:>11.1f}{saved:>8.0%}"
+        )
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=50)
+
+    args = parser.parse_args(argv)
+
+    stdout.write(format_results(run(args.sizes, args.repeat)) + "\n")
+
+
+if __name__ == "__main__":
+    main()
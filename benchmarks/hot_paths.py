@@ -0,0 +1,238 @@
+"""Benchmarks SessionService hot paths across session sizes.
+
+Every operation runs against sessions of each size, either on the
+in-memory repository or on SessionsDynamoDBRepo backed by moto. Round
+trips are DynamoDB requests on the moto backend and repository calls on
+the memory backend. --check compares the results with a baseline and
+exits with an error when a tracked metric regresses beyond its threshold:
+
+    python -m benchmarks.hot_paths --backend moto --check benchmarks/baseline.json
+"""
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from json import dump, load
+from os import environ
+from statistics import median
+from sys import exit, stdout
+from time import perf_counter
+from uuid import uuid4
+
+from pointing_poker.repositories.instrumented import (
+    InstrumentedSessionsRepo,
+    RepoMetrics,
+)
+from pointing_poker.repositories.memory import InMemorySessionsRepo
+from pointing_poker.services.sessions import SessionService
+
+SIZES = (2, 10, 50, 200, 1000)
+
+
+@contextmanager
+def memory_backend(metrics):
+    yield InMemorySessionsRepo()
+
+
+@contextmanager
+def moto_backend(metrics):
+    from boto3 import resource
+    from moto import mock_dynamodb2
+
+    from pointing_poker.aws.repositories.instrumentation import instrument_client
+    from pointing_poker.aws.repositories.sessions import SessionsDynamoDBRepo
+
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        environ.setdefault(name, "testing")
+
+    environ.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+
+    with mock_dynamodb2():
+        resource("dynamodb").create_table(
+            TableName=environ.get("SESSIONS_TABLE_NAME", "sessions"),
+            AttributeDefinitions=[
+                {"AttributeName": "sessionID", "AttributeType": "S"},
+                {"AttributeName": "id", "AttributeType": "S"},
+            ],
+            KeySchema=[
+                {"AttributeName": "sessionID", "KeyType": "HASH"},
+                {"AttributeName": "id", "KeyType": "RANGE"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "id-index",
+                    "KeySchema": [{"AttributeName": "id", "KeyType": "HASH"}],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        repo = SessionsDynamoDBRepo()
+        instrument_client(repo.table.meta.client, metrics)
+
+        yield repo
+
+
+BACKENDS = {"memory": memory_backend, "moto": moto_backend}
+
+
+def _participant():
+    return {"id": str(uuid4()), "name": "participant"}
+
+
+def _seed(service, size):
+    """Creates a session with a moderator and size - 1 participants."""
+    session = service.create_session(
+        {"name": "benchmark", "pointingMin": 1, "pointingMax": 13},
+        {"id": str(uuid4()), "name": "moderator"},
+    )
+
+    participants = [{**_participant(), "isModerator": False} for _ in range(size - 1)]
+
+    for participant in participants:
+        service.repo.repo.add_participant(
+            session["id"], participant, record_expiration=session["expiresIn"]
+        )
+
+    return session["id"], participants
+
+
+def _round(service, session_id, participants):
+    """Runs every operation once; yields each name with its call."""
+    joining = _participant()
+    voter = participants[0]["id"] if participants else None
+
+    yield "create_session", lambda: service.create_session(
+        {"name": "benchmark", "pointingMin": 1, "pointingMax": 13},
+        {"id": str(uuid4()), "name": "moderator"},
+    )
+    yield "join_session", lambda: service.join_session(session_id, dict(joining))
+    yield "leave_session", lambda: service.leave_session(session_id, joining["id"])
+    yield "start_voting", lambda: service.start_voting(session_id)
+
+    if voter is not None:
+        yield "set_vote", lambda: service.set_vote(
+            session_id, voter, {"points": 3, "abstained": False}
+        )
+
+    yield "stop_voting", lambda: service.stop_voting(session_id)
+    yield "session", lambda: service.session(session_id)
+
+
+def run(backend="memory", sizes=SIZES, repeat=3):
+    """Returns round trips and median seconds keyed by operation/size."""
+    results = {}
+
+    for size in sizes:
+        metrics = RepoMetrics()
+
+        with BACKENDS[backend](metrics) as repo:
+            service = SessionService(InstrumentedSessionsRepo(repo, metrics))
+            session_id, participants = _seed(service, size)
+
+            timings = {}
+
+            for _ in range(repeat):
+                for operation, call in _round(service, session_id, participants):
+                    metrics.handler = operation
+                    start = perf_counter()
+
+                    call()
+
+                    timings.setdefault(operation, []).append(perf_counter() - start)
+
+                metrics.handler = None
+
+            snapshot = metrics.snapshot()
+
+        for operation, seconds in timings.items():
+            entries = [
+                entry
+                for (handler, _), entry in snapshot.items()
+                if handler == operation
+            ]
+
+            calls = sum(entry["Calls"] for entry in entries)
+            requests = sum(entry["RoundTrips"] for entry in entries)
+
+            results[f"{operation}/{size}"] = {
+                "roundTrips": (requests if backend == "moto" else calls) / repeat,
+                "seconds": median(seconds),
+            }
+
+    return results
+
+
+def compare(results, baseline, threshold, time_threshold=None):
+    """Returns a message for every tracked metric regressed beyond its threshold.
+
+    Round trips are always tracked; wall time only with a time_threshold, as
+    it varies between machines.
+    """
+    tracked = {"roundTrips": threshold}
+
+    if time_threshold is not None:
+        tracked["seconds"] = time_threshold
+
+    regressions = []
+
+    for key, expected in sorted(baseline.items()):
+        if key not in results:
+            continue
+
+        for metric, allowed in tracked.items():
+            limit = expected[metric] * (1 + allowed)
+
+            if results[key][metric] > limit:
+                regressions.append(
+                    f"{key} {metric}: {results[key][metric]:g} > {limit:g}"
+                    f" (baseline {expected[metric]:g})"
+                )
+
+    return regressions
+
+
+def format_results(results):
+    lines = [f"{'operation/size':<22}{'round trips':>12}{'ms':>10}"]
+
+    for key, result in results.items():
+        lines.append(
+            f"{key:<22}{result['roundTrips']:>12g}{result['seconds'] * 1000:>10.3f}"
+        )
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="memory")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--write-baseline", metavar="PATH")
+    parser.add_argument("--check", metavar="PATH", help="baseline to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--time-threshold", type=float)
+
+    args = parser.parse_args(argv)
+
+    results = run(args.backend, args.sizes, args.repeat)
+
+    stdout.write(format_results(results) + "\n")
+
+    if args.write_baseline:
+        with open(args.write_baseline, "w") as baseline_file:
+            dump(results, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+
+    if args.check:
+        with open(args.check) as baseline_file:
+            regressions = compare(
+                results, load(baseline_file), args.threshold, args.time_threshold
+            )
+
+        if regressions:
+            stdout.write("regressions:\n  " + "\n  ".join(regressions) + "\n")
+            exit(1)
+
+
+if __name__ == "__main__":
+    main()
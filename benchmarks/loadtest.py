@@ -0,0 +1,253 @@
+"""Offline load test of SessionService against InMemorySessionsRepo.
+
+Simulates concurrent sessions, each with a moderator and participants
+joining and voting at the same time through start, vote, stop and close,
+and reports throughput, latency percentiles, failures and repository calls
+per service operation:
+
+    python -m benchmarks.loadtest --sessions 50 --participants 10 --rounds 3
+"""
+from argparse import ArgumentParser
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from json import dumps
+from random import Random
+from sys import stdout
+from threading import Lock, local
+from time import perf_counter
+from uuid import UUID
+
+from pointing_poker.repositories.errors import ConflictError
+from pointing_poker.repositories.memory import InMemorySessionsRepo
+from pointing_poker.services.sessions import SessionService
+
+
+class CountingRepo:
+    """Counts the repository calls made by each service operation.
+
+    The operation is tracked per thread, so operations can run concurrently.
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self.calls = Counter()
+
+        self._current = local()
+        self._lock = Lock()
+
+    @property
+    def operation(self):
+        return getattr(self._current, "operation", None)
+
+    @operation.setter
+    def operation(self, operation):
+        self._current.operation = operation
+
+    def __getattr__(self, name):
+        attribute = getattr(self.repo, name)
+
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            with self._lock:
+                self.calls[(self.operation, name)] += 1
+
+            return attribute(*args, **kwargs)
+
+        return call
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _uuid(rng):
+    return str(UUID(int=rng.getrandbits(128), version=4))
+
+
+def run_session(repo, participants, rounds, seed):
+    """Runs one session from creation to close.
+
+    Participants join, and vote in each round, concurrently. Operations that
+    fail are counted, as conflicts or errors, instead of ending the run.
+    Returns latencies, repository calls and failures by operation.
+    """
+    rng = Random(seed)
+    counting = CountingRepo(repo)
+    service = SessionService(counting)
+    latencies = defaultdict(list)
+    failures = Counter()
+
+    def timed(operation, method, *args):
+        counting.operation = operation
+        start = perf_counter()
+
+        try:
+            return method(*args)
+        except ConflictError:
+            failures[(operation, "conflicts")] += 1
+        except Exception:
+            failures[(operation, "errors")] += 1
+        finally:
+            latencies[operation].append(perf_counter() - start)
+
+    session = timed(
+        "createSession",
+        service.create_session,
+        {"name": "load test", "pointingMin": 1, "pointingMax": 13},
+        {"id": _uuid(rng), "name": "moderator"},
+    )
+
+    if session is None:
+        return latencies, counting.calls, failures
+
+    participant_ids = [_uuid(rng) for _ in range(participants)]
+
+    with ThreadPoolExecutor(max_workers=max(participants, 1)) as pool:
+        list(
+            pool.map(
+                lambda participant_id: timed(
+                    "joinSession",
+                    service.join_session,
+                    session["id"],
+                    {"id": participant_id, "name": "participant"},
+                ),
+                participant_ids,
+            )
+        )
+
+        for _ in range(rounds):
+            timed("startVoting", service.start_voting, session["id"])
+
+            votes = [
+                {"points": rng.randint(1, 13), "abstained": False}
+                for _ in participant_ids
+            ]
+
+            list(
+                pool.map(
+                    lambda participant_id, vote: timed(
+                        "setVote", service.set_vote, session["id"], participant_id, vote
+                    ),
+                    participant_ids,
+                    votes,
+                )
+            )
+
+            timed("stopVoting", service.stop_voting, session["id"])
+            timed("session", service.session, session["id"])
+
+    timed("closeSession", service.close_session, session["id"])
+
+    return latencies, counting.calls, failures
+
+
+def run(sessions, participants, rounds, concurrency, seed=0):
+    """Runs sessions concurrently and returns per-operation statistics."""
+    repo = InMemorySessionsRepo()
+    latencies = defaultdict(list)
+    calls = Counter()
+    failures = Counter()
+
+    start = perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(
+            pool.map(
+                lambda idx: run_session(repo, participants, rounds, seed + idx),
+                range(sessions),
+            )
+        )
+
+    elapsed = perf_counter() - start
+
+    for session_latencies, session_calls, session_failures in results:
+        for operation, values in session_latencies.items():
+            latencies[operation].extend(values)
+
+        calls.update(session_calls)
+        failures.update(session_failures)
+
+    operations = {}
+
+    for operation, values in latencies.items():
+        operations[operation] = {
+            "count": len(values),
+            "p50Ms": percentile(values, 0.5) * 1000,
+            "p99Ms": percentile(values, 0.99) * 1000,
+            "conflicts": failures[(operation, "conflicts")],
+            "errors": failures[(operation, "errors")],
+            "repoCalls": {
+                method: count / len(values)
+                for (call_operation, method), count in sorted(calls.items())
+                if call_operation == operation
+            },
+        }
+
+    total = sum(len(values) for values in latencies.values())
+
+    return {
+        "sessions": sessions,
+        "participants": participants,
+        "rounds": rounds,
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "opsPerSecond": total / elapsed,
+        "conflicts": sum(
+            count for (_, kind), count in failures.items() if kind == "conflicts"
+        ),
+        "errors": sum(
+            count for (_, kind), count in failures.items() if kind == "errors"
+        ),
+        "operations": operations,
+    }
+
+
+def format_report(report):
+    lines = [
+        f"{report['sessions']} sessions x {report['participants']} participants, "
+        f"{report['rounds']} rounds on {report['concurrency']} threads: "
+        f"{report['opsPerSecond']:.0f} ops/s, "
+        f"{report['conflicts']} conflicts, {report['errors']} errors",
+        f"{'operation':<14}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'conflicts':>11}{'errors':>8}  repo calls/op",
+    ]
+
+    for operation, stats in report["operations"].items():
+        repo_calls = ", ".join(
+            f"{method}={count:g}" for method, count in stats["repoCalls"].items()
+        )
+
+        lines.append(
+            f"{operation:<14}{stats['count']:>8}{stats['p50Ms']:>10.3f}"
+            f"{stats['p99Ms']:>10.3f}{stats['conflicts']:>11}{stats['errors']:>8}"
+            f"  {repo_calls}"
+        )
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--participants", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+
+    args = parser.parse_args(argv)
+
+    report = run(
+        args.sessions, args.participants, args.rounds, args.concurrency, args.seed
+    )
+
+    stdout.write((dumps(report, indent=2) if args.json else format_report(report)))
+    stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Benchmarks schema-shaped responses against returning repository dicts.
+
+Sessions of each size are read from DynamoDB's wire format and encoded to
+JSON like the Lambda runtime does, along three paths:
+
+    resource  boto3's TypeDeserializer, responses returned as they are
+    shaped    boto3's TypeDeserializer, responses shaped by ResponseSerializer
+    client    the precompiled deserializer, responses shaped
+
+The report lists the CPU time per response along each path and the payload
+size with and without shaping:
+
+    python -m benchmarks.serialization --sizes 10 200 --repeat 200
+"""
+from argparse import ArgumentParser
+from decimal import Decimal
+from json import dumps
+from statistics import median
+from sys import stdout
+from time import process_time, time
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from pointing_poker.aws.controllers.responses import ResponseSerializer, load_schema
+from pointing_poker.aws.repositories.marshalling import deserialize_item
+from pointing_poker.repositories.items import (
+    item_to_participant,
+    item_to_session,
+    tally_of,
+)
+
+SIZES = (2, 10, 50, 200, 1000)
+
+
+def _runtime_default(value):
+    # The Lambda runtime encodes the Decimals boto3 returns as floats.
+    if isinstance(value, Decimal):
+        return float(value)
+
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def wire_items(size):
+    """Returns the items of a voting round with size participants, as sent by DynamoDB."""
+    now = int(time())
+    session_id = "session"
+
+    votes = [{"points": index % 13 + 1, "abstained": False} for index in range(size)]
+
+    items = [
+        {
+            "sessionID": session_id,
+            "id": session_id,
+            "type": "session",
+            "name": "benchmark",
+            "pointingMin": 1,
+            "pointingMax": 13,
+            "votingStarted": True,
+            "votingRound": 1,
+            "closed": False,
+            "createdAt": now,
+            "expiresIn": now + 24 * 60 * 60,
+            "ttl": now + 24 * 60 * 60,
+            "version": size,
+            "reviewing_issue_title": "IS-1",
+            "reviewing_issue_url": "https://example.com/IS-1",
+            "reviewing_issue_description": "benchmark",
+            "tally": tally_of(votes),
+        },
+        *(
+            {
+                "sessionID": session_id,
+                "id": f"participant-{index:04}",
+                "type": "participant",
+                "name": f"participant {index}",
+                "isModerator": index == 0,
+                "ttl": now + 24 * 60 * 60,
+                "votedRound": 1,
+                **vote,
+            }
+            for index, vote in enumerate(votes)
+        ),
+    ]
+
+    serializer = TypeSerializer()
+
+    return [
+        {key: serializer.serialize(value) for key, value in item.items()}
+        for item in items
+    ]
+
+
+def session_response(items, read):
+    """Maps wire items to the session response, reading each item with read."""
+    session_item, *participant_items = [read(item) for item in items]
+
+    session = item_to_session(session_item)
+    session["participants"] = [
+        item_to_participant(item, session["votingRound"]) for item in participant_items
+    ]
+
+    return session
+
+
+def _resource_read(deserializer=TypeDeserializer()):
+    return lambda item: {
+        key: deserializer.deserialize(value) for key, value in item.items()
+    }
+
+
+def _cpu_seconds(encode, repeat):
+    timings = []
+
+    for _ in range(repeat):
+        start = process_time()
+
+        encode()
+
+        timings.append(process_time() - start)
+
+    return median(timings)
+
+
+def run(sizes=SIZES, repeat=50):
+    """Returns CPU seconds per response along each path and bytes, keyed by size."""
+    shape = ResponseSerializer(load_schema()).root_field("session")
+    resource_read = _resource_read()
+
+    paths = {
+        "resource": lambda items: dumps(
+            session_response(items, resource_read), default=_runtime_default
+        ),
+        "shaped": lambda items: dumps(
+            shape(session_response(items, resource_read)), default=_runtime_default
+        ),
+        "client": lambda items: dumps(shape(session_response(items, deserialize_item))),
+    }
+
+    results = {}
+
+    for size in sizes:
+        items = wire_items(size)
+
+        results[str(size)] = {
+            **{
+                f"{name}Seconds": _cpu_seconds(lambda: encode(items), repeat)
+                for name, encode in paths.items()
+            },
+            "rawBytes": len(paths["resource"](items).encode()),
+            "shapedBytes": len(paths["client"](items).encode()),
+        }
+
+    return results
+
+
+def format_results(results):
+    lines = [
+        f"{'size':<8}{'resource us':>13}{'shaped us':>11}{'client us':>11}"
+        f"{'raw bytes':>11}{'shaped bytes':>14}"
+    ]
+
+    for size, result in results.items():
+        lines.append(
+            f"{size:<8}{result['resourceSeconds'] * 1e6:>13.1f}"
+            f"{result['shapedSeconds'] * 1e6:>11.1f}"
+            f"{result['clientSeconds'] * 1e6:>11.1f}"
+            f"{result['rawBytes']:>11}{result['shapedBytes']:>14}"
+        )
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=50)
+
+    args = parser.parse_args(argv)
+
+    stdout.write(format_results(run(args.sizes, args.repeat)) + "\n")
+
+
+if __name__ == "__main__":
+    main()
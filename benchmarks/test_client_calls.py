@@ -0,0 +1,12 @@
+from unittest import TestCase
+
+from benchmarks.client_calls import REPOS, format_results, run
+
+
+class ClientCallsTestCase(TestCase):
+    def test_run(self):
+        results = run(sizes=[2], repeat=1)
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(sorted(results["cast_vote/2"]), sorted(REPOS))
+        self.assertIn("saved", format_results(results))
@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+from benchmarks.hot_paths import compare, run
+
+
+class HotPathsTestCase(TestCase):
+    def test_run(self):
+        results = run("memory", sizes=[2], repeat=1)
+
+        self.assertEqual(results["session/2"]["roundTrips"], 1)
+        self.assertEqual(results["set_vote/2"]["roundTrips"], 2)
+        self.assertEqual(len(results), 7)
+
+    def test_compare(self):
+        baseline = {"session/2": {"roundTrips": 1, "seconds": 0.001}}
+
+        self.assertEqual(
+            compare({"session/2": {"roundTrips": 1, "seconds": 1}}, baseline, 0.1), []
+        )
+        self.assertEqual(
+            len(compare({"session/2": {"roundTrips": 2, "seconds": 0}}, baseline, 0.1)),
+            1,
+        )
+        self.assertEqual(
+            len(
+                compare(
+                    {"session/2": {"roundTrips": 1, "seconds": 1}},
+                    baseline,
+                    0.1,
+                    time_threshold=1,
+                )
+            ),
+            1,
+        )
@@ -0,0 +1,30 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from benchmarks.loadtest import format_report, run
+from pointing_poker.repositories.errors import ConflictError
+from pointing_poker.services.sessions import SessionService
+
+
+class LoadTestTestCase(TestCase):
+    def test_run(self):
+        report = run(sessions=2, participants=3, rounds=2, concurrency=2)
+
+        self.assertEqual(report["operations"]["setVote"]["count"], 12)
+        self.assertEqual(
+            report["operations"]["setVote"]["repoCalls"],
+            {"cast_vote": 1, "get_session": 1},
+        )
+        self.assertEqual((report["conflicts"], report["errors"]), (0, 0))
+        self.assertIn("setVote", format_report(report))
+
+    def test_failures_are_counted(self):
+        with patch.object(
+            SessionService, "stop_voting", side_effect=ConflictError("changed")
+        ), patch.object(SessionService, "session", side_effect=Exception("failed")):
+            report = run(sessions=2, participants=3, rounds=2, concurrency=2)
+
+        self.assertEqual(report["operations"]["stopVoting"]["conflicts"], 4)
+        self.assertEqual(report["operations"]["session"]["errors"], 4)
+        self.assertEqual((report["conflicts"], report["errors"]), (4, 4))
+        self.assertEqual(report["operations"]["closeSession"]["count"], 2)
@@ -0,0 +1,11 @@
+from unittest import TestCase
+
+from benchmarks.serialization import format_results, run
+
+
+class SerializationTestCase(TestCase):
+    def test_run(self):
+        results = run(sizes=[2], repeat=1)
+
+        self.assertLess(results["2"]["shapedBytes"], results["2"]["rawBytes"])
+        self.assertIn("shaped", format_results(results))
@@ -1,47 +1,35 @@
 #!/usr/bin/env python3
 
-from zipfile import ZipFile
-from os import path, walk
+from json import dumps
+from os import path
+from sys import stderr
 from tempfile import mkdtemp
 
 from aws_cdk.core import App
 
 from pointing_poker.aws.resources.app_stack import AppStack
+from pointing_poker.aws.resources.packaging import build_artifacts
 
-dirname = path.dirname(__file__)
-
-tmp = mkdtemp("pointing-poker-artifacts")
-
-function_zip_path = path.join(tmp, "function.zip")
-
-
-def get_all_file_paths(directory):
-    return [
-        path.join(root, filename)
-        for root, dirs, files in walk(directory)
-        for filename in files
-    ]
-
-
-with ZipFile(function_zip_path, "w") as func_zip:
-    func_zip.write(path.join(dirname, "pointing_poker/__init__.py"))
-
-    for file_path in get_all_file_paths(
-        path.join(dirname, "venv/lib/python3.7/site-packages")
-    ):
-        func_zip.write(
-            file_path,
-            arcname=path.relpath(file_path, "venv/lib/python3.7/site-packages"),
-        )
-
-    for file_path in [
-        *get_all_file_paths(path.join(dirname, "pointing_poker/services")),
-        *get_all_file_paths(path.join(dirname, "pointing_poker/aws")),
-    ]:
-        func_zip.write(file_path)
+dirname = path.dirname(path.abspath(__file__))
 
 app = App()
 
-AppStack(app, "pointing-poker", function_zip_path, path.join(dirname, "schema.graphql"))
+tmp = mkdtemp("pointing-poker-artifacts")
+
+artifacts = build_artifacts(
+    dirname,
+    tmp,
+    use_layer=app.node.try_get_context("dependencies_layer") in (True, "true"),
+)
+
+print(f"artifacts: {dumps(artifacts)}", file=stderr)
+
+AppStack(
+    app,
+    "pointing-poker",
+    artifacts["function"]["path"],
+    path.join(dirname, "schema.graphql"),
+    layer_asset=artifacts["layer"]["path"] if "layer" in artifacts else None,
+)
 
 app.synth()
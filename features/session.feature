@@ -346,6 +346,7 @@ Feature: Operate on pointing poker sessions
   Scenario: Set Vote
     Given a poker session
     And a participant with id "c2c7f148-fa36-49b9-bfb4-0e643daf6bff" and name "test"
+    And voting has started
     And a graphql query for field "setVote"
     """
     mutation ($sessionID: ID!, $participantID: ID!) {
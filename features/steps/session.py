@@ -55,6 +55,16 @@ join_session_query = gql(
     """
 )
 
+start_voting_query = gql(
+    """
+    mutation ($sessionID: ID!) {
+      startVoting(sessionID: $sessionID) {
+        votingStarted
+      }
+    }
+    """
+)
+
 use_step_matcher("parse")
 
 
@@ -198,6 +208,15 @@ def step_impl(context, participant_id, name):
     context.participant_id = participant_id
 
 
+@step("voting has started")
+def step_impl(context):
+    session_id = getattr(context, "session_id")
+    if session_id is None:
+        raise RuntimeError(f"A session is not defined")
+
+    client.execute(start_voting_query, variable_values={"sessionID": session_id})
+
+
 @then('the response contains error with message "{message}"')
 def step_impl(context, message):
     error = getattr(context, "error")
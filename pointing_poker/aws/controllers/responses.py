@@ -0,0 +1,146 @@
+from os import path
+from re import MULTILINE, compile as re_compile
+
+_PACKAGE_DIR = path.dirname(path.dirname(path.dirname(path.abspath(__file__))))
+
+# The function artifact carries the schema inside the package; a checkout
+# has it at the root of the repository.
+SCHEMA_PATHS = (
+    path.join(_PACKAGE_DIR, "schema.graphql"),
+    path.join(path.dirname(_PACKAGE_DIR), "schema.graphql"),
+)
+
+ROOT_TYPES = ("Query", "Mutation", "Subscription")
+
+# Undeclared attributes kept because a field resolver reads them from its
+# source: Participant.currentSession starts from the participant's sessionID.
+RESOLVER_SOURCES = {"Participant": ("sessionID",)}
+
+_TYPE = re_compile(r"^type\s+(\w+)[^{]*\{([^}]*)\}", MULTILINE)
+
+_FIELD = re_compile(r"^\s*(\w+)\s*(?:\([^)]*\))?\s*:\s*([\w\[\]!]+)", MULTILINE)
+
+_COMMENT = re_compile(r"#.*")
+
+
+def parse_schema(text):
+    """Returns the fields of every object type declared in a GraphQL schema.
+
+    Fields map to their type name and whether they hold a list; input types,
+    enums and directives are left out.
+    """
+    return {
+        name: {
+            field: (type_ref.strip("[]!"), type_ref.startswith("["))
+            for field, type_ref in _FIELD.findall(_COMMENT.sub("", body))
+        }
+        for name, body in _TYPE.findall(text)
+    }
+
+
+def load_schema(paths=SCHEMA_PATHS):
+    for schema_path in paths:
+        if path.exists(schema_path):
+            with open(schema_path) as schema_file:
+                return parse_schema(schema_file.read())
+
+    raise Exception(f"schema not found in {', '.join(paths)}")
+
+
+def _int(value):
+    return value if type(value) is int else int(value)
+
+
+def _float(value):
+    return value if type(value) is float else float(value)
+
+
+_SCALARS = {"Int": _int, "Float": _float}
+
+
+def _list_of(convert):
+    def convert_list(values):
+        return [None if value is None else convert(value) for value in values]
+
+    return convert_list
+
+
+class ResponseSerializer:
+    """Shapes resolver results after the object types of the schema.
+
+    Every object keeps only the fields its type declares, plus its
+    RESOLVER_SOURCES, and numbers read from DynamoDB as Decimal become the
+    int or float their field holds. Serializers are compiled once per type,
+    so a response is shaped with a single pass over its fields.
+    """
+
+    def __init__(self, types, resolver_sources=RESOLVER_SOURCES):
+        self.types = types
+        self.resolver_sources = resolver_sources
+
+        self._objects = {}
+
+    def _convert(self, type_name, is_list):
+        if type_name in self.types:
+            convert = self._object(type_name)
+        else:
+            convert = _SCALARS.get(type_name)
+
+        if convert is None or not is_list:
+            return convert
+
+        return _list_of(convert)
+
+    def _object(self, type_name):
+        if type_name in self._objects:
+            return self._objects[type_name]
+
+        copied, converted = [], []
+
+        def convert_object(value):
+            result = {name: value[name] for name in copied if name in value}
+
+            for name, convert in converted:
+                field = value.get(name)
+
+                if field is not None:
+                    result[name] = convert(field)
+                elif name in value:
+                    result[name] = None
+
+            return result
+
+        # Registered before its fields are compiled, as types refer to
+        # each other: Session to Participant and back.
+        self._objects[type_name] = convert_object
+
+        for name, type_ref in self.types[type_name].items():
+            convert = self._convert(*type_ref)
+
+            if convert is None:
+                copied.append(name)
+            else:
+                converted.append((name, convert))
+
+        copied.extend(self.resolver_sources.get(type_name, ()))
+
+        return convert_object
+
+    def field(self, parent, field_name):
+        """Returns the function shaping results of parent.field_name."""
+        type_name, is_list = self.types[parent][field_name]
+
+        convert = self._convert(type_name, is_list)
+
+        if convert is None:
+            return lambda value: value
+
+        return lambda value: None if value is None else convert(value)
+
+    def root_field(self, field_name):
+        """Returns the function shaping results of a query, mutation or subscription."""
+        for parent in ROOT_TYPES:
+            if field_name in self.types.get(parent, {}):
+                return self.field(parent, field_name)
+
+        raise Exception(f"no field {field_name} in the schema")
@@ -0,0 +1,155 @@
+from json import dumps, loads
+from logging import getLogger
+from os import environ
+from time import time
+from urllib.request import Request, urlopen
+
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.session import get_session
+
+from pointing_poker.aws.schedulers.rounds import RoundsSQSScheduler
+
+# Subscribers to sessionStateChanged receive the fields selected here.
+STOP_VOTING = """
+mutation StopVoting($sessionID: ID!, $votingRound: Int) {
+  stopVoting(sessionID: $sessionID, votingRound: $votingRound) {
+    id
+    name
+    createdAt
+    expiresIn
+    pointingMin
+    pointingMax
+    votingStarted
+    votingDeadline
+    closed
+    version
+    reviewingIssue { title url description }
+    participants { id name isModerator vote { points abstained } }
+    tally {
+      count sum abstentions min max mean consensus histogram { points count }
+    }
+  }
+}
+"""
+
+# Subscribers to sessionDeltas hear of the stopped round through this.
+PUBLISH_SESSION_DELTA = """
+mutation PublishSessionDelta($delta: SessionDeltaInput!) {
+  publishSessionDelta(delta: $delta) {
+    sessionID
+    version
+    kind
+    votingStarted
+  }
+}
+"""
+
+# Errors stopping a round that ended, or whose session did, some other way.
+_DONE_ERRORS = ("is over", "not found", "is closed")
+
+logger = getLogger(__name__)
+
+_scheduler = None
+
+
+def _default_scheduler(scheduler):
+    global _scheduler
+
+    if scheduler is not None:
+        return scheduler
+
+    if _scheduler is None:
+        _scheduler = RoundsSQSScheduler()
+
+    return _scheduler
+
+
+def signed_request(url, body, credentials, region):
+    """Returns the request posting body to url, signed with SigV4 for AppSync."""
+    request = AWSRequest(
+        method="POST", url=url, data=body, headers={"Content-Type": "application/json"}
+    )
+
+    SigV4Auth(credentials, "appsync", region).add_auth(request)
+
+    return Request(url, data=body, headers=dict(request.headers), method="POST")
+
+
+def graphql(query, variables):
+    """Runs an operation against the AppSync API, authorized with IAM.
+
+    Requests are signed with the credentials of the function's role.
+    """
+    request = signed_request(
+        environ["APPSYNC_URL"],
+        dumps({"query": query, "variables": variables}).encode(),
+        get_session().get_credentials(),
+        environ["AWS_REGION"],
+    )
+
+    with urlopen(request) as response:
+        return loads(response.read())
+
+
+def stop_voting(session_id, voting_round, execute=graphql):
+    """Stops a round through the API, so subscribers hear of it.
+
+    Subscribers to sessionStateChanged get the stopped session and those to
+    sessionDeltas a delta published right after. Returns False when the
+    round, or its session, had already ended.
+    """
+    result = execute(
+        STOP_VOTING, {"sessionID": session_id, "votingRound": voting_round}
+    )
+
+    errors = result.get("errors") or []
+
+    if any(error.get("message", "").endswith(_DONE_ERRORS) for error in errors):
+        return False
+
+    if errors:
+        raise Exception(
+            f"failed to stop voting round {voting_round} of session with id {session_id}"
+        )
+
+    result = execute(
+        PUBLISH_SESSION_DELTA,
+        {
+            "delta": {
+                "sessionID": session_id,
+                "version": result["data"]["stopVoting"]["version"],
+                "kind": "VOTING_STATE_CHANGED",
+                "votingStarted": False,
+            }
+        },
+    )
+
+    if result.get("errors"):
+        # Redelivering the message would not publish it again, since the
+        # round is over; clients query the session when they see the gap.
+        logger.error(
+            "failed to publish the end of voting round %s of session with id %s",
+            voting_round,
+            session_id,
+        )
+
+    return True
+
+
+def round_deadlines(event, _, scheduler=None, execute=graphql):
+    """Ends the timed rounds whose deadline messages arrived from SQS.
+
+    Messages for rounds outlasting the longest SQS delay arrive before the
+    deadline and are scheduled again. Stopping a round that already ended
+    is a no-op, so redelivered messages are harmless.
+    """
+    for record in event["Records"]:
+        message = loads(record["body"])
+
+        if message["deadline"] > time():
+            _default_scheduler(scheduler).schedule(
+                message["sessionID"], message["votingRound"], message["deadline"]
+            )
+        else:
+            stop_voting(message["sessionID"], message["votingRound"], execute)
@@ -0,0 +1,41 @@
+from pointing_poker.aws.controllers import sessions
+
+ROUTES = {
+    "createSession": sessions.create_session,
+    "joinSession": sessions.join_session,
+    "leaveSession": sessions.leave_session,
+    "session": sessions.session,
+    "participant": sessions.participant,
+    "setVote": sessions.set_vote,
+    "startVoting": sessions.start_voting,
+    "setReviewingIssue": sessions.set_reviewing_issue,
+    "stopVoting": sessions.stop_voting,
+    "closeSession": sessions.close_session,
+    "joinSessionDelta": sessions.join_session_delta,
+    "leaveSessionDelta": sessions.leave_session_delta,
+    "setVoteDelta": sessions.set_vote_delta,
+    "startVotingDelta": sessions.start_voting_delta,
+    "setReviewingIssueDelta": sessions.set_reviewing_issue_delta,
+    "stopVotingDelta": sessions.stop_voting_delta,
+    "closeSessionDelta": sessions.close_session_delta,
+    "currentSession": sessions.participant_current_session,
+}
+
+
+def handler(event, context, service=None):
+    """Single entry point dispatching every resolver on info.fieldName.
+
+    Batched resolvers receive a list of events sharing the same field.
+    """
+    if isinstance(event, list):
+        if not event:
+            return []
+
+        field_name = event[0]["info"]["fieldName"]
+    else:
+        field_name = event["info"]["fieldName"]
+
+    if field_name not in ROUTES:
+        raise Exception(f"no handler for field {field_name}")
+
+    return ROUTES[field_name](event, context, service)
@@ -1,14 +1,305 @@
+from asyncio import run
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from json import loads
+from os import environ
+from re import compile as re_compile
+
+from botocore.exceptions import ClientError
+
+from pointing_poker.aws.controllers.responses import ResponseSerializer, load_schema
+from pointing_poker.aws.repositories import client as client_repo
 from pointing_poker.aws.repositories import sessions as session_repo
+from pointing_poker.aws.repositories.instrumentation import instrument_client
+from pointing_poker.aws.repositories.retries import remaining_seconds
+from pointing_poker.aws.schedulers.rounds import RoundsSQSScheduler
+from pointing_poker.repositories.cache import CachingSessionsRepo
+from pointing_poker.repositories.instrumented import (
+    InstrumentedSessionsRepo,
+    RepoMetrics,
+)
 from pointing_poker.services import sessions as session_service
+from pointing_poker.services.aio import AsyncSessionService
+
+_EXPIRED_CREDENTIALS_CODES = {"ExpiredToken", "ExpiredTokenException", "RequestExpired"}
+
+_PARTICIPANTS_ARGUMENTS = re_compile(r"\bparticipants\s*\(([^)]*)\)")
+
+_ARGUMENT = re_compile(r'(\w+)\s*:\s*("(?:[^"\\]|\\.)*"|\$\w+|-?\d+|null)')
+
+_service = None
+
+_metrics = None
+
+_executor = None
+
+_async_service = None
+
+_pool = None
+
+_response_serializer = None
+
+_shapers = {}
+
+# Resolvers of fields outside the root types, with the field they resolve.
+_BATCH_FIELDS = {"participant_current_session": ("Participant", "currentSession")}
+
+
+def set_service(service, metrics=None):
+    """Replaces the service shared by warm invocations.
+
+    Passing None drops the current instance so the next invocation builds a
+    fresh one. metrics, when given, is tagged with the handler being served
+    and flushed after every invocation.
+    """
+    global _service, _metrics, _executor, _async_service
+
+    _service = service
+    _metrics = metrics
+    _executor = None
+    _async_service = None
+
+
+def _shared_pool():
+    """Returns the thread pool the services make concurrent calls on.
+
+    SessionService and AsyncSessionService share it. It is sized to the
+    DynamoDB connection pool and outlives the services, so every warm
+    invocation reuses its threads.
+    """
+    global _pool
+
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=session_repo.MAX_POOL_CONNECTIONS)
+
+    return _pool
 
 
 def _default_service(service):
-    if service is None:
-        return session_service.SessionService(session_repo.SessionsDynamoDBRepo())
+    global _service, _metrics, _executor
+
+    if service is not None:
+        return service
+
+    if _service is None:
+        dynamodb_repo = (
+            client_repo.SessionsDynamoDBClientRepo()
+            if environ.get("DYNAMODB_CLIENT") == "true"
+            else session_repo.SessionsDynamoDBRepo()
+        )
+        repo = dynamodb_repo
+        _executor = dynamodb_repo.executor
+
+        if float(environ.get("SESSIONS_CACHE_TTL", "0")) > 0:
+            repo = CachingSessionsRepo(repo, ttl=float(environ["SESSIONS_CACHE_TTL"]))
+
+        if environ.get("REPO_METRICS") == "true":
+            _metrics = RepoMetrics()
+            instrument_client(dynamodb_repo.table.meta.client, _metrics)
+
+            if isinstance(dynamodb_repo, client_repo.SessionsDynamoDBClientRepo):
+                instrument_client(dynamodb_repo.client, _metrics)
+            _executor.on_retry = _metrics.record_retry
+            repo = InstrumentedSessionsRepo(repo, _metrics)
+
+        _service = session_service.SessionService(
+            repo,
+            legacy_set_vote=environ.get("LEGACY_SET_VOTE") == "true",
+            scheduler=RoundsSQSScheduler() if "ROUNDS_QUEUE_URL" in environ else None,
+            executor=_shared_pool()
+            if environ.get("PARALLEL_REPO_CALLS") == "true"
+            else None,
+        )
+
+        if _metrics is not None:
+            _service.on_time_saved = _metrics.record_time_saved
+
+    return _service
+
+
+def _default_async_service(service):
+    """Returns the AsyncSessionService running service, shared like it is."""
+    global _async_service
+
+    service = _default_service(service)
+
+    if _async_service is None or _async_service.service is not service:
+        _async_service = AsyncSessionService(service, executor=_shared_pool())
+
+    return _async_service
+
+
+def _async_enabled():
+    return environ.get("ASYNC_SERVICE") == "true"
+
+
+def _schema_responses():
+    return environ.get("SCHEMA_RESPONSES") == "true"
+
+
+def _camel_case(name):
+    first, *rest = name.split("_")
+
+    return first + "".join(word.capitalize() for word in rest)
+
+
+def _shaper(func):
+    """Returns the function shaping the results of func after the schema.
+
+    The schema is read once per container and every shaper is compiled on
+    first use.
+    """
+    global _response_serializer
+
+    name = func.__name__
+
+    if name in _shapers:
+        return _shapers[name]
+
+    if _response_serializer is None:
+        _response_serializer = ResponseSerializer(load_schema())
+
+    if name in _BATCH_FIELDS:
+        shape = _response_serializer.field(*_BATCH_FIELDS[name])
+        _shapers[name] = lambda results: [shape(result) for result in results]
+    else:
+        _shapers[name] = _response_serializer.root_field(_camel_case(name))
+
+    return _shapers[name]
+
+
+def _argument_value(value, variables):
+    if value.startswith("$"):
+        return variables.get(value[1:])
+
+    return loads(value)
+
+
+def _read_options(event):
+    """Derives repository read options from the resolver info in event.
+
+    The requested fields come from selectionSetList; after and first are
+    taken from the top-level participants(after, first) selection.
+    """
+    info = event.get("info")
+
+    if not info:
+        return {}
+
+    options = {"fields": info.get("selectionSetList")}
+
+    selection = info.get("selectionSetGraphQL") or ""
+    variables = info.get("variables") or {}
+
+    for match in _PARTICIPANTS_ARGUMENTS.finditer(selection):
+        prefix = selection[: match.start()]
+
+        if prefix.count("{") - prefix.count("}") != 1:
+            continue
+
+        for name, value in _ARGUMENT.findall(match.group(1)):
+            value = _argument_value(value, variables)
+
+            if name in ("after", "first") and value is not None:
+                options[name] = value
+
+    return options
+
+
+def _write_options(event):
+    """Passes the optional ifVersion argument of a mutation to the service."""
+    if event.get("ifVersion") is None:
+        return {}
+
+    return {"if_version": event["ifVersion"]}
+
+
+def _voting_options(event):
+    """Passes the optional durationInSecs and votingRound arguments to the service."""
+    options = {}
+
+    if event.get("durationInSecs") is not None:
+        options["duration"] = event["durationInSecs"]
+
+    if event.get("votingRound") is not None:
+        options["voting_round"] = event["votingRound"]
+
+    return options
+
+
+def _expired_credentials(err):
+    while err is not None:
+        if (
+            isinstance(err, ClientError)
+            and err.response["Error"]["Code"] in _EXPIRED_CREDENTIALS_CODES
+        ):
+            return True
+
+        err = err.__context__
+
+    return False
+
+
+def _invoke(func, event, context, service):
+    if service is not None:
+        return func(event, context, service)
+
+    _default_service(None)
 
-    return service
+    if _executor is not None:
+        _executor.set_budget(remaining_seconds(context))
 
+    metrics = _metrics
 
+    if metrics is None:
+        return func(event, context, service)
+
+    metrics.handler = func.__name__
+
+    try:
+        return func(event, context, service)
+    finally:
+        metrics.flush()
+        metrics.handler = None
+
+
+def _writes():
+    return 0 if _executor is None else _executor.writes
+
+
+def _call(func, event, context, service):
+    """Invokes func, once more on a fresh service if credentials expired.
+
+    The handler is only replayed when none of its writes went through, so a
+    write is never repeated; otherwise the error reaches the caller.
+    """
+    writes = _writes()
+
+    try:
+        return _invoke(func, event, context, service)
+    except Exception as err:
+        if service is not None or not _expired_credentials(err) or _writes() != writes:
+            raise
+
+    set_service(None)
+
+    return _invoke(func, event, context, service)
+
+
+def _handler(func):
+    @wraps(func)
+    def wrapper(event, context, service=None):
+        result = _call(func, event, context, service)
+
+        if _schema_responses():
+            return _shaper(func)(result)
+
+        return result
+
+    return wrapper
+
+
+@_handler
 def create_session(event, _, service=None):
     session_description = event["sessionDescription"]
 
@@ -19,66 +310,213 @@ def create_session(event, _, service=None):
     )
 
 
+@_handler
 def session(event, _, service=None):
     session_id = event["sessionID"]
 
-    return _default_service(service).session(session_id)
+    return _default_service(service).session(session_id, **_read_options(event))
 
 
+@_handler
 def session_state_changed(event, _, service=None):
     session_id = event["id"]
 
     return _default_service(service).session(session_id)
 
 
+@_handler
 def join_session(event, _, service=None):
     session_id = event["sessionID"]
     participant_description = event["participant"]
 
-    return _default_service(service).join_session(session_id, participant_description)
+    return _default_service(service).join_session(
+        session_id, participant_description, **_write_options(event)
+    )
 
 
+@_handler
 def leave_session(event, _, service=None):
     session_id = event["sessionID"]
     participant_id = event["participantID"]
 
-    return _default_service(service).leave_session(session_id, participant_id)
+    return _default_service(service).leave_session(
+        session_id, participant_id, **_write_options(event)
+    )
 
 
+@_handler
 def close_session(event, _, service=None):
     session_id = event["sessionID"]
 
-    return _default_service(service).close_session(session_id)
+    return _default_service(service).close_session(session_id, **_write_options(event))
 
 
+@_handler
 def set_vote(event, _, service=None):
     session_id = event["sessionID"]
     participant_id = event["participantID"]
     vote = event["vote"]
 
-    return _default_service(service).set_vote(session_id, participant_id, vote)
+    service = _default_service(service)
 
+    # Only legacy votes read anything the async service can read together.
+    if _async_enabled() and service.legacy_set_vote:
+        return run(
+            _default_async_service(service).set_vote(
+                session_id, participant_id, vote, **_write_options(event)
+            )
+        )
 
+    return service.set_vote(session_id, participant_id, vote, **_write_options(event))
+
+
+@_handler
 def start_voting(event, _, service=None):
     session_id = event["sessionID"]
 
-    return _default_service(service).start_voting(session_id)
+    return _default_service(service).start_voting(
+        session_id, **_write_options(event), **_voting_options(event)
+    )
 
 
+@_handler
 def stop_voting(event, _, service=None):
     session_id = event["sessionID"]
 
-    return _default_service(service).stop_voting(session_id)
+    return _default_service(service).stop_voting(
+        session_id, **_write_options(event), **_voting_options(event)
+    )
 
 
+@_handler
 def set_reviewing_issue(event, _, service=None):
     session_id = event["sessionID"]
     issue = event["issue"]
 
-    return _default_service(service).set_reviewing_issue(session_id, issue)
+    return _default_service(service).set_reviewing_issue(
+        session_id, issue, **_write_options(event)
+    )
+
+
+@_handler
+def join_session_delta(event, _, service=None):
+    session_id = event["sessionID"]
+    participant_description = event["participant"]
+
+    return _default_service(service).join_session_delta(
+        session_id, participant_description, **_write_options(event)
+    )
+
+
+@_handler
+def leave_session_delta(event, _, service=None):
+    session_id = event["sessionID"]
+    participant_id = event["participantID"]
+
+    return _default_service(service).leave_session_delta(
+        session_id, participant_id, **_write_options(event)
+    )
+
+
+@_handler
+def close_session_delta(event, _, service=None):
+    session_id = event["sessionID"]
+
+    return _default_service(service).close_session_delta(
+        session_id, **_write_options(event)
+    )
+
+
+@_handler
+def set_vote_delta(event, _, service=None):
+    session_id = event["sessionID"]
+    participant_id = event["participantID"]
+    vote = event["vote"]
+
+    return _default_service(service).set_vote_delta(
+        session_id, participant_id, vote, **_write_options(event)
+    )
+
+
+@_handler
+def start_voting_delta(event, _, service=None):
+    session_id = event["sessionID"]
+
+    return _default_service(service).start_voting_delta(
+        session_id, **_write_options(event), **_voting_options(event)
+    )
+
+
+@_handler
+def stop_voting_delta(event, _, service=None):
+    session_id = event["sessionID"]
+
+    return _default_service(service).stop_voting_delta(
+        session_id, **_write_options(event), **_voting_options(event)
+    )
+
+
+@_handler
+def set_reviewing_issue_delta(event, _, service=None):
+    session_id = event["sessionID"]
+    issue = event["issue"]
+
+    return _default_service(service).set_reviewing_issue_delta(
+        session_id, issue, **_write_options(event)
+    )
 
 
+@_handler
 def participant(event, _, service=None):
     participant_id = event["id"]
 
     return _default_service(service).participant(participant_id)
+
+
+def _participant_session_id(service, participant, directory):
+    if participant.get("sessionID"):
+        return participant["sessionID"]
+
+    if participant["id"] in directory:
+        return directory[participant["id"]]
+
+    try:
+        return service.participant(participant["id"])["sessionID"]
+    except Exception:
+        return None
+
+
+@_handler
+def participant_current_session(events, _, service=None):
+    """Resolves Participant.currentSession for an AppSync BatchInvoke.
+
+    events holds one entry per participant; participants without a
+    sessionID are looked up in the participant directory together, each
+    distinct session is read once and the results are returned in the order
+    of events.
+    """
+    if _async_enabled():
+        return run(
+            _default_async_service(service).current_sessions(
+                [event["source"] for event in events]
+            )
+        )
+
+    service = _default_service(service)
+
+    unresolved = [
+        event["source"]["id"]
+        for event in events
+        if not event["source"].get("sessionID")
+    ]
+    directory = service.participant_sessions(unresolved) if unresolved else {}
+
+    session_ids = [
+        _participant_session_id(service, event["source"], directory) for event in events
+    ]
+
+    sessions = service.sessions(
+        [session_id for session_id in session_ids if session_id is not None]
+    )
+
+    return [sessions.get(session_id) for session_id in session_ids]
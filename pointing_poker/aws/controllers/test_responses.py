@@ -0,0 +1,99 @@
+from decimal import Decimal
+from unittest import TestCase
+
+from pointing_poker.aws.controllers.responses import (
+    ResponseSerializer,
+    load_schema,
+    parse_schema,
+)
+
+SCHEMA = """
+input VoteDescription {
+    points: Int
+}
+
+type Vote {
+    points: Int!
+    abstained: Boolean!
+}
+
+# Participants vote.
+type Participant {
+    id: ID!
+    currentSession: Session
+    vote: Vote
+}
+
+type Session {
+    id: ID!
+    participants(after: ID, first: Int): [Participant!]!
+    mean: Float
+}
+
+type Query {
+    session(sessionID: ID!): Session
+}
+"""
+
+
+class ResponsesTestCase(TestCase):
+    def setUp(self) -> None:
+        self.serializer = ResponseSerializer(parse_schema(SCHEMA))
+
+    def test_parse_schema(self):
+        types = parse_schema(SCHEMA)
+
+        self.assertEqual(sorted(types), ["Participant", "Query", "Session", "Vote"])
+        self.assertEqual(types["Session"]["participants"], ("Participant", True))
+        self.assertEqual(types["Participant"]["vote"], ("Vote", False))
+
+    def test_load_schema(self):
+        types = load_schema()
+
+        self.assertEqual(types["Mutation"]["setVote"], ("Session", False))
+        self.assertEqual(types["Tally"]["histogram"], ("TallyBucket", True))
+
+    def test_root_field(self):
+        shape = self.serializer.root_field("session")
+
+        response = shape(
+            {
+                "id": "s",
+                "sessionID": "s",
+                "ttl": Decimal("100"),
+                "mean": Decimal("2.5"),
+                "participants": [
+                    {
+                        "id": "p",
+                        "sessionID": "s",
+                        "name": "undeclared",
+                        "vote": {"points": Decimal("3"), "abstained": False},
+                    },
+                    {"id": "q", "vote": None},
+                ],
+            }
+        )
+
+        self.assertEqual(
+            response,
+            {
+                "id": "s",
+                "mean": 2.5,
+                "participants": [
+                    {
+                        "id": "p",
+                        "sessionID": "s",
+                        "vote": {"points": 3, "abstained": False},
+                    },
+                    {"id": "q", "vote": None},
+                ],
+            },
+        )
+        self.assertIs(type(response["participants"][0]["vote"]["points"]), int)
+        self.assertIsNone(shape(None))
+
+    def test_unknown_field(self):
+        with self.assertRaises(Exception) as context:
+            self.serializer.root_field("bogus")
+
+        self.assertEqual(str(context.exception), "no field bogus in the schema")
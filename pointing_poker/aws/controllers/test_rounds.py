@@ -0,0 +1,109 @@
+from json import dumps
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from botocore.credentials import Credentials
+
+from pointing_poker.aws.controllers import rounds
+from pointing_poker.aws.controllers.rounds import (
+    round_deadlines,
+    signed_request,
+    stop_voting,
+)
+
+
+def record(session_id, voting_round, deadline):
+    return {
+        "body": dumps(
+            {"sessionID": session_id, "votingRound": voting_round, "deadline": deadline}
+        )
+    }
+
+
+class RoundDeadlinesTestCase(TestCase):
+    def setUp(self) -> None:
+        self.scheduler = Mock()
+        self.execute = Mock(return_value={"data": {"stopVoting": {"version": 4}}})
+
+    def test_due_rounds_are_stopped(self):
+        with patch.object(rounds, "time", return_value=1000):
+            round_deadlines(
+                {"Records": [record("a", 1, 1000), record("b", 2, 2000)]},
+                None,
+                self.scheduler,
+                self.execute,
+            )
+
+        self.execute.assert_any_call(
+            rounds.STOP_VOTING, {"sessionID": "a", "votingRound": 1}
+        )
+        self.assertEqual(self.execute.call_count, 2)
+        self.scheduler.schedule.assert_called_once_with("b", 2, 2000)
+
+    def test_stop_voting(self):
+        self.assertTrue(stop_voting("a", 1, self.execute))
+
+        self.execute.assert_called_with(
+            rounds.PUBLISH_SESSION_DELTA,
+            {
+                "delta": {
+                    "sessionID": "a",
+                    "version": 4,
+                    "kind": "VOTING_STATE_CHANGED",
+                    "votingStarted": False,
+                }
+            },
+        )
+
+        for message in (
+            "voting round 1 of session with id a is over",
+            "session with id a not found",
+            "session with id a is closed",
+        ):
+            self.execute.reset_mock()
+            self.execute.return_value = {"errors": [{"message": message}]}
+
+            self.assertFalse(stop_voting("a", 1, self.execute))
+            self.execute.assert_called_once()
+
+        self.execute.return_value = {"errors": [{"message": "throttled"}]}
+
+        with self.assertRaises(Exception) as context:
+            stop_voting("a", 1, self.execute)
+
+        self.assertEqual(
+            str(context.exception),
+            "failed to stop voting round 1 of session with id a",
+        )
+
+    def test_failed_publish_is_logged(self):
+        self.execute.side_effect = [
+            {"data": {"stopVoting": {"version": 4}}},
+            {"errors": [{"message": "throttled"}]},
+        ]
+
+        with self.assertLogs(rounds.logger, "ERROR"):
+            self.assertTrue(stop_voting("a", 1, self.execute))
+
+
+class SignedRequestTestCase(TestCase):
+    def test_signed_request(self):
+        url = "https://example.appsync-api.us-west-2.amazonaws.com/graphql"
+
+        request = signed_request(
+            url, b"{}", Credentials("access", "secret", "token"), "us-west-2"
+        )
+
+        self.assertEqual(request.full_url, url)
+        self.assertEqual(request.get_method(), "POST")
+        self.assertEqual(request.data, b"{}")
+        self.assertTrue(
+            request.get_header("Authorization").startswith(
+                "AWS4-HMAC-SHA256 Credential=access/"
+            )
+        )
+        self.assertIn(
+            "/us-west-2/appsync/aws4_request", request.headers["Authorization"]
+        )
+        self.assertEqual(request.get_header("X-amz-security-token"), "token")
+        self.assertIsNone(request.get_header("X-api-key"))
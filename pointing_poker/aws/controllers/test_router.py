@@ -0,0 +1,54 @@
+from unittest import TestCase
+from unittest.mock import Mock
+
+from pointing_poker.aws.controllers.router import handler
+
+
+class RouterTestCase(TestCase):
+    def setUp(self) -> None:
+        self.service = Mock()
+
+    def test_dispatches_on_field_name(self):
+        event = {
+            "sessionID": "session",
+            "info": {"fieldName": "stopVoting", "parentTypeName": "Mutation"},
+        }
+
+        handler(event, None, self.service)
+
+        self.service.stop_voting.assert_called_with("session")
+
+    def test_query(self):
+        event = {
+            "sessionID": "session",
+            "info": {"fieldName": "session", "parentTypeName": "Query"},
+        }
+
+        handler(event, None, self.service)
+
+        self.service.session.assert_called_with("session", fields=None)
+
+    def test_batch(self):
+        self.service.sessions.return_value = {"session": {"id": "session"}}
+
+        events = [
+            {
+                "source": {"id": "participant", "sessionID": "session"},
+                "info": {
+                    "fieldName": "currentSession",
+                    "parentTypeName": "Participant",
+                },
+            }
+        ]
+
+        self.assertEqual(handler(events, None, self.service), [{"id": "session"}])
+
+        self.assertEqual(handler([], None, self.service), [])
+
+    def test_unknown_field(self):
+        event = {"info": {"fieldName": "bogus", "parentTypeName": "Query"}}
+
+        with self.assertRaises(Exception) as ctx:
+            handler(event, None, self.service)
+
+        self.assertEqual(ctx.exception.args[0], "no handler for field bogus")
@@ -1,18 +1,29 @@
+from decimal import Decimal
+from json import loads
 from uuid import uuid4
 
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
+from botocore.exceptions import ClientError
+
+from pointing_poker.aws.controllers import sessions as controllers
+from pointing_poker.aws.repositories.retries import RetryingExecutor
+from pointing_poker.repositories.memory import InMemorySessionsRepo
+from pointing_poker.services.sessions import SessionService
 from pointing_poker.aws.controllers.sessions import (
     create_session,
     close_session,
     join_session,
+    join_session_delta,
     leave_session,
     participant,
+    participant_current_session,
     session,
     session_state_changed,
     set_reviewing_issue,
     set_vote,
+    set_vote_delta,
     start_voting,
     stop_voting,
 )
@@ -56,6 +67,27 @@ class SessionsControllersTestCase(TestCase):
 
         self.service.session.assert_called_with(session_id)
 
+    def test_session_with_selection(self):
+        session_id = str(uuid4())
+
+        event = {
+            "sessionID": session_id,
+            "info": {
+                "selectionSetList": ["id", "participants", "participants/id"],
+                "selectionSetGraphQL": "{\n  id\n  participants(after: $after, first: 10) {\n    id\n    currentSession {\n      participants(first: 1) {\n        id\n      }\n    }\n  }\n}",
+                "variables": {"after": "abc"},
+            },
+        }
+
+        session(event, None, self.service)
+
+        self.service.session.assert_called_with(
+            session_id,
+            fields=["id", "participants", "participants/id"],
+            after="abc",
+            first=10,
+        )
+
     def test_session_stage_changed(self):
         session_id = str(uuid4())
 
@@ -80,6 +112,36 @@ class SessionsControllersTestCase(TestCase):
 
         self.service.join_session.assert_called_with(session_id, event["participant"])
 
+    def test_join_session_delta(self):
+        session_id = str(uuid4())
+
+        event = {
+            "participant": {"id": str(uuid4()), "name": "test"},
+            "sessionID": session_id,
+        }
+
+        join_session_delta(event, None, self.service)
+
+        self.service.join_session_delta.assert_called_with(
+            session_id, event["participant"]
+        )
+
+    def test_set_vote_delta(self):
+        session_id = str(uuid4())
+        participant_id = str(uuid4())
+
+        event = {
+            "sessionID": session_id,
+            "participantID": participant_id,
+            "vote": {"points": 1, "abstained": False},
+        }
+
+        set_vote_delta(event, None, self.service)
+
+        self.service.set_vote_delta.assert_called_with(
+            session_id, participant_id, event["vote"]
+        )
+
     def test_close_session(self):
         session_id = str(uuid4())
 
@@ -138,6 +200,26 @@ class SessionsControllersTestCase(TestCase):
 
         self.service.stop_voting.assert_called_with(session_id)
 
+    def test_timed_voting(self):
+        session_id = str(uuid4())
+
+        start_voting(
+            {"sessionID": session_id, "durationInSecs": 60}, None, self.service
+        )
+        stop_voting({"sessionID": session_id, "votingRound": 2}, None, self.service)
+
+        self.service.start_voting.assert_called_with(session_id, duration=60)
+        self.service.stop_voting.assert_called_with(session_id, voting_round=2)
+
+    def test_if_version(self):
+        session_id = str(uuid4())
+
+        stop_voting({"sessionID": session_id, "ifVersion": 4}, None, self.service)
+        close_session({"sessionID": session_id, "ifVersion": None}, None, self.service)
+
+        self.service.stop_voting.assert_called_with(session_id, if_version=4)
+        self.service.close_session.assert_called_with(session_id)
+
     def test_reviewing_issue(self):
         session_id = str(uuid4())
         issue = {"title": "test"}
@@ -156,3 +238,292 @@ class SessionsControllersTestCase(TestCase):
         participant(event, None, self.service)
 
         self.service.participant.assert_called_with(participant_id)
+
+    def test_participant_current_session(self):
+        first = {"id": "first"}
+        second = {"id": "second"}
+
+        self.service.sessions.return_value = {"first": first, "second": second}
+        self.service.participant_sessions.return_value = {"p3": "first"}
+        self.service.participant.return_value = {"id": "p4", "sessionID": "second"}
+
+        events = [
+            {"source": {"id": "p1", "sessionID": "first"}},
+            {"source": {"id": "p2", "sessionID": "second"}},
+            {"source": {"id": "p3"}},
+            {"source": {"id": "p4"}},
+        ]
+
+        response = participant_current_session(events, None, self.service)
+
+        self.assertEqual(response, [first, second, first, second])
+
+        self.service.participant_sessions.assert_called_once_with(["p3", "p4"])
+        self.service.participant.assert_called_once_with("p4")
+        self.service.sessions.assert_called_once_with(
+            ["first", "second", "first", "second"]
+        )
+
+    def test_participant_current_session_missing(self):
+        self.service.participant_sessions.return_value = {}
+        self.service.participant.side_effect = Exception("not found")
+        self.service.sessions.return_value = {}
+
+        response = participant_current_session(
+            [{"source": {"id": "p1"}}], None, self.service
+        )
+
+        self.assertEqual(response, [None])
+
+
+class AsyncControllersTestCase(TestCase):
+    def setUp(self) -> None:
+        patcher = patch.dict(controllers.environ, {"ASYNC_SERVICE": "true"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(controllers.set_service, None)
+
+        self.service = SessionService(InMemorySessionsRepo())
+
+        self.session = self.service.create_session(
+            {"name": "test", "pointingMin": 1, "pointingMax": 13},
+            {"id": str(uuid4()), "name": "moderator"},
+        )
+
+    def test_set_vote(self):
+        moderator = self.session["participants"][0]
+        vote = {"points": 3, "abstained": False}
+
+        self.service.start_voting(self.session["id"])
+
+        with patch.object(controllers, "run") as run:
+            session = set_vote(
+                {
+                    "sessionID": self.session["id"],
+                    "participantID": moderator["id"],
+                    "vote": vote,
+                },
+                None,
+                self.service,
+            )
+
+        run.assert_not_called()
+        self.assertEqual(session["participants"][0]["vote"], vote)
+
+    def test_legacy_set_vote(self):
+        moderator = self.session["participants"][0]
+        vote = {"points": 3, "abstained": False}
+
+        self.service.legacy_set_vote = True
+        self.service.start_voting(self.session["id"])
+
+        session = set_vote(
+            {
+                "sessionID": self.session["id"],
+                "participantID": moderator["id"],
+                "vote": vote,
+            },
+            None,
+            self.service,
+        )
+
+        self.assertEqual(session["participants"][0]["vote"], vote)
+
+    def test_participant_current_session(self):
+        moderator = self.session["participants"][0]
+
+        response = participant_current_session(
+            [{"source": {"id": moderator["id"]}}, {"source": {"id": "bogus"}}],
+            None,
+            self.service,
+        )
+
+        self.assertEqual(response[0]["id"], self.session["id"])
+        self.assertIsNone(response[1])
+
+    def test_shared_pool(self):
+        async_service = controllers._default_async_service(self.service)
+
+        self.assertIs(async_service.repo.executor, controllers._shared_pool())
+
+
+class SchemaResponsesTestCase(TestCase):
+    def setUp(self) -> None:
+        patcher = patch.dict(controllers.environ, {"SCHEMA_RESPONSES": "true"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.service = Mock()
+
+    def test_session(self):
+        self.service.session.return_value = {
+            "id": "id",
+            "sessionID": "id",
+            "type": "session",
+            "ttl": Decimal("100"),
+            "pointingMax": Decimal("13"),
+            "reviewing_issue_title": "IS-1",
+            "reviewingIssue": {"title": "IS-1"},
+            "participants": [
+                {
+                    "id": "p",
+                    "sessionID": "id",
+                    "name": "test",
+                    "isModerator": False,
+                    "vote": {"points": Decimal("3"), "abstained": False},
+                }
+            ],
+        }
+
+        response = session({"sessionID": "id"}, None, self.service)
+
+        self.assertEqual(
+            response,
+            {
+                "id": "id",
+                "pointingMax": 13,
+                "reviewingIssue": {"title": "IS-1"},
+                "participants": [
+                    {
+                        "id": "p",
+                        "sessionID": "id",
+                        "name": "test",
+                        "isModerator": False,
+                        "vote": {"points": 3, "abstained": False},
+                    }
+                ],
+            },
+        )
+        self.assertIs(type(response["pointingMax"]), int)
+
+    def test_participant_current_session(self):
+        self.service.sessions.return_value = {
+            "first": {"id": "first", "ttl": Decimal("100")}
+        }
+
+        response = participant_current_session(
+            [{"source": {"id": "p1", "sessionID": "first"}}], None, self.service
+        )
+
+        self.assertEqual(response, [{"id": "first"}])
+
+
+class SessionServiceRegistryTestCase(TestCase):
+    def setUp(self) -> None:
+        controllers.set_service(None)
+
+        patcher = patch.object(controllers.session_repo, "SessionsDynamoDBRepo")
+        self.repo_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(controllers.set_service, None)
+
+    def test_service_is_reused_across_invocations(self):
+        event = {"sessionID": str(uuid4())}
+
+        session(event, None)
+        session(event, None)
+
+        self.repo_class.assert_called_once_with()
+
+    def test_retry_budget_follows_the_invocation(self):
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 3000
+
+        session({"sessionID": str(uuid4())}, context)
+
+        self.repo_class.return_value.executor.set_budget.assert_called_once_with(2.5)
+
+    def test_client_repo(self):
+        with patch.object(
+            controllers.client_repo, "SessionsDynamoDBClientRepo"
+        ) as client_repo_class, patch.dict(
+            controllers.environ, {"DYNAMODB_CLIENT": "true"}
+        ):
+            service = controllers._default_service(None)
+
+        self.assertIs(service.repo, client_repo_class.return_value)
+        self.repo_class.assert_not_called()
+
+    def test_cached_repo(self):
+        with patch.dict(controllers.environ, {"SESSIONS_CACHE_TTL": "0.5"}):
+            service = controllers._default_service(None)
+
+        self.assertIsInstance(service.repo, controllers.CachingSessionsRepo)
+        self.assertEqual(service.repo.ttl, 0.5)
+        self.assertIs(service.repo.repo, self.repo_class.return_value)
+
+    def test_injected_service(self):
+        service = Mock()
+
+        controllers.set_service(service)
+
+        session({"sessionID": "id"}, None)
+
+        service.session.assert_called_with("id")
+        self.repo_class.assert_not_called()
+
+    def test_service_rebuilt_on_expired_credentials(self):
+        expired = ClientError(
+            {"Error": {"Code": "ExpiredTokenException", "Message": "expired"}}, "Query",
+        )
+
+        stale = Mock()
+        stale.session.side_effect = expired
+
+        controllers.set_service(stale)
+
+        session({"sessionID": "id"}, None)
+
+        self.repo_class.assert_called_once_with()
+        self.assertIsNot(controllers._default_service(None), stale)
+
+    def test_writes_are_not_replayed_on_expired_credentials(self):
+        expired = ClientError(
+            {"Error": {"Code": "ExpiredTokenException", "Message": "expired"}},
+            "TransactWriteItems",
+        )
+        update_item = Mock(__name__="update_item")
+
+        def write_then_expire(*args, **kwargs):
+            controllers._executor.call(update_item)
+
+            raise expired
+
+        stale = Mock()
+        stale.close_session.side_effect = write_then_expire
+
+        controllers.set_service(stale)
+        controllers._executor = RetryingExecutor()
+
+        self.assertRaises(ClientError, lambda: close_session({"sessionID": "id"}, None))
+
+        self.assertEqual(stale.close_session.call_count, 1)
+        self.repo_class.assert_not_called()
+
+    def test_other_errors_are_not_retried(self):
+        service = Mock()
+        service.session.side_effect = Exception("session with id id not found")
+
+        controllers.set_service(service)
+
+        self.assertRaises(Exception, lambda: session({"sessionID": "id"}, None))
+
+        self.assertEqual(service.session.call_count, 1)
+        self.repo_class.assert_not_called()
+
+    def test_repo_metrics(self):
+        with patch.dict(controllers.environ, {"REPO_METRICS": "true"}):
+            service = controllers._default_service(None)
+
+        self.assertIsInstance(service.repo, controllers.InstrumentedSessionsRepo)
+        self.assertIs(service.repo.repo, self.repo_class.return_value)
+
+        lines = []
+        controllers._metrics.write = lines.append
+
+        session({"sessionID": "id"}, None)
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(loads(lines[0])["Handler"], "session")
+        self.assertEqual(loads(lines[0])["Method"], "get")
+        self.assertIsNone(controllers._metrics.handler)
@@ -0,0 +1,488 @@
+from functools import lru_cache
+from itertools import islice
+from time import time
+
+from boto3 import client
+from botocore.exceptions import ClientError
+
+from pointing_poker.aws.repositories.marshalling import (
+    deserialize_item,
+    serialize,
+    serialize_item,
+)
+from pointing_poker.aws.repositories.sessions import (
+    CLIENT_CONFIG,
+    MAX_BATCH_KEYS,
+    SessionsDynamoDBRepo,
+    _cancellation_codes,
+    _chunks,
+    _deadline_condition,
+    _previous_vote_condition,
+    _projection,
+    _round_condition,
+    _session_update,
+    _tally_update,
+    _version_condition,
+)
+from pointing_poker.repositories.errors import ConflictError
+from pointing_poker.repositories.items import (
+    DIRECTORY_PREFIX,
+    directory_key,
+    item_to_participant,
+    new_tally,
+)
+
+_TRUE = {"BOOL": True}
+
+_FALSE = {"BOOL": False}
+
+_ONE = {"N": "1"}
+
+_PARTITION = "sessionID = :session"
+
+_PARTICIPANTS_FILTER = "#type = :participant"
+
+_PARTICIPANT_TYPE = {"S": "participant"}
+
+_VOTE_UPDATE = "SET points = :points, abstained = :abstained, votedRound = :round"
+
+_VOTE_REMOVAL = "REMOVE points, abstained, votedRound"
+
+_DIRECTORY_PROJECTION = {
+    "ProjectionExpression": "currentSession, #id",
+    "ExpressionAttributeNames": {"#id": "id"},
+}
+
+
+def _key(session_id, item_id):
+    return {"sessionID": {"S": session_id}, "id": {"S": item_id}}
+
+
+def _number(value):
+    return {"N": str(value)}
+
+
+def _version_kind(version):
+    """Returns the version standing for version in templates.
+
+    Expressions only differ between no version, version 0 and any other.
+    """
+    return version if version is None or version == 0 else 1
+
+
+def _version_values(version):
+    if version is None:
+        return {":one": _ONE}
+
+    return {":version": _number(version), ":next": _number(version + 1)}
+
+
+@lru_cache(maxsize=128)
+def _cached_projection(fields):
+    return _projection(fields)
+
+
+@lru_cache(maxsize=256)
+def _cast_vote_template(version_kind, voting_round, with_points, tally_shape):
+    """Returns the condition, update and names of the session update of a vote.
+
+    Built by _session_update once per combination of arguments: voting_round
+    only tells round 0 from the others and tally_shape is the tally delta
+    with 1 for its counts.
+    """
+    condition = (
+        "closed = :false AND votingStarted = :true"
+        f" AND {_round_condition(voting_round)} AND {_deadline_condition()[0]}"
+    )
+
+    if with_points:
+        condition += " AND :points BETWEEN pointingMin AND pointingMax"
+
+    tally = None
+
+    if tally_shape is not None:
+        counters, histogram = tally_shape
+        tally = {**dict(counters), "histogram": dict(histogram)}
+
+    action = _session_update("", "", version_kind, tally, condition)["Update"]
+
+    return (
+        action["ConditionExpression"],
+        action["UpdateExpression"],
+        action.get("ExpressionAttributeNames"),
+    )
+
+
+def _tally_shape(tally):
+    if tally is None:
+        return None
+
+    return (
+        tuple(
+            (key, 1 if count else 0)
+            for key, count in tally.items()
+            if key != "histogram"
+        ),
+        tuple((points, 1) for points in sorted(tally["histogram"])),
+    )
+
+
+@lru_cache(maxsize=64)
+def _reviewing_issue_template(keys, version_kind):
+    """Returns the update and condition setting the reviewing issue attributes in keys."""
+    assignments = [f"reviewing_issue_{key} = :{key}" for key in keys]
+
+    if version_kind is None:
+        return f"SET {', '.join(assignments)} ADD version :one", "attribute_exists(id)"
+
+    condition, _ = _version_condition(version_kind)
+
+    return (
+        f"SET {', '.join([*assignments, 'version = :next'])}",
+        f"attribute_exists(id) AND {condition}",
+    )
+
+
+def _marshalled(action):
+    """Returns a transaction action of SessionsDynamoDBRepo in wire format."""
+    ((kind, body),) = action.items()
+
+    body = dict(body)
+
+    for name in ("Key", "Item", "ExpressionAttributeValues"):
+        if name in body:
+            body[name] = serialize_item(body[name])
+
+    return {kind: body}
+
+
+class SessionsDynamoDBClientRepo(SessionsDynamoDBRepo):
+    """SessionsDynamoDBRepo on the low-level DynamoDB client.
+
+    Session reads, votes, reviewing issue updates and every transaction go
+    through the client with expressions prebuilt per request shape and
+    items marshalled by hand, skipping the resource layer's condition
+    builders and its type serialization of every request. Numbers are read
+    as int. The other writes, which run at most once per session or round,
+    use the resource like SessionsDynamoDBRepo does.
+    """
+
+    def __init__(self, executor=None):
+        super().__init__(executor)
+
+        self.client = client("dynamodb", config=CLIENT_CONFIG)
+        self.table_name = self.table.name
+
+    def create(self, session, record_expiration):
+        item = {
+            **session,
+            "sessionID": session["id"],
+            "ttl": record_expiration,
+            "type": "session",
+            "version": 0,
+            "tally": new_tally(),
+        }
+
+        self.executor.call(
+            self.client.put_item, TableName=self.table_name, Item=serialize_item(item)
+        )
+
+    def _client_query(self, **kwargs):
+        """Yields every item matched by a query, following pagination."""
+        while True:
+            records = self.executor.call(
+                self.client.query, TableName=self.table_name, **kwargs
+            )
+
+            for item in records["Items"]:
+                yield deserialize_item(item)
+
+            if "LastEvaluatedKey" not in records:
+                return
+
+            kwargs["ExclusiveStartKey"] = records["LastEvaluatedKey"]
+
+    def _participant_items(self, session_id, projection, after, first):
+        kwargs = {
+            **projection,
+            "KeyConditionExpression": _PARTITION,
+            "FilterExpression": _PARTICIPANTS_FILTER,
+            "ExpressionAttributeNames": {
+                **projection.get("ExpressionAttributeNames", {}),
+                "#type": "type",
+            },
+            "ExpressionAttributeValues": {
+                ":session": {"S": session_id},
+                ":participant": _PARTICIPANT_TYPE,
+            },
+        }
+
+        if after is not None:
+            kwargs["ExclusiveStartKey"] = _key(session_id, after)
+
+        if first is None:
+            return list(self._client_query(**kwargs))
+
+        # The session item shares the partition, so leave room for it.
+        kwargs["Limit"] = first + 1
+
+        return list(islice(self._client_query(**kwargs), first))
+
+    def _session_items(self, session_id, fields=None, after=None, first=None):
+        projection = {} if fields is None else _cached_projection(tuple(fields))
+
+        with_participants = fields is None or "participants" in fields
+
+        if with_participants and after is None and first is None:
+            items = list(
+                self._client_query(
+                    KeyConditionExpression=_PARTITION,
+                    ExpressionAttributeValues={":session": {"S": session_id}},
+                    **projection,
+                )
+            )
+
+            session_item = next(
+                (item for item in items if item.get("type", "") == "session"), None
+            )
+
+            participant_items = [
+                item for item in items if item.get("type", "") == "participant"
+            ]
+        else:
+            session_item = self._get_item(_key(session_id, session_id), **projection)
+
+            participant_items = (
+                self._participant_items(session_id, projection, after, first)
+                if with_participants and session_item is not None
+                else []
+            )
+
+        return session_item, participant_items
+
+    def _get_item(self, key, **kwargs):
+        item = self.executor.call(
+            self.client.get_item, TableName=self.table_name, Key=key, **kwargs
+        ).get("Item")
+
+        return None if item is None else deserialize_item(item)
+
+    def _batch_get(self, keys, **kwargs):
+        responses = self.executor.batch_get(
+            self.client, {self.table_name: {"Keys": keys, **kwargs}}
+        )
+
+        return [deserialize_item(item) for item in responses.get(self.table_name, [])]
+
+    def get_participant_in_session(self, session_id, participant_id):
+        items = {
+            item["id"]: item
+            for item in self._batch_get(
+                [_key(session_id, participant_id), _key(session_id, session_id)],
+                ConsistentRead=True,
+            )
+        }
+
+        if participant_id not in items or session_id not in items:
+            return None
+
+        return item_to_participant(
+            items[participant_id], items[session_id].get("votingRound", 0)
+        )
+
+    def get_participant(self, user_id):
+        pointer = self._get_item(
+            serialize_item(directory_key(user_id)), ConsistentRead=True
+        )
+
+        if pointer is None:
+            return self._indexed_participant(user_id)
+
+        session_id = pointer["currentSession"]
+        participant = self.get_participant_in_session(session_id, user_id)
+
+        if participant is None:
+            return None
+
+        return {**participant, "sessionID": session_id}
+
+    def get_participant_sessions(self, participant_ids):
+        sessions = {}
+
+        for chunk in _chunks(list(dict.fromkeys(participant_ids)), MAX_BATCH_KEYS):
+            items = self._batch_get(
+                [serialize_item(directory_key(pid)) for pid in chunk],
+                ConsistentRead=True,
+                **_DIRECTORY_PROJECTION,
+            )
+
+            for item in items:
+                sessions[item["id"][len(DIRECTORY_PREFIX) :]] = item["currentSession"]
+
+        return sessions
+
+    def get_version(self, session_id, consistent=False):
+        item = self._get_item(
+            _key(session_id, session_id),
+            ProjectionExpression="version",
+            ConsistentRead=consistent,
+        )
+
+        return None if item is None else item.get("version", 0)
+
+    def set_reviewing_issue(self, session_id, issue, version=None):
+        if not issue:
+            return
+
+        update, condition = _reviewing_issue_template(
+            tuple(issue), _version_kind(version)
+        )
+
+        values = {f":{key}": serialize(value) for key, value in issue.items()}
+        values.update(_version_values(version))
+
+        try:
+            item = self.executor.call(
+                self.client.update_item,
+                TableName=self.table_name,
+                Key=_key(session_id, session_id),
+                UpdateExpression=update,
+                ConditionExpression=condition,
+                ExpressionAttributeValues=values,
+                ReturnValues="UPDATED_NEW",
+            )["Attributes"]
+        except ClientError as err:
+            if err.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise Exception("failed to update item")
+            elif version is None:
+                raise Exception(f"session with id {session_id} not found")
+            else:
+                raise ConflictError(
+                    f"session with id {session_id} changed concurrently"
+                )
+
+        return int(item["version"]["N"])
+
+    def _transact(self, actions, required):
+        while actions:
+            try:
+                self.executor.call(
+                    self.client.transact_write_items,
+                    TransactItems=[_marshalled(action) for action in actions],
+                )
+
+                return None
+            except ClientError as err:
+                if err.response["Error"]["Code"] != "TransactionCanceledException":
+                    raise Exception("failed to update item")
+
+                codes = _cancellation_codes(err, len(actions))
+
+                if "ConditionalCheckFailed" in codes[:required]:
+                    return codes[:required]
+
+                if "ConditionalCheckFailed" not in codes[required:]:
+                    raise Exception("failed to update item")
+
+                actions = [
+                    action
+                    for idx, (action, code) in enumerate(zip(actions, codes))
+                    if idx < required or code != "ConditionalCheckFailed"
+                ]
+
+        return None
+
+    def _vote_action(
+        self, session_id, participant_id, vote, voting_round, tally=None, previous=None
+    ):
+        update = {
+            "TableName": self.table_name,
+            "Key": _key(session_id, participant_id),
+            "ConditionExpression": "attribute_exists(id)",
+        }
+
+        values = {}
+
+        if tally is not None:
+            condition, previous_values = _previous_vote_condition(
+                previous, voting_round
+            )
+
+            update["ConditionExpression"] += f" AND {condition}"
+            values.update(serialize_item(previous_values))
+
+        if vote is None:
+            update["UpdateExpression"] = _VOTE_REMOVAL
+        else:
+            update["UpdateExpression"] = _VOTE_UPDATE
+            values.update(
+                {
+                    ":points": serialize(vote["points"]),
+                    ":abstained": {"BOOL": vote["abstained"]},
+                    ":round": _number(voting_round),
+                }
+            )
+
+        if values:
+            update["ExpressionAttributeValues"] = values
+
+        return {"Update": update}
+
+    def cast_vote(
+        self,
+        session_id,
+        participant_id,
+        vote,
+        voting_round=0,
+        version=None,
+        tally=None,
+        previous=None,
+    ):
+        with_points = vote is not None and vote["points"] is not None
+
+        condition, update, names = _cast_vote_template(
+            _version_kind(version),
+            min(voting_round, 1),
+            with_points,
+            _tally_shape(tally),
+        )
+
+        values = {
+            ":false": _FALSE,
+            ":true": _TRUE,
+            ":now": _number(int(time())),
+            **_version_values(version),
+            **serialize_item(_tally_update(tally)[1]),
+        }
+
+        if voting_round != 0:
+            values[":round"] = _number(voting_round)
+
+        if with_points:
+            values[":points"] = _number(vote["points"])
+
+        session_update = {
+            "TableName": self.table_name,
+            "Key": _key(session_id, session_id),
+            "ConditionExpression": condition,
+            "UpdateExpression": update,
+            "ExpressionAttributeValues": values,
+        }
+
+        if names:
+            session_update["ExpressionAttributeNames"] = names
+
+        try:
+            self.executor.call(
+                self.client.transact_write_items,
+                TransactItems=[
+                    {"Update": session_update},
+                    self._vote_action(
+                        session_id, participant_id, vote, voting_round, tally, previous
+                    ),
+                ],
+            )
+        except ClientError as err:
+            raise self._vote_rejected(err, session_id, participant_id, version, tally)
+
+        return None if version is None else version + 1
@@ -0,0 +1,97 @@
+OPERATIONS = (
+    "GetItem",
+    "PutItem",
+    "UpdateItem",
+    "DeleteItem",
+    "Query",
+    "Scan",
+    "BatchGetItem",
+    "BatchWriteItem",
+    "TransactGetItems",
+    "TransactWriteItems",
+)
+
+
+def _return_consumed_capacity(params, context, model, **_):
+    params.setdefault("ReturnConsumedCapacity", "TOTAL")
+    context["deletes"] = delete_count(model.name, params)
+
+
+def delete_count(operation, params):
+    """Returns the number of items a request asks to delete."""
+    if operation == "DeleteItem":
+        return 1
+
+    if operation == "BatchWriteItem":
+        return sum(
+            "DeleteRequest" in request
+            for requests in params["RequestItems"].values()
+            for request in requests
+        )
+
+    if operation == "TransactWriteItems":
+        return sum("Delete" in action for action in params["TransactItems"])
+
+    return 0
+
+
+def consumed_capacity(parsed):
+    consumed = parsed.get("ConsumedCapacity", [])
+
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+
+    return float(sum(entry.get("CapacityUnits", 0) for entry in consumed))
+
+
+def item_count(parsed):
+    if "Count" in parsed:
+        return parsed["Count"]
+
+    if "Responses" in parsed:
+        responses = parsed["Responses"]
+
+        if isinstance(responses, dict):
+            return sum(len(items) for items in responses.values())
+
+        return sum(1 for response in responses if response.get("Item"))
+
+    return int("Item" in parsed or "Attributes" in parsed)
+
+
+def items_deleted(parsed, requested):
+    """Returns how many of the requested deletes a response reports as done."""
+    if "Error" in parsed:
+        return 0
+
+    unprocessed = parsed.get("UnprocessedItems", {})
+
+    return requested - sum(
+        "DeleteRequest" in request
+        for requests in unprocessed.values()
+        for request in requests
+    )
+
+
+def instrument_client(client, metrics):
+    """Reports every DynamoDB request made by client to metrics.
+
+    Requests ask for their consumed capacity, which is recorded together
+    with the number of items returned and deleted against the repository
+    method in flight.
+    """
+
+    def record(parsed, context, **_):
+        metrics.record_request(
+            consumed_capacity(parsed),
+            item_count(parsed),
+            items_deleted(parsed, context.get("deletes", 0)),
+        )
+
+    for operation in OPERATIONS:
+        client.meta.events.register(
+            f"provide-client-params.dynamodb.{operation}", _return_consumed_capacity
+        )
+        client.meta.events.register(f"after-call.dynamodb.{operation}", record)
+
+    return client
@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+
+def _number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return Decimal(text)
+
+
+def _identity(value):
+    return value
+
+
+def _map(value):
+    return {key: deserialize(attribute) for key, attribute in value.items()}
+
+
+def _list(value):
+    return [deserialize(attribute) for attribute in value]
+
+
+# DynamoDB attribute types and how their values are read; boto3's
+# TypeDeserializer resolves these by name on every value.
+_DESERIALIZERS = {
+    "S": _identity,
+    "N": _number,
+    "BOOL": _identity,
+    "NULL": lambda _: None,
+    "B": _identity,
+    "M": _map,
+    "L": _list,
+    "SS": set,
+    "NS": lambda value: {_number(text) for text in value},
+    "BS": set,
+}
+
+
+def deserialize(attribute):
+    """Reads a value in DynamoDB's wire format.
+
+    Unlike boto3's TypeDeserializer, whole numbers are read as int rather
+    than Decimal; only fractional numbers stay Decimal.
+    """
+    ((type_name, value),) = attribute.items()
+
+    return _DESERIALIZERS[type_name](value)
+
+
+def deserialize_item(item):
+    """Reads an item returned by the low-level client."""
+    return {key: deserialize(attribute) for key, attribute in item.items()}
+
+
+def _number_attribute(value):
+    return {"N": str(value)}
+
+
+def _serialize_map(value):
+    return {"M": serialize_item(value)}
+
+
+def _serialize_list(value):
+    return {"L": [serialize(item) for item in value]}
+
+
+# Python types the items of the sessions table are made of. Floats are left
+# out like boto3's TypeSerializer does, as they are not exact.
+_SERIALIZERS = {
+    str: lambda value: {"S": value},
+    bool: lambda value: {"BOOL": value},
+    int: _number_attribute,
+    Decimal: _number_attribute,
+    type(None): lambda _: {"NULL": True},
+    dict: _serialize_map,
+    list: _serialize_list,
+}
+
+
+def serialize(value):
+    """Writes a value in DynamoDB's wire format."""
+    try:
+        serializer = _SERIALIZERS[type(value)]
+    except KeyError:
+        raise TypeError(f"unsupported type {type(value).__name__} for {value!r}")
+
+    return serializer(value)
+
+
+def serialize_item(item):
+    """Writes an item, key or expression values for the low-level client."""
+    return {key: serialize(value) for key, value in item.items()}
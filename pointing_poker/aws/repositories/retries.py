@@ -0,0 +1,209 @@
+from collections import Counter
+from random import random
+from threading import Lock
+from time import monotonic, sleep
+
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+RETRYABLE_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+    "InternalServerError",
+    "ServiceUnavailable",
+}
+
+# Cancellation reasons of a transaction that may go through when sent again.
+TRANSIENT_CANCELLATIONS = {
+    "ThrottlingError",
+    "ProvisionedThroughputExceeded",
+    "TransactionConflict",
+}
+
+CONNECTION_ERRORS = (ConnectionClosedError, EndpointConnectionError, ReadTimeoutError)
+
+# Requests that change the table, by client and resource method name.
+WRITE_REQUESTS = {
+    "put_item",
+    "update_item",
+    "delete_item",
+    "batch_write_item",
+    "transact_write_items",
+}
+
+# Seconds of a Lambda invocation left unused by retries, so that the last
+# error still reaches the caller before the invocation times out.
+BUDGET_RESERVE = 0.5
+
+
+def cancellation_codes(err):
+    """Returns the per-item cancellation codes of a cancelled transaction."""
+    reasons = err.response.get("CancellationReasons")
+
+    if reasons is not None:
+        return [reason.get("Code") for reason in reasons]
+
+    message = err.response["Error"].get("Message", "")
+
+    return [code.strip() for code in message[message.rfind("[") + 1 : -1].split(",")]
+
+
+def retry_reason(err):
+    """Returns why err is worth retrying, or None if it is not."""
+    if isinstance(err, CONNECTION_ERRORS):
+        return type(err).__name__
+
+    if not isinstance(err, ClientError):
+        return None
+
+    code = err.response.get("Error", {}).get("Code")
+
+    if code in RETRYABLE_CODES:
+        return code
+
+    if code == "TransactionCanceledException":
+        codes = [code for code in cancellation_codes(err) if code not in (None, "None")]
+
+        if codes and all(code in TRANSIENT_CANCELLATIONS for code in codes):
+            return codes[0]
+
+    return None
+
+
+def remaining_seconds(context):
+    """Returns the time a Lambda invocation can spend retrying, or None without one."""
+    remaining = getattr(context, "get_remaining_time_in_millis", None)
+
+    if remaining is None:
+        return None
+
+    return max(0.0, remaining() / 1000 - BUDGET_RESERVE)
+
+
+class RetryingExecutor:
+    """Sends DynamoDB requests, retrying the ones that failed transiently.
+
+    Throttled requests, server and connection errors and transactions
+    cancelled only by throttling or conflicts are sent again after a
+    jittered exponential backoff, up to max_attempts times in all and as long
+    as the time budget allows. Unprocessed items of batch requests are sent
+    again the same way. retries counts the retries by reason, and on_retry,
+    when set, is called with the reason of every retry. writes counts the
+    write requests that went through.
+    """
+
+    def __init__(
+        self,
+        max_attempts=8,
+        base_delay=0.025,
+        max_delay=1.0,
+        clock=monotonic,
+        sleep=sleep,
+        random=random,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.sleep = sleep
+        self.random = random
+
+        self.deadline = None
+        self.on_retry = None
+        self.retries = Counter()
+        self.writes = 0
+
+        self._lock = Lock()
+
+    def set_budget(self, seconds):
+        """Stops retrying seconds from now; None retries without a time limit."""
+        self.deadline = None if seconds is None else self.clock() + seconds
+
+    def _backoff(self, attempt, reason):
+        """Waits before sending a request again after attempt tries.
+
+        Returns False instead when out of attempts or out of time.
+        """
+        if attempt >= self.max_attempts:
+            return False
+
+        delay = self.random() * min(
+            self.max_delay, self.base_delay * 2 ** (attempt - 1)
+        )
+
+        if self.deadline is not None and self.clock() + delay > self.deadline:
+            return False
+
+        with self._lock:
+            self.retries[reason] += 1
+
+        if self.on_retry is not None:
+            self.on_retry(reason)
+
+        self.sleep(delay)
+
+        return True
+
+    def call(self, request, **kwargs):
+        """Returns request(**kwargs), retried while it fails transiently."""
+        attempt = 1
+
+        while True:
+            try:
+                response = request(**kwargs)
+            except (ClientError, *CONNECTION_ERRORS) as err:
+                reason = retry_reason(err)
+
+                if reason is None or not self._backoff(attempt, reason):
+                    raise
+            else:
+                if getattr(request, "__name__", None) in WRITE_REQUESTS:
+                    with self._lock:
+                        self.writes += 1
+
+                return response
+
+            attempt += 1
+
+    def batch_write(self, client, request_items):
+        """Sends a BatchWriteItem until every one of request_items is processed."""
+        attempt = 1
+
+        while True:
+            request_items = self.call(
+                client.batch_write_item, RequestItems=request_items
+            ).get("UnprocessedItems")
+
+            if not request_items:
+                return
+
+            if not self._backoff(attempt, "UnprocessedItems"):
+                raise Exception("failed to write items")
+
+            attempt += 1
+
+    def batch_get(self, client, request_items):
+        """Sends a BatchGetItem until every key is read; returns the items by table."""
+        responses = {}
+        attempt = 1
+
+        while True:
+            records = self.call(client.batch_get_item, RequestItems=request_items)
+
+            for table_name, items in records["Responses"].items():
+                responses.setdefault(table_name, []).extend(items)
+
+            request_items = records.get("UnprocessedKeys")
+
+            if not request_items:
+                return responses
+
+            if not self._backoff(attempt, "UnprocessedKeys"):
+                raise Exception("failed to read items")
+
+            attempt += 1
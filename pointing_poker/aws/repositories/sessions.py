@@ -1,28 +1,288 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from os import environ
+from time import time
 
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from boto3 import resource
 from boto3.dynamodb.conditions import Attr, Key
 
+from pointing_poker.aws.repositories.retries import (
+    RetryingExecutor,
+    cancellation_codes,
+)
+from pointing_poker.repositories.errors import ConflictError
+from pointing_poker.repositories.items import (
+    DIRECTORY_PREFIX,
+    REVIEWING_ISSUE_ATTRIBUTES,
+    TALLY_COUNTERS,
+    directory_key,
+    item_to_participant,
+    item_to_session,
+    new_tally,
+)
+from pointing_poker.repositories.models import Session
+
+# DynamoDB accepts up to 100 actions per transaction in current regions but
+# only 25 in older ones; stay with the lower bound unless told otherwise.
+MAX_TRANSACT_ITEMS = 25
+
+MAX_BATCH_KEYS = 100
+
+MAX_BATCH_WRITE_ITEMS = 25
+
+# Connections botocore keeps open to DynamoDB; more concurrent requests wait
+# for one to be free.
+MAX_POOL_CONNECTIONS = 10
+
+# Requests are retried by the executor, within the time budget of the
+# invocation, rather than by botocore.
+CLIENT_CONFIG = Config(
+    retries={"total_max_attempts": 1}, max_pool_connections=MAX_POOL_CONNECTIONS
+)
+
+
+def _chunks(values, size):
+    return [values[idx : idx + size] for idx in range(0, len(values), size)]
+
+
+def _batches(values, size):
+    """Yields lists of up to size values, consuming values lazily."""
+    values = iter(values)
+
+    while True:
+        batch = list(islice(values, size))
+
+        if not batch:
+            return
+
+        yield batch
+
+
+def _cancellation_codes(err, count):
+    """Returns the per-item cancellation codes of a cancelled transaction."""
+    return (cancellation_codes(err) + [None] * count)[:count]
+
+
+_ALWAYS_PROJECTED = (
+    "sessionID",
+    "id",
+    "type",
+    "version",
+    "votingRound",
+    "name",
+    "isModerator",
+)
+
+
+def _projection(fields):
+    """Builds the projection reading only the attributes behind fields."""
+    attributes = set(_ALWAYS_PROJECTED)
+
+    for field in fields:
+        path = field.split("/")
+
+        if path[0] == "reviewingIssue":
+            attributes.update(REVIEWING_ISSUE_ATTRIBUTES)
+        elif path[0] == "tally":
+            attributes.update(("tally", "pointingMin", "pointingMax"))
+        elif path[0] == "participants":
+            if path[1:2] == ["vote"]:
+                attributes.update(("points", "abstained", "votedRound"))
+        elif not path[0].startswith("__"):
+            attributes.add(path[0])
+
+    names = {f"#p{idx}": name for idx, name in enumerate(sorted(attributes))}
 
-def _item_to_participant(item):
     return {
-        "id": item["id"],
-        "name": item["name"],
-        "isModerator": item["isModerator"],
-        "vote": None
-        if "points" not in item or "abstained" not in item
-        else {"points": item["points"], "abstained": item["abstained"]},
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+
+
+def _round_condition(voting_round):
+    if voting_round == 0:
+        return "attribute_not_exists(votingRound)"
+
+    return "votingRound = :round"
+
+
+def _deadline_condition():
+    """Returns the condition and values accepting votes before a round's deadline."""
+    return (
+        "(attribute_not_exists(votingDeadline) OR votingDeadline > :now)",
+        {":now": int(time())},
+    )
+
+
+def _version_condition(version):
+    """Returns the condition and values of a write based on version.
+
+    Sessions written before versions existed are at version 0.
+    """
+    condition = "version = :version"
+
+    if version == 0:
+        condition = f"(attribute_not_exists(version) OR {condition})"
+
+    return condition, {":version": version, ":next": version + 1}
+
+
+def _version_update(version, assignments=()):
+    """Returns the update, condition and values moving a session to its next version.
+
+    Without a version the session moves on from whatever version it is at.
+    assignments are SET along with the version.
+    """
+    if version is None:
+        update = "ADD version :one"
+
+        if assignments:
+            update = f"SET {', '.join(assignments)} {update}"
+
+        return update, "attribute_exists(id)", {":one": 1}
+
+    condition, values = _version_condition(version)
+
+    return (
+        f"SET {', '.join([*assignments, 'version = :next'])}",
+        f"attribute_exists(id) AND {condition}",
+        values,
+    )
+
+
+def _tally_update(delta):
+    """Returns the assignments, values and names applying delta to a session tally."""
+    if delta is None:
+        return [], {}, {}
+
+    assignments = []
+    values = {}
+    names = {"#tally": "tally"}
+
+    for idx, key in enumerate(TALLY_COUNTERS):
+        if delta[key]:
+            assignments.append(f"#tally.#t{idx} = #tally.#t{idx} + :t{idx}")
+            values[f":t{idx}"] = delta[key]
+            names[f"#t{idx}"] = key
+
+    for idx, (points, count) in enumerate(sorted(delta["histogram"].items())):
+        assignments.append(
+            f"#tally.#histogram.#h{idx}"
+            f" = if_not_exists(#tally.#histogram.#h{idx}, :zero) + :h{idx}"
+        )
+        values.update({f":h{idx}": count, ":zero": 0})
+        names.update({"#histogram": "histogram", f"#h{idx}": points})
+
+    return assignments, values, names
+
+
+def _session_update(
+    session_id, table_name, version, tally, condition=None, values=None
+):
+    """Returns the transaction action moving a session to its next version.
+
+    The session tally moves by tally, if given, in the same write. condition
+    and values add to the version condition.
+    """
+    assignments, tally_values, names = _tally_update(tally)
+    update, version_condition, version_values = _version_update(version, assignments)
+
+    action = {
+        "TableName": table_name,
+        "Key": {"sessionID": session_id, "id": session_id},
+        "ConditionExpression": version_condition
+        + ("" if condition is None else f" AND {condition}"),
+        "UpdateExpression": update,
+        "ExpressionAttributeValues": {
+            **version_values,
+            **tally_values,
+            **({} if values is None else values),
+        },
+    }
+
+    if names:
+        action["ExpressionAttributeNames"] = names
+
+    return {"Update": action}
+
+
+def _voting_state_condition(expected, voting_round, version=None):
+    conditions = ["attribute_exists(id)"]
+    values = {}
+
+    if version is not None:
+        condition, values = _version_condition(version)
+        conditions.append(condition)
+
+    if expected is not None:
+        conditions.append("votingStarted = :expected")
+        values[":expected"] = expected
+
+    if voting_round is not None:
+        conditions.append(_round_condition(voting_round))
+
+        if voting_round != 0:
+            values[":round"] = voting_round
+
+    return " AND ".join(conditions), values
+
+
+def _voted_in_round(voting_round):
+    """Returns the condition on a participant item having voted in voting_round.
+
+    Items written before rounds existed voted in round 0.
+    """
+    if voting_round == 0:
+        return "(attribute_not_exists(votedRound) OR votedRound = :round)"
+
+    return "votedRound = :round"
+
+
+def _previous_vote_condition(previous, voting_round):
+    """Returns the condition and values of a participant item still holding previous.
+
+    previous is the vote counting in voting_round that a tally delta was
+    computed from, or None when none counted.
+    """
+    in_round = _voted_in_round(voting_round)
+
+    if previous is None:
+        return (
+            "(attribute_not_exists(points)"
+            f" OR (isModerator = :false AND NOT {in_round}))",
+            {":false": False, ":round": voting_round},
+        )
+
+    values = {
+        ":true": True,
+        ":round": voting_round,
+        ":previousAbstained": previous["abstained"],
     }
 
+    if previous["points"] is None:
+        points = "attribute_type(points, :null)"
+        values[":null"] = "NULL"
+    else:
+        points = "points = :previousPoints"
+        values[":previousPoints"] = previous["points"]
+
+    return (
+        f"abstained = :previousAbstained AND {points}"
+        f" AND (isModerator = :true OR {in_round})",
+        values,
+    )
+
 
 class SessionsDynamoDBRepo:
-    def __init__(self):
-        self.table = resource("dynamodb").Table(
+    def __init__(self, executor=None):
+        self.table = resource("dynamodb", config=CLIENT_CONFIG).Table(
             environ["SESSIONS_TABLE_NAME"]
             if "SESSIONS_TABLE_NAME" in environ
             else "sessions"
         )
+        self.executor = RetryingExecutor() if executor is None else executor
 
     def create(self, session, record_expiration):
         item = {
@@ -30,65 +290,159 @@ class SessionsDynamoDBRepo:
             "sessionID": session["id"],
             "ttl": record_expiration,
             "type": "session",
+            "version": 0,
+            "tally": new_tally(),
         }
 
-        self.table.put_item(Item=item)
+        self.executor.call(self.table.put_item, Item=item)
 
-    def get(self, session_id):
-        records = self.table.query(
-            KeyConditionExpression=Key("sessionID").eq(session_id)
-        )
+    def _query(self, **kwargs):
+        """Yields every item matched by a query, following pagination."""
+        while True:
+            records = self.executor.call(self.table.query, **kwargs)
 
-        items = records["Items"]
+            yield from records["Items"]
 
-        if not items:
+            if "LastEvaluatedKey" not in records:
+                return
+
+            kwargs["ExclusiveStartKey"] = records["LastEvaluatedKey"]
+
+    def _participant_items(self, session_id, projection, after, first):
+        kwargs = {
+            "KeyConditionExpression": Key("sessionID").eq(session_id),
+            "FilterExpression": Attr("type").eq("participant"),
+            **projection,
+        }
+
+        if after is not None:
+            kwargs["ExclusiveStartKey"] = {"sessionID": session_id, "id": after}
+
+        if first is None:
+            return list(self._query(**kwargs))
+
+        # The session item shares the partition, so leave room for it.
+        kwargs["Limit"] = first + 1
+
+        return list(islice(self._query(**kwargs), first))
+
+    def _session_items(self, session_id, fields=None, after=None, first=None):
+        """Returns the session item and participant items read by get."""
+        projection = {} if fields is None else _projection(fields)
+
+        with_participants = fields is None or "participants" in fields
+
+        if with_participants and after is None and first is None:
+            items = list(
+                self._query(
+                    KeyConditionExpression=Key("sessionID").eq(session_id),
+                    **projection,
+                )
+            )
+
+            session_item = next(
+                (item for item in items if item.get("type", "") == "session"), None
+            )
+
+            participant_items = [
+                item for item in items if item.get("type", "") == "participant"
+            ]
+        else:
+            session_item = self.executor.call(
+                self.table.get_item,
+                Key={"sessionID": session_id, "id": session_id},
+                **projection,
+            ).get("Item")
+
+            participant_items = (
+                self._participant_items(session_id, projection, after, first)
+                if with_participants and session_item is not None
+                else []
+            )
+
+        return session_item, participant_items
+
+    def get(self, session_id, fields=None, after=None, first=None):
+        """Reads a session and its participants.
+
+        fields is a GraphQL selection in AppSync selectionSetList form and
+        limits the attributes read to the ones backing it. after and first
+        page through participants like Session.participants(after, first).
+        """
+        session_item, participant_items = self._session_items(
+            session_id, fields, after, first
+        )
+
+        if session_item is None:
             return None
 
+        voting_round = session_item.get("votingRound", 0)
+
         participants = [
-            _item_to_participant(item)
-            for item in items
-            if item.get("type", "") == "participant"
+            item_to_participant(item, voting_round) for item in participant_items
         ]
 
-        session_item = [item for item in items if item.get("type", "") == "session"][0]
-
-        issue = {}
+        return {**item_to_session(session_item), "participants": participants}
 
-        if any(
-            key in session_item
-            for key in [
-                "reviewing_issue_title",
-                "reviewing_issue_description",
-                "reviewing_issue_url",
-            ]
-        ):
-            issue = {
-                "title": session_item.get("reviewing_issue_title"),
-                "description": session_item.get("reviewing_issue_description"),
-                "url": session_item.get("reviewing_issue_url"),
-            }
+    def get_session(self, session_id):
+        """Reads a session and its participants as a Session, or None if missing."""
+        session_item, participant_items = self._session_items(session_id)
 
-        session = {
-            **session_item,
-            "reviewingIssue": issue,
-            "participants": participants,
-        }
+        if session_item is None:
+            return None
 
-        return session
+        return Session.from_items(session_item, participant_items)
 
     def get_participant_in_session(self, session_id, participant_id):
-        record = self.table.get_item(
-            Key={"sessionID": session_id, "id": participant_id}
+        responses = self.executor.batch_get(
+            self.table.meta.client,
+            {
+                self.table.name: {
+                    "Keys": [
+                        {"sessionID": session_id, "id": participant_id},
+                        {"sessionID": session_id, "id": session_id},
+                    ],
+                    "ConsistentRead": True,
+                }
+            },
         )
 
-        if "Item" not in record:
+        items = {item["id"]: item for item in responses.get(self.table.name, [])}
+
+        if participant_id not in items or session_id not in items:
             return None
 
-        return _item_to_participant(record["Item"])
+        return item_to_participant(
+            items[participant_id], items[session_id].get("votingRound", 0)
+        )
 
     def get_participant(self, user_id):
-        records = self.table.query(
-            IndexName="id-index", KeyConditionExpression=Key("id").eq(user_id)
+        """Returns a participant of its current session, with its sessionID.
+
+        The session is read from the participant directory, then the
+        participant along with its session's round; participants that joined
+        before the directory existed are looked up on the id-index.
+        """
+        pointer = self.executor.call(
+            self.table.get_item, Key=directory_key(user_id), ConsistentRead=True
+        ).get("Item")
+
+        if pointer is None:
+            return self._indexed_participant(user_id)
+
+        session_id = pointer["currentSession"]
+        participant = self.get_participant_in_session(session_id, user_id)
+
+        if participant is None:
+            return None
+
+        return {**participant, "sessionID": session_id}
+
+    def _indexed_participant(self, user_id):
+        records = self.executor.call(
+            self.table.query,
+            IndexName="id-index",
+            KeyConditionExpression=Key("id").eq(user_id),
         )
 
         items = records["Items"]
@@ -96,80 +450,660 @@ class SessionsDynamoDBRepo:
         if not items:
             return None
 
-        return _item_to_participant(items[0])
+        item = items[0]
+
+        voting_round = 0
+
+        if "points" in item:
+            session_item = self.executor.call(
+                self.table.get_item,
+                Key={"sessionID": item["sessionID"], "id": item["sessionID"]},
+                ProjectionExpression="votingRound",
+            ).get("Item", {})
+
+            voting_round = session_item.get("votingRound", 0)
+
+        return {
+            **item_to_participant(item, voting_round),
+            "sessionID": item["sessionID"],
+        }
+
+    def get_participant_sessions(self, participant_ids):
+        """Returns the current session id of participants keyed by their id.
+
+        Participants missing from the directory are left out.
+        """
+        sessions = {}
+
+        for chunk in _chunks(list(dict.fromkeys(participant_ids)), MAX_BATCH_KEYS):
+            responses = self.executor.batch_get(
+                self.table.meta.client,
+                {
+                    self.table.name: {
+                        "Keys": [directory_key(pid) for pid in chunk],
+                        "ProjectionExpression": "currentSession, #id",
+                        "ExpressionAttributeNames": {"#id": "id"},
+                        "ConsistentRead": True,
+                    }
+                },
+            )
+
+            for item in responses.get(self.table.name, []):
+                participant_id = item["id"][len(DIRECTORY_PREFIX) :]
+                sessions[participant_id] = item["currentSession"]
+
+        return sessions
+
+    def get_version(self, session_id, consistent=False):
+        """Returns the version of a session, or None if it does not exist."""
+        item = self.executor.call(
+            self.table.get_item,
+            Key={"sessionID": session_id, "id": session_id},
+            ProjectionExpression="version",
+            ConsistentRead=consistent,
+        ).get("Item")
 
-    def set_reviewing_issue(self, session_id, issue):
+        return None if item is None else int(item.get("version", 0))
+
+    def set_reviewing_issue(self, session_id, issue, version=None):
+        """Sets the reviewing issue and returns the new session version.
+
+        The session must exist, and with version still be at that version.
+        """
         if not issue:
             return
 
-        self.table.update_item(
-            Key={"sessionID": session_id, "id": session_id},
-            UpdateExpression=f"SET {','.join(list(map(lambda key: 'reviewing_issue_'+key+' = :'+key, issue.keys())))}",
-            ExpressionAttributeValues={
-                f":{key}": value for (key, value) in issue.items()
-            },
-        )
+        assignments = [f"reviewing_issue_{key} = :{key}" for key in issue.keys()]
+        values = {f":{key}": value for (key, value) in issue.items()}
+        kwargs = {}
 
-    def set_voting_state(self, session_id, value):
-        self.table.update_item(
-            Key={"sessionID": session_id, "id": session_id},
-            UpdateExpression="SET votingStarted = :value",
+        if version is None:
+            update = f"SET {', '.join(assignments)} ADD version :one"
+            values[":one"] = 1
+            kwargs["ConditionExpression"] = "attribute_exists(id)"
+        else:
+            condition, version_values = _version_condition(version)
+
+            update = f"SET {', '.join([*assignments, 'version = :next'])}"
+            values.update(version_values)
+            kwargs["ConditionExpression"] = f"attribute_exists(id) AND {condition}"
+
+        try:
+            item = self.executor.call(
+                self.table.update_item,
+                Key={"sessionID": session_id, "id": session_id},
+                UpdateExpression=update,
+                ExpressionAttributeValues=values,
+                ReturnValues="UPDATED_NEW",
+                **kwargs,
+            )["Attributes"]
+        except ClientError as err:
+            if err.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise Exception("failed to update item")
+            elif version is None:
+                raise Exception(f"session with id {session_id} not found")
+            else:
+                raise ConflictError(
+                    f"session with id {session_id} changed concurrently"
+                )
+
+        return int(item["version"])
+
+    def _update_voting_state(
+        self,
+        session_id,
+        expected,
+        voting_round,
+        version,
+        assignments,
+        additions=None,
+        removals=(),
+        **kwargs,
+    ):
+        condition, values = _voting_state_condition(expected, voting_round, version)
+
+        additions = [] if additions is None else [additions]
+
+        if version is None:
+            additions.append("version :one")
+            values[":one"] = 1
+        else:
+            assignments = [*assignments, "version = :next"]
+
+        try:
+            return self.executor.call(
+                self.table.update_item,
+                Key={"sessionID": session_id, "id": session_id},
+                ConditionExpression=condition,
+                UpdateExpression=f"SET {', '.join(assignments)}"
+                + (f" REMOVE {', '.join(removals)}" if removals else "")
+                + (f" ADD {', '.join(additions)}" if additions else ""),
+                ExpressionAttributeValues={
+                    **kwargs.pop("ExpressionAttributeValues"),
+                    **values,
+                },
+                **kwargs,
+            )["Attributes"]
+        except ClientError as err:
+            if err.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                raise ConflictError(
+                    f"voting state of session with id {session_id} changed concurrently"
+                )
+            else:
+                raise Exception("failed to update item")
+
+    def set_voting_state(
+        self, session_id, value, expected=None, voting_round=None, version=None
+    ):
+        """Sets votingStarted and returns the updated session without participants.
+
+        With expected and voting_round the update only applies while the
+        session is still in the voting state the caller read, so concurrent
+        start/stop requests fail instead of overwriting each other. version
+        guards the update the same way and moves the session past it.
+        Stopping voting drops the deadline of the round.
+        """
+        item = self._update_voting_state(
+            session_id,
+            expected,
+            voting_round,
+            version,
+            ["votingStarted = :value"],
+            removals=() if value else ("votingDeadline",),
             ExpressionAttributeValues={":value": value},
+            ReturnValues="ALL_NEW",
+        )
+
+        return item_to_session(item)
+
+    def start_round(
+        self,
+        session_id,
+        expected=None,
+        voting_round=None,
+        version=None,
+        tally=None,
+        deadline=None,
+    ):
+        """Starts a new voting round and returns its number.
+
+        Votes cast in earlier rounds stop counting without touching the
+        participant items, so this is a single write regardless of session
+        size. The session tally restarts from tally, the stored tally of the
+        votes carried into the new round, or from no votes. With a deadline,
+        in seconds since the epoch, votes are only accepted before it.
+        expected, voting_round and version guard the update like in
+        set_voting_state.
+        """
+        assignments = ["votingStarted = :true", "tally = :tally"]
+        values = {
+            ":true": True,
+            ":one": 1,
+            ":tally": new_tally() if tally is None else tally,
+        }
+
+        if deadline is not None:
+            assignments.append("votingDeadline = :deadline")
+            values[":deadline"] = deadline
+
+        item = self._update_voting_state(
+            session_id,
+            expected,
+            voting_round,
+            version,
+            assignments,
+            additions="votingRound :one",
+            removals=() if deadline is not None else ("votingDeadline",),
+            ExpressionAttributeValues=values,
+            ReturnValues="UPDATED_NEW",
         )
 
-    def delete_session(self, session_id):
-        self.table.delete_item(Key={"sessionID": session_id, "id": session_id})
+        return int(item["votingRound"])
+
+    def delete_session(self, session_id, version=None, participant_ids=()):
+        """Deletes a session, with version only if it is still at that version.
+
+        The directory entries of participant_ids stop pointing at the
+        session; the first of them go in the same transaction as the session.
+        Entries already pointing elsewhere are left alone.
+        """
+        if participant_ids:
+            return self._delete_session_and_pointers(
+                session_id, version, list(participant_ids)
+            )
+
+        kwargs = {}
+
+        if version is not None:
+            condition, values = _version_condition(version)
+
+            kwargs["ConditionExpression"] = condition
+            kwargs["ExpressionAttributeValues"] = {":version": values[":version"]}
 
-    def add_participant(self, session_id, participant, record_expiration):
         try:
-            self.table.put_item(
-                Item={
-                    "sessionID": session_id,
-                    "id": participant["id"],
-                    "name": participant["name"],
-                    "isModerator": participant["isModerator"],
-                    "ttl": record_expiration,
-                    "type": "participant",
-                },
-                ConditionExpression=Attr("id").not_exists(),
+            self.executor.call(
+                self.table.delete_item,
+                Key={"sessionID": session_id, "id": session_id},
+                **kwargs,
             )
         except ClientError as err:
             if err.response["Error"]["Code"] == "ConditionalCheckFailedException":
-                raise Exception(
-                    f"participant with id {participant['id']} already exists"
+                raise ConflictError(
+                    f"session with id {session_id} changed concurrently"
                 )
             else:
-                raise Exception("failed to put item")
+                raise Exception("failed to delete item")
 
-    def remove_participant(self, session_id, participant_id):
-        self.table.delete_item(Key={"sessionID": session_id, "id": participant_id})
+    def _delete_session_and_pointers(self, session_id, version, participant_ids):
+        session_delete = {
+            "TableName": self.table.name,
+            "Key": {"sessionID": session_id, "id": session_id},
+        }
 
-    def set_vote(self, session_id, participant_id, vote):
-        try:
-            key = {
-                "sessionID": session_id,
-                "id": participant_id,
+        if version is not None:
+            condition, values = _version_condition(version)
+
+            session_delete["ConditionExpression"] = condition
+            session_delete["ExpressionAttributeValues"] = {
+                ":version": values[":version"]
+            }
+
+        first, *rest = _chunks(participant_ids, MAX_TRANSACT_ITEMS - 1)
+
+        codes = self._transact(
+            [
+                {"Delete": session_delete},
+                *[self._pointer_delete(session_id, pid) for pid in first],
+            ],
+            required=1,
+        )
+
+        if codes is not None:
+            raise ConflictError(f"session with id {session_id} changed concurrently")
+
+        for chunk in rest:
+            self._transact(
+                [self._pointer_delete(session_id, pid) for pid in chunk], required=0
+            )
+
+    def delete_participants(self, session_id, concurrency=4):
+        """Deletes the participant items of a session and returns how many there were.
+
+        The partition is read a page at a time, keys only, and its
+        participants deleted in batches of MAX_BATCH_WRITE_ITEMS on up to
+        concurrency threads as the pages come in. Unprocessed deletes are
+        retried with exponential backoff.
+        """
+        keys = (
+            {"sessionID": session_id, "id": item["id"]}
+            for item in self._query(
+                KeyConditionExpression=Key("sessionID").eq(session_id),
+                FilterExpression=Attr("type").eq("participant"),
+                ProjectionExpression="#id",
+                ExpressionAttributeNames={"#id": "id"},
+            )
+        )
+
+        batches = _batches(keys, MAX_BATCH_WRITE_ITEMS)
+
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                return sum(pool.map(self._delete_batch, batches))
+
+        return sum(map(self._delete_batch, batches))
+
+    def _delete_batch(self, keys):
+        self.executor.batch_write(
+            self.table.meta.client,
+            {self.table.name: [{"DeleteRequest": {"Key": key}} for key in keys]},
+        )
+
+        return len(keys)
+
+    def _pointer_put(self, session_id, participant_id, record_expiration):
+        return {
+            "Put": {
+                "TableName": self.table.name,
+                "Item": {
+                    **directory_key(participant_id),
+                    "type": "directory",
+                    "currentSession": session_id,
+                    "ttl": record_expiration,
+                },
             }
+        }
 
-            if vote is None:
-                self.table.update_item(
-                    Key=key,
-                    ConditionExpression=Attr("id").eq(participant_id),
-                    UpdateExpression="REMOVE points, abstained",
+    def _pointer_delete(self, session_id, participant_id):
+        return {
+            "Delete": {
+                "TableName": self.table.name,
+                "Key": directory_key(participant_id),
+                "ConditionExpression": "currentSession = :session",
+                "ExpressionAttributeValues": {":session": session_id},
+            }
+        }
+
+    def _transact(self, actions, required):
+        """Writes actions in one transaction.
+
+        Actions after the first required ones are dropped when their
+        condition fails, and the rest written again. Returns the
+        cancellation codes of the required actions if one of them is
+        rejected, or None once the transaction went through.
+        """
+        while actions:
+            try:
+                self.executor.call(
+                    self.table.meta.client.transact_write_items, TransactItems=actions
                 )
-                return
 
-            self.table.update_item(
-                Key=key,
-                ConditionExpression=Attr("id").eq(participant_id),
-                UpdateExpression="SET points = :points, abstained = :abstained",
-                ExpressionAttributeValues={
-                    ":abstained": vote["abstained"],
+                return None
+            except ClientError as err:
+                if err.response["Error"]["Code"] != "TransactionCanceledException":
+                    raise Exception("failed to update item")
+
+                codes = _cancellation_codes(err, len(actions))
+
+                if "ConditionalCheckFailed" in codes[:required]:
+                    return codes[:required]
+
+                if "ConditionalCheckFailed" not in codes[required:]:
+                    raise Exception("failed to update item")
+
+                actions = [
+                    action
+                    for idx, (action, code) in enumerate(zip(actions, codes))
+                    if idx < required or code != "ConditionalCheckFailed"
+                ]
+
+        return None
+
+    def _participant_write(
+        self,
+        session_id,
+        version,
+        action,
+        missing_message,
+        tally=None,
+        condition=None,
+        values=None,
+        rejected_message=None,
+        pointer=None,
+        changed_message=None,
+    ):
+        """Applies action to a participant item and moves the session to its next version.
+
+        Both writes happen in one transaction, along with moving the session
+        tally by tally and the pointer action on the participant directory,
+        which is dropped if its condition fails. With version the
+        transaction is rejected unless the session is still at that version;
+        condition and values add to what the session must satisfy, and
+        rejected_message describes it failing. With changed_message a failed
+        action is taken for the participant item having changed and raises
+        ConflictError. Returns the new version when version is given;
+        transactions do not return what they wrote.
+        """
+        codes = self._transact(
+            [
+                _session_update(
+                    session_id, self.table.name, version, tally, condition, values,
+                ),
+                action,
+                *([] if pointer is None else [pointer]),
+            ],
+            required=2,
+        )
+
+        if codes is not None:
+            session_code, participant_code = codes
+
+            if session_code == "ConditionalCheckFailed" and version is None:
+                raise Exception(
+                    rejected_message or f"session with id {session_id} not found"
+                )
+            elif session_code == "ConditionalCheckFailed":
+                raise ConflictError(
+                    f"session with id {session_id} changed concurrently"
+                )
+            elif changed_message is not None:
+                raise ConflictError(changed_message)
+            else:
+                raise Exception(missing_message)
+
+        return None if version is None else version + 1
+
+    def add_participant(self, session_id, participant, record_expiration, version=None):
+        """Adds a participant to a session and moves it to its next version.
+
+        With version the participant is only added to that version of the
+        session, and the new version is returned.
+        """
+        item = {
+            "sessionID": session_id,
+            "id": participant["id"],
+            "name": participant["name"],
+            "isModerator": participant["isModerator"],
+            "ttl": record_expiration,
+            "type": "participant",
+        }
+
+        return self._participant_write(
+            session_id,
+            version,
+            {
+                "Put": {
+                    "TableName": self.table.name,
+                    "Item": item,
+                    "ConditionExpression": "attribute_not_exists(id)",
+                }
+            },
+            f"participant with id {participant['id']} already exists",
+            pointer=self._pointer_put(session_id, participant["id"], record_expiration),
+        )
+
+    def remove_participant(
+        self,
+        session_id,
+        participant_id,
+        version=None,
+        tally=None,
+        voting_round=0,
+        previous=None,
+    ):
+        """Removes a participant from a session and moves it to its next version.
+
+        With version the participant must be part of that version of the
+        session. tally takes previous, the participant's vote in
+        voting_round, out of the session tally; a vote changed in the
+        meantime fails the write with ConflictError. Returns the new version
+        when version is given.
+        """
+        delete = {
+            "TableName": self.table.name,
+            "Key": {"sessionID": session_id, "id": participant_id},
+            "ConditionExpression": "attribute_exists(id)",
+        }
+
+        if tally is not None:
+            condition, values = _previous_vote_condition(previous, voting_round)
+
+            delete["ConditionExpression"] += f" AND {condition}"
+            delete["ExpressionAttributeValues"] = values
+
+        return self._participant_write(
+            session_id,
+            version,
+            {"Delete": delete},
+            f"participant with id {participant_id} is not part of session with id {session_id}",
+            tally=tally,
+            pointer=self._pointer_delete(session_id, participant_id),
+            changed_message=None
+            if tally is None
+            else f"vote of participant with id {participant_id} changed concurrently",
+        )
+
+    def _vote_update(
+        self,
+        session_id,
+        participant_id,
+        vote,
+        voting_round,
+        condition=None,
+        values=None,
+    ):
+        update = {
+            "TableName": self.table.name,
+            "Key": {"sessionID": session_id, "id": participant_id},
+            "ConditionExpression": "attribute_exists(id)"
+            + ("" if condition is None else f" AND {condition}"),
+        }
+
+        values = {} if values is None else dict(values)
+
+        if vote is None:
+            update["UpdateExpression"] = "REMOVE points, abstained, votedRound"
+        else:
+            update[
+                "UpdateExpression"
+            ] = "SET points = :points, abstained = :abstained, votedRound = :round"
+            values.update(
+                {
                     ":points": vote["points"],
-                },
+                    ":abstained": vote["abstained"],
+                    ":round": voting_round,
+                }
+            )
+
+        if values:
+            update["ExpressionAttributeValues"] = values
+
+        return update
+
+    def _vote_rejected(self, err, session_id, participant_id, version, tally):
+        """Returns the error to raise for a cast_vote transaction that failed with err.
+
+        A session that failed its condition is read again to tell a version
+        mismatch, which is worth retrying, from a session not taking votes.
+        """
+        if err.response["Error"]["Code"] != "TransactionCanceledException":
+            return Exception("failed to update item")
+
+        session_code, participant_code = _cancellation_codes(err, 2)
+
+        if session_code == "ConditionalCheckFailed":
+            if version is not None and (
+                self.get_version(session_id, consistent=True) != version
+            ):
+                return ConflictError(
+                    f"session with id {session_id} changed concurrently"
+                )
+
+            return Exception(f"session with id {session_id} is not accepting votes")
+
+        if participant_code == "ConditionalCheckFailed" and tally is not None:
+            return ConflictError(
+                f"vote of participant with id {participant_id} changed concurrently"
+            )
+
+        if participant_code == "ConditionalCheckFailed":
+            return Exception(
+                f"participant with id {participant_id} is not part of session with id {session_id}"
+            )
+
+        return Exception("failed to update item")
+
+    def set_vote(
+        self, session_id, participant_id, vote, voting_round=0, version=None, tally=None
+    ):
+        """Records a participant's vote and moves the session tally by tally.
+
+        Votes are rejected once the deadline of a timed round has passed.
+        """
+        condition, values = _deadline_condition()
+
+        return self._participant_write(
+            session_id,
+            version,
+            {
+                "Update": self._vote_update(
+                    session_id, participant_id, vote, voting_round
+                )
+            },
+            "resource not found",
+            tally,
+            condition,
+            values,
+            f"session with id {session_id} is not accepting votes",
+        )
+
+    def cast_vote(
+        self,
+        session_id,
+        participant_id,
+        vote,
+        voting_round=0,
+        version=None,
+        tally=None,
+        previous=None,
+    ):
+        """Records a participant's vote with a single transactional write.
+
+        The write is rejected unless the participant belongs to the session
+        and the session is open, still in voting_round, voting has started,
+        the round's deadline, if any, has not passed and the points fall
+        within the session's pointing range. With version the session must
+        also still be at that version. The session tally moves by tally,
+        which must have been computed from previous, the participant's vote
+        in voting_round before this one; a vote changed in the meantime
+        fails the write with ConflictError. Returns the new version when
+        version is given.
+        """
+        deadline_condition, session_values = _deadline_condition()
+
+        session_condition = (
+            f"closed = :false AND votingStarted = :true"
+            f" AND {_round_condition(voting_round)} AND {deadline_condition}"
+        )
+        session_values.update({":false": False, ":true": True})
+
+        if voting_round != 0:
+            session_values[":round"] = voting_round
+
+        if vote is not None and vote["points"] is not None:
+            session_condition += " AND :points BETWEEN pointingMin AND pointingMax"
+            session_values[":points"] = vote["points"]
+
+        participant_condition, participant_values = (
+            (None, None)
+            if tally is None
+            else _previous_vote_condition(previous, voting_round)
+        )
+
+        try:
+            self.executor.call(
+                self.table.meta.client.transact_write_items,
+                TransactItems=[
+                    _session_update(
+                        session_id,
+                        self.table.name,
+                        version,
+                        tally,
+                        session_condition,
+                        session_values,
+                    ),
+                    {
+                        "Update": self._vote_update(
+                            session_id,
+                            participant_id,
+                            vote,
+                            voting_round,
+                            participant_condition,
+                            participant_values,
+                        )
+                    },
+                ],
             )
         except ClientError as err:
-            if err.response["Error"]["Code"] == "ConditionalCheckFailedException":
-                raise Exception("resource not found")
-            else:
-                raise Exception("failed to update item")
+            raise self._vote_rejected(err, session_id, participant_id, version, tally)
+
+        return None if version is None else version + 1
@@ -0,0 +1,257 @@
+from time import time
+from uuid import uuid4
+
+import unittest
+
+from moto import mock_dynamodb2
+import boto3
+
+from pointing_poker.aws.repositories.test_sessions import create_sessions_table
+from pointing_poker.repositories.errors import ConflictError
+from pointing_poker.repositories.items import tally_delta
+
+
+def session_factory():
+    session_id = str(uuid4())
+
+    return {
+        "id": session_id,
+        "name": "test",
+        "pointingMax": 13,
+        "pointingMin": 1,
+        "votingStarted": False,
+        "closed": False,
+        "createdAt": int(time()),
+        "expiresIn": int(time() + 24 * 60 * 60),
+    }
+
+
+def participant_factory(is_moderator=False):
+    return {"id": str(uuid4()), "name": "test", "isModerator": is_moderator}
+
+
+class SessionsClientRepositoryTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        mock = mock_dynamodb2()
+        mock.start()
+        self.addCleanup(mock.stop)
+
+        from pointing_poker.aws.repositories.client import SessionsDynamoDBClientRepo
+
+        self.table = create_sessions_table(boto3.resource("dynamodb"))
+        self.repo = SessionsDynamoDBClientRepo()
+
+        self.session = session_factory()
+        self.repo.create(self.session, record_expiration=self.session["expiresIn"])
+
+    def add_participant(self, is_moderator=False):
+        participant = participant_factory(is_moderator)
+
+        self.repo.add_participant(
+            self.session["id"], participant, record_expiration=self.session["expiresIn"]
+        )
+
+        return participant
+
+    def test_get(self):
+        participant = self.add_participant()
+
+        session = self.repo.get(self.session["id"])
+
+        self.assertEqual(session["name"], "test")
+        self.assertEqual(session["version"], 1)
+        self.assertIs(type(session["pointingMax"]), int)
+        self.assertEqual(session["tally"]["count"], 0)
+        self.assertEqual(session["participants"], [{**participant, "vote": None}])
+        self.assertIsNone(self.repo.get(str(uuid4())))
+
+    def test_get_with_fields_and_pages(self):
+        ids = sorted(self.add_participant()["id"] for _ in range(4))
+
+        session = self.repo.get(
+            self.session["id"], fields=["name", "participants", "participants/id"]
+        )
+
+        self.assertNotIn("pointingMax", session)
+        self.assertEqual([p["id"] for p in session["participants"]], ids)
+
+        page = self.repo.get(self.session["id"], after=ids[0], first=2)
+
+        self.assertEqual([p["id"] for p in page["participants"]], ids[1:3])
+
+    def test_cast_vote(self):
+        participant = self.add_participant()
+        vote = {"points": 5, "abstained": False}
+
+        voting_round = self.repo.start_round(self.session["id"])
+
+        self.assertEqual(
+            self.repo.cast_vote(
+                self.session["id"],
+                participant["id"],
+                vote,
+                voting_round=voting_round,
+                version=2,
+                tally=tally_delta(None, vote),
+            ),
+            3,
+        )
+
+        session = self.repo.get_session(self.session["id"])
+
+        self.assertEqual(session.participant(participant["id"]).vote.points, 5)
+        self.assertEqual((session.tally["count"], session.tally["sum"]), (1, 5))
+        self.assertEqual(
+            self.repo.get_participant_in_session(self.session["id"], participant["id"])[
+                "vote"
+            ],
+            vote,
+        )
+
+        self.repo.cast_vote(
+            self.session["id"],
+            participant["id"],
+            None,
+            voting_round=voting_round,
+            tally=tally_delta(vote, None),
+            previous=vote,
+        )
+
+        self.assertEqual(self.repo.get_version(self.session["id"]), 4)
+        self.assertEqual(self.repo.get(self.session["id"])["tally"]["count"], 0)
+
+    def test_remove_participant_moves_tally(self):
+        participant = self.add_participant()
+        vote = {"points": 5, "abstained": False}
+
+        voting_round = self.repo.start_round(self.session["id"])
+        self.repo.cast_vote(
+            self.session["id"],
+            participant["id"],
+            vote,
+            voting_round=voting_round,
+            tally=tally_delta(None, vote),
+        )
+
+        self.assertEqual(
+            self.repo.remove_participant(
+                self.session["id"],
+                participant["id"],
+                version=3,
+                tally=tally_delta(vote, None),
+            ),
+            4,
+        )
+
+        tally = self.repo.get(self.session["id"])["tally"]
+
+        self.assertEqual((tally["count"], tally["sum"]), (0, 0))
+
+    def test_cast_vote_rejected(self):
+        participant = self.add_participant()
+
+        with self.assertRaises(Exception) as context:
+            self.repo.cast_vote(
+                self.session["id"], participant["id"], {"points": 1, "abstained": False}
+            )
+
+        self.assertEqual(
+            str(context.exception),
+            f"session with id {self.session['id']} is not accepting votes",
+        )
+
+        voting_round = self.repo.start_round(self.session["id"])
+
+        with self.assertRaises(Exception) as context:
+            self.repo.cast_vote(
+                self.session["id"],
+                participant["id"],
+                {"points": 20, "abstained": False},
+                voting_round=voting_round,
+                version=2,
+            )
+
+        self.assertNotIsInstance(context.exception, ConflictError)
+
+        with self.assertRaises(ConflictError):
+            self.repo.cast_vote(
+                self.session["id"],
+                participant["id"],
+                {"points": 5, "abstained": False},
+                voting_round=voting_round,
+                version=1,
+            )
+
+        with self.assertRaises(ConflictError):
+            self.repo.cast_vote(
+                self.session["id"],
+                participant["id"],
+                {"points": 5, "abstained": False},
+                voting_round=voting_round,
+                tally=tally_delta({"points": 3, "abstained": False}, None),
+                previous={"points": 3, "abstained": False},
+            )
+
+        with self.assertRaises(Exception) as context:
+            self.repo.cast_vote(
+                self.session["id"], "bogus", None, voting_round=voting_round
+            )
+
+        self.assertEqual(
+            str(context.exception),
+            f"participant with id bogus is not part of session with id {self.session['id']}",
+        )
+
+    def test_set_reviewing_issue(self):
+        issue = {"title": "IS-1", "url": None}
+
+        self.assertEqual(
+            self.repo.set_reviewing_issue(self.session["id"], issue, version=0), 1
+        )
+        self.assertEqual(self.repo.set_reviewing_issue(self.session["id"], issue), 2)
+
+        with self.assertRaises(ConflictError):
+            self.repo.set_reviewing_issue(self.session["id"], issue, version=1)
+
+        self.assertEqual(
+            self.repo.get(self.session["id"])["reviewingIssue"],
+            {"title": "IS-1", "url": None, "description": None},
+        )
+
+        with self.assertRaises(Exception) as context:
+            self.repo.set_reviewing_issue("bogus", issue)
+
+        self.assertEqual(str(context.exception), "session with id bogus not found")
+
+    def test_participant_directory(self):
+        participant = self.add_participant()
+
+        self.assertEqual(
+            self.repo.get_participant(participant["id"]),
+            {**participant, "vote": None, "sessionID": self.session["id"]},
+        )
+        self.assertEqual(
+            self.repo.get_participant_sessions([participant["id"], "bogus"]),
+            {participant["id"]: self.session["id"]},
+        )
+
+        self.repo.remove_participant(self.session["id"], participant["id"])
+
+        self.assertIsNone(self.repo.get_participant(participant["id"]))
+        self.assertEqual(self.repo.get_participant_sessions([participant["id"]]), {})
+
+    def test_add_participant_conflicts(self):
+        participant = self.add_participant()
+
+        with self.assertRaises(Exception) as context:
+            self.repo.add_participant(self.session["id"], participant, 0)
+
+        self.assertEqual(
+            str(context.exception),
+            f"participant with id {participant['id']} already exists",
+        )
+
+        with self.assertRaises(ConflictError):
+            self.repo.add_participant(
+                self.session["id"], participant_factory(), 0, version=0
+            )
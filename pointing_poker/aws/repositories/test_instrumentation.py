@@ -0,0 +1,104 @@
+import unittest
+from uuid import uuid4
+
+from moto import mock_dynamodb2
+import boto3
+
+from pointing_poker.aws.repositories.instrumentation import (
+    consumed_capacity,
+    delete_count,
+    instrument_client,
+    item_count,
+    items_deleted,
+)
+from pointing_poker.aws.repositories.sessions import SessionsDynamoDBRepo
+from pointing_poker.aws.repositories.test_sessions import (
+    create_sessions_table,
+    session_factory,
+)
+from pointing_poker.repositories.instrumented import (
+    InstrumentedSessionsRepo,
+    RepoMetrics,
+)
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    def test_consumed_capacity(self):
+        self.assertEqual(consumed_capacity({}), 0)
+        self.assertEqual(
+            consumed_capacity({"ConsumedCapacity": {"CapacityUnits": 1}}), 1
+        )
+        self.assertEqual(
+            consumed_capacity(
+                {"ConsumedCapacity": [{"CapacityUnits": 1}, {"CapacityUnits": 2.5}]}
+            ),
+            3.5,
+        )
+
+    def test_item_count(self):
+        self.assertEqual(item_count({"Count": 4, "Items": []}), 4)
+        self.assertEqual(item_count({"Item": {}}), 1)
+        self.assertEqual(item_count({}), 0)
+        self.assertEqual(item_count({"Responses": {"sessions": [{}, {}]}}), 2)
+
+    def test_items_deleted(self):
+        request = {"RequestItems": {"sessions": [{"DeleteRequest": {}}] * 3}}
+
+        self.assertEqual(delete_count("BatchWriteItem", request), 3)
+        self.assertEqual(delete_count("DeleteItem", {"Key": {}}), 1)
+        self.assertEqual(delete_count("GetItem", {"Key": {}}), 0)
+        self.assertEqual(
+            items_deleted(
+                {"UnprocessedItems": {"sessions": [{"DeleteRequest": {}}]}}, 3
+            ),
+            2,
+        )
+        self.assertEqual(items_deleted({"Error": {}}, 1), 0)
+
+    @mock_dynamodb2
+    def test_records_round_trips(self):
+        db = boto3.resource("dynamodb")
+        create_sessions_table(db)
+
+        session_id, session = session_factory()
+        db.Table("sessions").put_item(Item=session)
+
+        metrics = RepoMetrics()
+        repo = SessionsDynamoDBRepo()
+        instrument_client(repo.table.meta.client, metrics)
+
+        metrics.handler = "session"
+        InstrumentedSessionsRepo(repo, metrics).get(session_id)
+
+        entry = metrics.snapshot()[("session", "get")]
+
+        self.assertEqual(entry["Calls"], 1)
+        self.assertEqual(entry["RoundTrips"], 1)
+        self.assertEqual(entry["Items"], 1)
+
+    @mock_dynamodb2
+    def test_records_items_deleted(self):
+        create_sessions_table(boto3.resource("dynamodb"))
+
+        session_id, session = session_factory()
+
+        metrics = RepoMetrics()
+        repo = SessionsDynamoDBRepo()
+        repo.create(session, record_expiration=0)
+
+        for _ in range(30):
+            repo.add_participant(
+                session_id,
+                {"id": str(uuid4()), "name": "John", "isModerator": False},
+                record_expiration=0,
+            )
+
+        instrument_client(repo.table.meta.client, metrics)
+
+        metrics.handler = "closeSession"
+        InstrumentedSessionsRepo(repo, metrics).delete_participants(session_id)
+
+        entry = metrics.snapshot()[("closeSession", "delete_participants")]
+
+        self.assertEqual(entry["ItemsDeleted"], 30)
+        self.assertEqual(entry["RoundTrips"], 3)
@@ -0,0 +1,60 @@
+from decimal import Decimal
+from unittest import TestCase
+
+from boto3.dynamodb.types import TypeSerializer
+
+from pointing_poker.aws.repositories.marshalling import (
+    deserialize,
+    deserialize_item,
+    serialize,
+    serialize_item,
+)
+
+
+class MarshallingTestCase(TestCase):
+    def test_deserialize_item(self):
+        serializer = TypeSerializer()
+        item = {
+            "id": "id",
+            "points": 3,
+            "mean": Decimal("2.5"),
+            "abstained": False,
+            "vote": None,
+            "tally": {"histogram": {"3": 1}, "count": 1},
+            "ids": ["a", 1],
+            "tags": {"a", "b"},
+            "sizes": {1, 2},
+        }
+
+        read = deserialize_item(
+            {key: serializer.serialize(value) for key, value in item.items()}
+        )
+
+        self.assertEqual(read, item)
+        self.assertIs(type(read["points"]), int)
+        self.assertIs(type(read["tally"]["count"]), int)
+        self.assertIs(type(read["mean"]), Decimal)
+
+    def test_serialize_item(self):
+        serializer = TypeSerializer()
+        item = {
+            "id": "id",
+            "points": 3,
+            "mean": Decimal("2.5"),
+            "abstained": False,
+            "vote": None,
+            "tally": {"histogram": {"3": 1}, "count": 1},
+            "ids": ["a", 1],
+        }
+
+        self.assertEqual(
+            serialize_item(item),
+            {key: serializer.serialize(value) for key, value in item.items()},
+        )
+
+        with self.assertRaises(TypeError):
+            serialize(2.5)
+
+    def test_unknown_type(self):
+        with self.assertRaises(KeyError):
+            deserialize({"X": "value"})
@@ -0,0 +1,143 @@
+import unittest
+from unittest.mock import Mock
+
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from pointing_poker.aws.repositories.retries import (
+    RetryingExecutor,
+    remaining_seconds,
+    retry_reason,
+)
+
+
+def client_error(code, **response):
+    return ClientError({"Error": {"Code": code}, **response}, "operation")
+
+
+class RetryReasonTestCase(unittest.TestCase):
+    def test_throttling(self):
+        self.assertEqual(
+            retry_reason(client_error("ProvisionedThroughputExceededException")),
+            "ProvisionedThroughputExceededException",
+        )
+        self.assertEqual(
+            retry_reason(EndpointConnectionError(endpoint_url="http://localhost")),
+            "EndpointConnectionError",
+        )
+        self.assertIsNone(retry_reason(client_error("ValidationException")))
+
+    def test_cancelled_transactions(self):
+        def cancelled(*codes):
+            return client_error(
+                "TransactionCanceledException",
+                CancellationReasons=[{"Code": code} for code in codes],
+            )
+
+        self.assertEqual(
+            retry_reason(cancelled("None", "ThrottlingError")), "ThrottlingError"
+        )
+        self.assertIsNone(retry_reason(cancelled("ConditionalCheckFailed", "None")))
+        self.assertIsNone(
+            retry_reason(cancelled("TransactionConflict", "ConditionalCheckFailed"))
+        )
+
+    def test_remaining_seconds(self):
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 200
+
+        self.assertEqual(remaining_seconds(context), 0)
+        self.assertIsNone(remaining_seconds(None))
+
+
+class RetryingExecutorTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 0
+        self.sleep = Mock(side_effect=self.advance)
+        self.executor = RetryingExecutor(
+            max_attempts=4,
+            base_delay=0.1,
+            max_delay=0.25,
+            clock=lambda: self.now,
+            sleep=self.sleep,
+            random=lambda: 1,
+        )
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def test_retries_with_backoff(self):
+        request = Mock(
+            side_effect=[
+                client_error("ThrottlingException"),
+                client_error("ThrottlingException"),
+                client_error("ThrottlingException"),
+                {"Item": {}},
+            ]
+        )
+        retries = []
+        self.executor.on_retry = retries.append
+
+        self.assertEqual(self.executor.call(request, Key={}), {"Item": {}})
+
+        self.assertEqual(
+            [call.args[0] for call in self.sleep.call_args_list], [0.1, 0.2, 0.25]
+        )
+        self.assertEqual(retries, ["ThrottlingException"] * 3)
+        self.assertEqual(self.executor.retries["ThrottlingException"], 3)
+
+    def test_counts_writes(self):
+        self.executor.call(Mock(__name__="get_item"))
+        self.executor.call(Mock(__name__="transact_write_items"))
+
+        self.assertRaises(
+            ClientError,
+            lambda: self.executor.call(
+                Mock(
+                    __name__="update_item",
+                    side_effect=client_error("ValidationException"),
+                )
+            ),
+        )
+
+        self.assertEqual(self.executor.writes, 1)
+
+    def test_gives_up(self):
+        request = Mock(side_effect=client_error("ThrottlingException"))
+
+        self.assertRaises(ClientError, lambda: self.executor.call(request))
+        self.assertEqual(request.call_count, 4)
+
+        request.reset_mock()
+        request.side_effect = client_error("ValidationException")
+
+        self.assertRaises(ClientError, lambda: self.executor.call(request))
+        self.assertEqual(request.call_count, 1)
+
+    def test_time_budget(self):
+        request = Mock(side_effect=client_error("ThrottlingException"))
+
+        self.executor.set_budget(0.35)
+
+        self.assertRaises(ClientError, lambda: self.executor.call(request))
+        self.assertEqual(request.call_count, 3)
+
+        self.executor.set_budget(None)
+        request.reset_mock()
+
+        self.assertRaises(ClientError, lambda: self.executor.call(request))
+        self.assertEqual(request.call_count, 4)
+
+    def test_batch_get(self):
+        client = Mock()
+        client.batch_get_item.side_effect = [
+            {"Responses": {"sessions": [{"id": "a"}]}, "UnprocessedKeys": {"x": 1}},
+            {"Responses": {"sessions": [{"id": "b"}]}, "UnprocessedKeys": {}},
+        ]
+
+        self.assertEqual(
+            self.executor.batch_get(client, {"y": 2}),
+            {"sessions": [{"id": "a"}, {"id": "b"}]},
+        )
+
+        client.batch_get_item.assert_called_with(RequestItems={"x": 1})
+        self.assertEqual(self.executor.retries["UnprocessedKeys"], 1)
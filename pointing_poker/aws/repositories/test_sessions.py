@@ -2,9 +2,11 @@ from time import time
 from uuid import uuid4
 
 import unittest
+from unittest.mock import Mock, patch
 
 from moto import mock_dynamodb2
 import boto3
+from boto3.dynamodb.conditions import Key
 
 
 def session_factory():
@@ -43,7 +45,7 @@ def create_sessions_table(db):
         ],
         GlobalSecondaryIndexes=[
             {
-                "IndexName": "string",
+                "IndexName": "id-index",
                 "KeySchema": [
                     {"AttributeName": "id", "KeyType": "HASH"},
                     {"AttributeName": "sessionID", "KeyType": "RANGE"},
@@ -101,6 +103,29 @@ class SessionsRepositoryTestCase(unittest.TestCase):
             session["reviewing_issue_description"],
         )
 
+    @mock_dynamodb2
+    def test_get_session_model(self):
+        from pointing_poker.aws.repositories import sessions
+
+        table = create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        table.put_item(Item=session)
+
+        participant = {"id": str(uuid4()), "name": "test", "isModerator": False}
+        repo.add_participant(session_id, participant, session["expiresIn"])
+
+        model = repo.get_session(session_id).to_response()
+        record = repo.get(session_id)
+
+        for key in model:
+            self.assertEqual(model[key], record.get(key, model[key]), key)
+        self.assertEqual(model["participants"][0]["name"], "test")
+        self.assertIsNone(repo.get_session(str(uuid4())))
+
     @mock_dynamodb2
     def test_get_session(self):
         from pointing_poker.aws.repositories import sessions
@@ -270,7 +295,9 @@ class SessionsRepositoryTestCase(unittest.TestCase):
             "vote": None,
         }
 
-        session_id = str(uuid4())
+        session_id, session = session_factory()
+
+        repo.create(session, record_expiration=0)
 
         table.put_item(
             Item={
@@ -286,6 +313,8 @@ class SessionsRepositoryTestCase(unittest.TestCase):
         record = table.get_item(Key={"sessionID": session_id, "id": participant_id})
 
         self.assertNotIn("Item", record)
+        self.assertEqual(repo.get_version(session_id), 1)
+        self.assertIsNone(repo.get_version("bogus"))
 
     @mock_dynamodb2
     def test_get_session_with_participants(self):
@@ -370,6 +399,14 @@ class SessionsRepositoryTestCase(unittest.TestCase):
         self.assertEqual(item["Item"]["reviewing_issue_description"], "Work to do")
         self.assertEqual(item["Item"]["reviewing_issue_url"], "https://example.com")
 
+        with self.assertRaises(Exception) as ctx:
+            repo.set_reviewing_issue("bogus", {"title": "My Issue"})
+
+        self.assertEqual(ctx.exception.args[0], "session with id bogus not found")
+        self.assertNotIn(
+            "Item", table.get_item(Key={"sessionID": "bogus", "id": "bogus"})
+        )
+
     def test_set_reviewing_issue_empty(self):
         from pointing_poker.aws.repositories import sessions
 
@@ -390,9 +427,768 @@ class SessionsRepositoryTestCase(unittest.TestCase):
 
         repo.create(session, record_expiration=0)
 
-        repo.set_voting_state(session_id, True)
+        session = repo.set_voting_state(session_id, True)
 
         item = table.get_item(Key={"sessionID": session_id, "id": session_id})
 
         self.assertIn("Item", item)
         self.assertEqual(item["Item"]["votingStarted"], True)
+
+        self.assertTrue(session["votingStarted"])
+        self.assertEqual(session["name"], "test")
+        self.assertEqual(session["reviewingIssue"]["title"], "IS-123")
+        self.assertNotIn("participants", session)
+
+    @mock_dynamodb2
+    def test_set_voting_state_conflict(self):
+        from pointing_poker.aws.repositories import sessions
+
+        create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create(session, record_expiration=0)
+
+        self.assertEqual(
+            repo.start_round(session_id, expected=False, voting_round=0), 1
+        )
+
+        message = f"voting state of session with id {session_id} changed concurrently"
+
+        with self.assertRaises(Exception) as ctx:
+            repo.start_round(session_id, expected=False, voting_round=0)
+
+        self.assertEqual(ctx.exception.args[0], message)
+
+        with self.assertRaises(Exception) as ctx:
+            repo.set_voting_state(session_id, False, expected=True, voting_round=0)
+
+        self.assertEqual(ctx.exception.args[0], message)
+
+        session = repo.set_voting_state(
+            session_id, False, expected=True, voting_round=1
+        )
+
+        self.assertFalse(session["votingStarted"])
+
+        with self.assertRaises(Exception) as ctx:
+            repo.set_voting_state("bogus", False)
+
+        self.assertEqual(
+            ctx.exception.args[0],
+            "voting state of session with id bogus changed concurrently",
+        )
+
+    @mock_dynamodb2
+    def test_cast_vote(self):
+        from pointing_poker.aws.repositories import sessions
+
+        table = create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create(
+            {**session, "pointingMin": 1, "pointingMax": 13, "votingStarted": True},
+            record_expiration=0,
+        )
+
+        participant_id = str(uuid4())
+
+        repo.add_participant(
+            session_id,
+            {"id": participant_id, "name": "John", "isModerator": False},
+            record_expiration=0,
+        )
+
+        repo.cast_vote(session_id, participant_id, {"points": 5, "abstained": False})
+
+        item = table.get_item(Key={"sessionID": session_id, "id": participant_id})
+
+        self.assertEqual(item["Item"]["points"], 5)
+        self.assertEqual(item["Item"]["abstained"], False)
+
+        repo.cast_vote(session_id, participant_id, None)
+
+        item = table.get_item(Key={"sessionID": session_id, "id": participant_id})
+
+        self.assertNotIn("points", item["Item"])
+
+    @mock_dynamodb2
+    def test_tally(self):
+        from pointing_poker.aws.repositories import sessions
+        from pointing_poker.repositories.items import tally_delta
+
+        create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create(
+            {**session, "pointingMin": 1, "pointingMax": 3}, record_expiration=0
+        )
+
+        participant_id = str(uuid4())
+
+        repo.add_participant(
+            session_id,
+            {"id": participant_id, "name": "John", "isModerator": False},
+            record_expiration=0,
+        )
+
+        voting_round = repo.start_round(
+            session_id,
+            tally={"count": 1, "sum": 2, "abstentions": 0, "histogram": {"2": 1}},
+        )
+
+        first = {"points": 3, "abstained": False}
+        second = {"points": None, "abstained": True}
+
+        repo.cast_vote(
+            session_id,
+            participant_id,
+            first,
+            voting_round=voting_round,
+            tally=tally_delta(None, first),
+        )
+        repo.set_vote(
+            session_id,
+            participant_id,
+            second,
+            voting_round=voting_round,
+            tally=tally_delta(first, second),
+        )
+
+        self.assertEqual(
+            repo.get(session_id)["tally"],
+            {
+                "count": 1,
+                "sum": 2,
+                "abstentions": 1,
+                "min": 2,
+                "max": 2,
+                "mean": 2,
+                "consensus": True,
+                "histogram": [
+                    {"points": 1, "count": 0},
+                    {"points": 2, "count": 1},
+                    {"points": 3, "count": 0},
+                ],
+            },
+        )
+        self.assertEqual(
+            repo.get(session_id, fields=["tally", "tally/count"])["tally"]["count"], 1
+        )
+
+        repo.remove_participant(
+            session_id, participant_id, tally=tally_delta(second, None)
+        )
+
+        self.assertEqual(repo.get(session_id)["tally"]["abstentions"], 0)
+
+        repo.start_round(session_id)
+
+        self.assertEqual(repo.get(session_id)["tally"]["histogram"][1]["count"], 0)
+
+    @mock_dynamodb2
+    def test_voting_deadline(self):
+        from pointing_poker.aws.repositories import sessions
+
+        create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create(
+            {**session, "pointingMin": 1, "pointingMax": 13}, record_expiration=0
+        )
+
+        participant_id = str(uuid4())
+
+        repo.add_participant(
+            session_id,
+            {"id": participant_id, "name": "John", "isModerator": False},
+            record_expiration=0,
+        )
+
+        vote = {"points": 5, "abstained": False}
+
+        with patch.object(sessions, "time", return_value=1000):
+            voting_round = repo.start_round(session_id, deadline=1030)
+
+            repo.cast_vote(session_id, participant_id, vote, voting_round)
+
+            self.assertEqual(repo.get(session_id)["votingDeadline"], 1030)
+
+        with patch.object(sessions, "time", return_value=1030):
+            for write in (repo.cast_vote, repo.set_vote):
+                with self.assertRaises(Exception) as context:
+                    write(session_id, participant_id, vote, voting_round)
+
+                self.assertEqual(
+                    str(context.exception),
+                    f"session with id {session_id} is not accepting votes",
+                )
+
+        repo.set_voting_state(session_id, False)
+
+        self.assertNotIn("votingDeadline", repo.get(session_id))
+
+    @mock_dynamodb2
+    def test_cast_vote_rejected(self):
+        from pointing_poker.aws.repositories import sessions
+
+        create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create(
+            {**session, "pointingMin": 1, "pointingMax": 13}, record_expiration=0
+        )
+
+        participant_id = str(uuid4())
+
+        repo.add_participant(
+            session_id,
+            {"id": participant_id, "name": "John", "isModerator": False},
+            record_expiration=0,
+        )
+
+        vote = {"points": 5, "abstained": False}
+
+        with self.assertRaises(Exception) as ctx:
+            repo.cast_vote(session_id, participant_id, vote)
+
+        self.assertEqual(
+            ctx.exception.args[0],
+            f"session with id {session_id} is not accepting votes",
+        )
+
+        repo.set_voting_state(session_id, True)
+
+        with self.assertRaises(Exception) as ctx:
+            repo.cast_vote(session_id, participant_id, {**vote, "points": 20})
+
+        self.assertEqual(
+            ctx.exception.args[0],
+            f"session with id {session_id} is not accepting votes",
+        )
+
+        with self.assertRaises(Exception) as ctx:
+            repo.cast_vote(session_id, "bogus", vote)
+
+        self.assertEqual(
+            ctx.exception.args[0],
+            f"participant with id bogus is not part of session with id {session_id}",
+        )
+
+    @mock_dynamodb2
+    def test_start_round(self):
+        from pointing_poker.aws.repositories import sessions
+
+        table = create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create(
+            {**session, "pointingMin": 1, "pointingMax": 13}, record_expiration=0
+        )
+
+        participant_id = str(uuid4())
+
+        repo.add_participant(
+            session_id,
+            {"id": participant_id, "name": "John", "isModerator": False},
+            record_expiration=0,
+        )
+
+        self.assertEqual(repo.start_round(session_id), 1)
+
+        vote = {"points": 5, "abstained": False}
+
+        repo.cast_vote(session_id, participant_id, vote, voting_round=1)
+
+        self.assertEqual(
+            repo.get_participant_in_session(session_id, participant_id)["vote"], vote
+        )
+
+        self.assertEqual(repo.start_round(session_id), 2)
+
+        item = table.get_item(Key={"sessionID": session_id, "id": session_id})
+
+        self.assertTrue(item["Item"]["votingStarted"])
+
+        self.assertIsNone(repo.get(session_id)["participants"][0]["vote"])
+
+        self.assertIsNone(
+            repo.get_participant_in_session(session_id, participant_id)["vote"]
+        )
+
+        with self.assertRaises(Exception) as ctx:
+            repo.cast_vote(session_id, participant_id, vote, voting_round=1)
+
+        self.assertEqual(
+            ctx.exception.args[0],
+            f"session with id {session_id} is not accepting votes",
+        )
+
+    @mock_dynamodb2
+    def test_get_session_with_unstamped_votes(self):
+        from pointing_poker.aws.repositories import sessions
+
+        table = create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        table.put_item(Item=session)
+
+        table.put_item(
+            Item={
+                "sessionID": session_id,
+                "id": "voter",
+                "name": "John",
+                "isModerator": False,
+                "type": "participant",
+                "points": 3,
+                "abstained": False,
+            }
+        )
+
+        participants = repo.get(session_id)["participants"]
+
+        self.assertEqual(participants[0]["vote"], {"points": 3, "abstained": False})
+
+        repo.start_round(session_id)
+
+        self.assertIsNone(repo.get(session_id)["participants"][0]["vote"])
+
+    @mock_dynamodb2
+    def test_get_session_follows_pagination(self):
+        from pointing_poker.aws.repositories import sessions
+
+        table = create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create(session, record_expiration=0)
+
+        for idx in range(5):
+            repo.add_participant(
+                session_id,
+                {"id": f"participant-{idx}", "name": "John", "isModerator": False},
+                record_expiration=0,
+            )
+
+        query = table.query
+        pages = []
+
+        def limited_query(**kwargs):
+            records = query(Limit=2, **kwargs)
+            pages.append(records)
+            return records
+
+        repo.table = Mock(wraps=table, query=limited_query)
+
+        record = repo.get(session_id)
+
+        self.assertGreater(len(pages), 1)
+        self.assertEqual(record["id"], session_id)
+        self.assertEqual(len(record["participants"]), 5)
+
+    @mock_dynamodb2
+    def test_get_session_projection(self):
+        from pointing_poker.aws.repositories import sessions
+
+        create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create(session, record_expiration=0)
+
+        repo.add_participant(
+            session_id,
+            {"id": str(uuid4()), "name": "John", "isModerator": False},
+            record_expiration=0,
+        )
+
+        record = repo.get(session_id, fields=["id", "participants", "participants/id"])
+
+        self.assertEqual(record["id"], session_id)
+        self.assertNotIn("pointingMax", record)
+        self.assertNotIn("ttl", record)
+        self.assertEqual(record["reviewingIssue"], {})
+        self.assertEqual(len(record["participants"]), 1)
+
+        record = repo.get(session_id, fields=["pointingMax", "reviewingIssue/title"])
+
+        self.assertEqual(record["pointingMax"], session["pointingMax"])
+        self.assertEqual(
+            record["reviewingIssue"]["title"], session["reviewing_issue_title"]
+        )
+        self.assertEqual(record["participants"], [])
+
+    @mock_dynamodb2
+    def test_get_session_participants_page(self):
+        from pointing_poker.aws.repositories import sessions
+
+        create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create(session, record_expiration=0)
+
+        participant_ids = sorted(str(uuid4()) for _ in range(6))
+
+        for participant_id in participant_ids:
+            repo.add_participant(
+                session_id,
+                {"id": participant_id, "name": "John", "isModerator": False},
+                record_expiration=0,
+            )
+
+        record = repo.get(session_id, first=2)
+
+        self.assertEqual(record["id"], session_id)
+        self.assertEqual(
+            [participant["id"] for participant in record["participants"]],
+            participant_ids[:2],
+        )
+
+        record = repo.get(session_id, after=participant_ids[1], first=3)
+
+        self.assertEqual(
+            [participant["id"] for participant in record["participants"]],
+            participant_ids[2:5],
+        )
+
+        record = repo.get(session_id, after=participant_ids[4])
+
+        self.assertEqual(
+            [participant["id"] for participant in record["participants"]],
+            participant_ids[5:],
+        )
+
+        self.assertIsNone(repo.get("bogus", first=1))
+
+    @mock_dynamodb2
+    def test_versioned_writes(self):
+        from pointing_poker.aws.repositories import sessions
+
+        table = create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create(
+            {**session, "pointingMin": 1, "pointingMax": 13}, record_expiration=0
+        )
+
+        participant = {"id": str(uuid4()), "name": "John", "isModerator": False}
+
+        self.assertEqual(repo.add_participant(session_id, participant, 0, version=0), 1)
+        self.assertEqual(repo.start_round(session_id, version=1), 1)
+        self.assertEqual(
+            repo.cast_vote(
+                session_id,
+                participant["id"],
+                {"points": 3, "abstained": False},
+                voting_round=1,
+                version=2,
+            ),
+            3,
+        )
+        self.assertEqual(
+            repo.set_reviewing_issue(session_id, {"title": "IS-1"}, version=3), 4
+        )
+        self.assertEqual(
+            repo.set_voting_state(session_id, False, version=4)["version"], 5
+        )
+        self.assertEqual(
+            repo.remove_participant(session_id, participant["id"], version=5), 6
+        )
+
+        item = table.get_item(Key={"sessionID": session_id, "id": session_id})
+
+        self.assertEqual(item["Item"]["version"], 6)
+        self.assertNotIn(
+            "Item",
+            table.get_item(Key={"sessionID": session_id, "id": participant["id"]}),
+        )
+
+    @mock_dynamodb2
+    def test_versioned_writes_conflict(self):
+        from pointing_poker.aws.repositories import sessions
+        from pointing_poker.repositories.errors import ConflictError
+        from pointing_poker.repositories.items import tally_delta
+
+        table = create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create({**session, "votingStarted": True}, record_expiration=0)
+
+        participant = {"id": str(uuid4()), "name": "John", "isModerator": False}
+
+        repo.add_participant(session_id, participant, 0, version=0)
+
+        with self.assertRaises(ConflictError) as ctx:
+            repo.add_participant(
+                session_id, {**participant, "id": str(uuid4())}, 0, version=0,
+            )
+
+        self.assertEqual(
+            ctx.exception.args[0], f"session with id {session_id} changed concurrently",
+        )
+
+        with self.assertRaises(Exception) as ctx:
+            repo.remove_participant(session_id, "bogus", version=1)
+
+        self.assertNotIsInstance(ctx.exception, ConflictError)
+
+        self.assertRaises(
+            ConflictError,
+            lambda: repo.cast_vote(session_id, participant["id"], None, version=0),
+        )
+
+        with self.assertRaises(Exception) as ctx:
+            repo.cast_vote(
+                session_id,
+                participant["id"],
+                {"points": 20, "abstained": False},
+                version=1,
+            )
+
+        self.assertEqual(
+            ctx.exception.args[0],
+            f"session with id {session_id} is not accepting votes",
+        )
+        self.assertNotIsInstance(ctx.exception, ConflictError)
+
+        vote = {"points": 3, "abstained": False}
+
+        with self.assertRaises(ConflictError) as ctx:
+            repo.cast_vote(
+                session_id,
+                participant["id"],
+                None,
+                tally=tally_delta(vote, None),
+                previous=vote,
+            )
+
+        self.assertEqual(
+            ctx.exception.args[0],
+            f"vote of participant with id {participant['id']} changed concurrently",
+        )
+
+        with self.assertRaises(ConflictError):
+            repo.remove_participant(
+                session_id,
+                participant["id"],
+                tally=tally_delta(vote, None),
+                previous=vote,
+            )
+
+        self.assertIn(
+            "Item",
+            table.get_item(Key={"sessionID": session_id, "id": participant["id"]}),
+        )
+        self.assertRaises(
+            ConflictError,
+            lambda: repo.set_reviewing_issue(session_id, {"title": "IS-1"}, version=0),
+        )
+        self.assertRaises(
+            ConflictError, lambda: repo.delete_session(session_id, version=0)
+        )
+
+        repo.delete_session(session_id, version=1)
+
+        self.assertNotIn(
+            "Item", table.get_item(Key={"sessionID": session_id, "id": session_id})
+        )
+
+    @mock_dynamodb2
+    def test_participant_directory(self):
+        from pointing_poker.aws.repositories import sessions
+
+        table = create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        first_id, first = session_factory()
+        second_id, second = session_factory()
+
+        repo.create(first, record_expiration=0)
+        repo.create(second, record_expiration=0)
+
+        participant = {"id": str(uuid4()), "name": "John", "isModerator": False}
+
+        repo.add_participant(first_id, participant, record_expiration=0)
+        repo.add_participant(second_id, participant, record_expiration=0)
+
+        self.assertEqual(
+            repo.get_participant(participant["id"]),
+            {**participant, "vote": None, "sessionID": second_id},
+        )
+
+        repo.remove_participant(first_id, participant["id"])
+
+        self.assertEqual(
+            repo.get_participant_sessions([participant["id"], "bogus"]),
+            {participant["id"]: second_id},
+        )
+
+        repo.remove_participant(second_id, participant["id"])
+
+        self.assertIsNone(repo.get_participant(participant["id"]))
+        self.assertNotIn(
+            "Item",
+            table.get_item(
+                Key={
+                    "sessionID": f"participant#{participant['id']}",
+                    "id": f"participant#{participant['id']}",
+                }
+            ),
+        )
+
+    @mock_dynamodb2
+    def test_delete_session_clears_the_directory(self):
+        from pointing_poker.aws.repositories import sessions
+
+        create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+        other_id, other = session_factory()
+
+        repo.create(session, record_expiration=0)
+        repo.create(other, record_expiration=0)
+
+        participant_ids = [str(uuid4()) for _ in range(30)]
+
+        for participant_id in participant_ids:
+            repo.add_participant(
+                session_id,
+                {"id": participant_id, "name": "John", "isModerator": False},
+                record_expiration=0,
+            )
+
+        moved = {"id": participant_ids[0], "name": "John", "isModerator": False}
+        repo.add_participant(other_id, moved, record_expiration=0)
+
+        repo.delete_session(session_id, version=30, participant_ids=participant_ids)
+
+        self.assertIsNone(repo.get(session_id))
+        self.assertEqual(
+            repo.get_participant_sessions(participant_ids), {moved["id"]: other_id}
+        )
+
+    @mock_dynamodb2
+    def test_delete_session_with_participants_conflicts(self):
+        from pointing_poker.aws.repositories import sessions
+        from pointing_poker.repositories.errors import ConflictError
+
+        create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create(session, record_expiration=0)
+
+        participant = {"id": str(uuid4()), "name": "John", "isModerator": False}
+        repo.add_participant(session_id, participant, record_expiration=0)
+
+        with self.assertRaises(ConflictError):
+            repo.delete_session(
+                session_id, version=0, participant_ids=[participant["id"]]
+            )
+
+        self.assertEqual(
+            repo.get_participant_sessions([participant["id"]]),
+            {participant["id"]: session_id},
+        )
+
+    @mock_dynamodb2
+    def test_delete_participants(self):
+        from pointing_poker.aws.repositories import sessions
+
+        table = create_sessions_table(boto3.resource("dynamodb"))
+
+        repo = sessions.SessionsDynamoDBRepo()
+
+        session_id, session = session_factory()
+
+        repo.create(session, record_expiration=0)
+
+        for _ in range(60):
+            repo.add_participant(
+                session_id,
+                {"id": str(uuid4()), "name": "John", "isModerator": False},
+                record_expiration=0,
+            )
+
+        with patch.object(sessions, "MAX_BATCH_WRITE_ITEMS", 7):
+            self.assertEqual(repo.delete_participants(session_id, concurrency=1), 60)
+
+        items = table.query(KeyConditionExpression=Key("sessionID").eq(session_id))
+
+        self.assertEqual([item["id"] for item in items["Items"]], [session_id])
+        self.assertEqual(repo.delete_participants(session_id), 0)
+
+    def test_delete_participants_retries_unprocessed_items(self):
+        from pointing_poker.aws.repositories import sessions
+        from pointing_poker.aws.repositories.retries import RetryingExecutor
+
+        sleep = Mock()
+
+        repo = sessions.SessionsDynamoDBRepo(
+            RetryingExecutor(max_attempts=3, sleep=sleep, random=lambda: 1)
+        )
+        repo.table = Mock()
+        repo.table.name = "sessions"
+        repo.table.query.return_value = {"Items": [{"id": "first"}, {"id": "second"}]}
+
+        unprocessed = {
+            "sessions": [{"DeleteRequest": {"Key": {"sessionID": "s", "id": "first"}}}]
+        }
+
+        client = repo.table.meta.client
+        client.batch_write_item.side_effect = [
+            {"UnprocessedItems": unprocessed},
+            {"UnprocessedItems": {}},
+        ]
+
+        self.assertEqual(repo.delete_participants("s", concurrency=1), 2)
+
+        sleep.assert_called_once_with(repo.executor.base_delay)
+        client.batch_write_item.assert_called_with(RequestItems=unprocessed)
+
+        client.batch_write_item.side_effect = None
+        client.batch_write_item.return_value = {"UnprocessedItems": unprocessed}
+
+        with self.assertRaises(Exception) as context:
+            repo.delete_participants("s", concurrency=1)
+
+        self.assertEqual(str(context.exception), "failed to write items")
+        self.assertEqual(repo.executor.retries["UnprocessedItems"], 3)
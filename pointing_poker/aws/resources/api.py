@@ -1,14 +1,23 @@
 from time import time
+from typing import List, Optional
 
 from aws_cdk.aws_appsync import CfnApiKey, GraphQLApi
 from aws_cdk.core import Construct
 from aws_cdk.aws_iam import Policy
-from aws_cdk.aws_lambda import Code
+from aws_cdk.aws_lambda import Code, ILayerVersion
 
-from pointing_poker.aws.resources.data_source import lambda_data_source
+from pointing_poker.aws.resources.data_source import (
+    lambda_data_source,
+    router_data_source,
+)
 
 
 def graphql_api(scope: Construct, res_id: str, schema_path: str, **kwargs):
+    """Creates the API, authorized with its API key.
+
+    IAM is an additional authorization mode, for the fields and types the
+    schema marks @aws_iam.
+    """
     api = GraphQLApi(
         scope,
         res_id,
@@ -17,18 +26,106 @@ def graphql_api(scope: Construct, res_id: str, schema_path: str, **kwargs):
         **kwargs
     )
 
+    api.node.default_child.add_property_override(
+        "AdditionalAuthenticationProviders", [{"AuthenticationType": "AWS_IAM"}]
+    )
+
     return api
 
 
+FIELDS = [
+    ("create_session", "createSession", "Mutation"),
+    ("join_session", "joinSession", "Mutation"),
+    ("leave_session", "leaveSession", "Mutation"),
+    ("session", "session", "Query"),
+    ("participant", "participant", "Query"),
+    ("set_vote", "setVote", "Mutation"),
+    ("start_voting", "startVoting", "Mutation"),
+    ("set_reviewing_issue", "setReviewingIssue", "Mutation"),
+    ("stop_voting", "stopVoting", "Mutation"),
+    ("close_session", "closeSession", "Mutation"),
+    ("join_session_delta", "joinSessionDelta", "Mutation"),
+    ("leave_session_delta", "leaveSessionDelta", "Mutation"),
+    ("set_vote_delta", "setVoteDelta", "Mutation"),
+    ("start_voting_delta", "startVotingDelta", "Mutation"),
+    ("set_reviewing_issue_delta", "setReviewingIssueDelta", "Mutation"),
+    ("stop_voting_delta", "stopVotingDelta", "Mutation"),
+    ("close_session_delta", "closeSessionDelta", "Mutation"),
+]
+
+BATCH_FIELDS = [
+    ("participant_current_session", "currentSession", "Participant"),
+]
+
+
 def pointing_poker_sources(
-    scope: Construct, api: GraphQLApi, policy: Policy, asset_dir: str, table_name: str
+    scope: Construct,
+    api: GraphQLApi,
+    policy: Policy,
+    asset_dir: str,
+    table_name: str,
+    router: bool = False,
+    provisioned_concurrency: Optional[int] = None,
+    max_batch_size: int = 10,
+    layers: Optional[List[ILayerVersion]] = None,
+    repo_metrics: bool = False,
+    rounds_queue_url: Optional[str] = None,
+    async_service: bool = False,
+    parallel_repo_calls: bool = False,
+    schema_responses: bool = False,
+    dynamodb_client: bool = False,
+    sessions_cache_ttl: Optional[float] = None,
 ):
     lambda_env = {"SESSIONS_TABLE_NAME": table_name}
 
+    if repo_metrics:
+        lambda_env["REPO_METRICS"] = "true"
+
+    if async_service:
+        lambda_env["ASYNC_SERVICE"] = "true"
+
+    if parallel_repo_calls:
+        lambda_env["PARALLEL_REPO_CALLS"] = "true"
+
+    if schema_responses:
+        lambda_env["SCHEMA_RESPONSES"] = "true"
+
+    if dynamodb_client:
+        lambda_env["DYNAMODB_CLIENT"] = "true"
+
+    if sessions_cache_ttl:
+        lambda_env["SESSIONS_CACHE_TTL"] = str(sessions_cache_ttl)
+
+    if rounds_queue_url is not None:
+        lambda_env["ROUNDS_QUEUE_URL"] = rounds_queue_url
+
     code: Code = Code.from_asset(asset_dir)
 
-    return list(
-        map(
+    if router:
+        return [
+            router_data_source(
+                scope,
+                [
+                    *[
+                        (field_name, type_name, None)
+                        for _, field_name, type_name in FIELDS
+                    ],
+                    *[
+                        (field_name, type_name, max_batch_size)
+                        for _, field_name, type_name in BATCH_FIELDS
+                    ],
+                ],
+                api,
+                code,
+                policy,
+                lambda_env,
+                provisioned_concurrency,
+                layers,
+            )
+        ]
+
+    return [
+        *map(
             lambda field_definition: lambda_data_source(
                 scope,
                 field_definition[0],
@@ -38,18 +135,23 @@ def pointing_poker_sources(
                 code,
                 policy,
                 lambda_env,
+                layers=layers,
             ),
-            [
-                ("create_session", "createSession", "Mutation"),
-                ("join_session", "joinSession", "Mutation"),
-                ("leave_session", "leaveSession", "Mutation"),
-                ("session", "session", "Query"),
-                ("participant", "participant", "Query"),
-                ("set_vote", "setVote", "Mutation"),
-                ("start_voting", "startVoting", "Mutation"),
-                ("set_reviewing_issue", "setReviewingIssue", "Mutation"),
-                ("stop_voting", "stopVoting", "Mutation"),
-                ("close_session", "closeSession", "Mutation"),
-            ],
-        )
-    )
+            FIELDS,
+        ),
+        *map(
+            lambda field_definition: lambda_data_source(
+                scope,
+                field_definition[0],
+                field_definition[1],
+                field_definition[2],
+                api,
+                code,
+                policy,
+                lambda_env,
+                max_batch_size,
+                layers,
+            ),
+            BATCH_FIELDS,
+        ),
+    ]
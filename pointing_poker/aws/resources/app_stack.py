@@ -1,9 +1,13 @@
+from typing import List, Optional
+
 from aws_cdk.core import Construct, Stack
 from aws_cdk.aws_dynamodb import Table
 from aws_cdk.aws_iam import Policy, PolicyStatement
+from aws_cdk.aws_lambda import Code, ILayerVersion, LayerVersion, Runtime
 
 from pointing_poker.aws.resources.sessions_table import session_table
 from pointing_poker.aws.resources.api import graphql_api, pointing_poker_sources
+from pointing_poker.aws.resources.rounds import round_deadlines_consumer, rounds_queue
 
 
 class AppStack(Stack):
@@ -13,6 +17,7 @@ class AppStack(Stack):
         res_id: str,
         asset_dir: str,
         graph_schema_path: str,
+        layer_asset: Optional[str] = None,
         **kwargs,
     ) -> None:
         super().__init__(scope, res_id, **kwargs)
@@ -23,6 +28,8 @@ class AppStack(Stack):
             self, "pointing-poker-graphql-api", graph_schema_path, **kwargs,
         )
 
+        self.rounds_queue = rounds_queue(self, "rounds-queue")
+
         self.policy: Policy = Policy(
             self,
             "dynamodb-access-policy",
@@ -34,10 +41,58 @@ class AppStack(Stack):
                         self.table.table_arn,
                         f"{self.table.table_arn}/index/id-index",
                     ],
-                )
+                ),
+                PolicyStatement(
+                    actions=["sqs:SendMessage"],
+                    resources=[self.rounds_queue.queue_arn],
+                ),
             ],
         )
 
+        layers: List[ILayerVersion] = []
+
+        if layer_asset is not None:
+            layers.append(
+                LayerVersion(
+                    self,
+                    "dependencies-layer",
+                    code=Code.from_asset(layer_asset),
+                    compatible_runtimes=[Runtime("python3.7")],
+                )
+            )
+
+        provisioned_concurrency = self.node.try_get_context(
+            "router_provisioned_concurrency"
+        )
+
+        sessions_cache_ttl = self.node.try_get_context("sessions_cache_ttl")
+
         self.sources = pointing_poker_sources(
-            self, self.api, self.policy, asset_dir, self.table.table_name
+            self,
+            self.api,
+            self.policy,
+            asset_dir,
+            self.table.table_name,
+            router=self.node.try_get_context("lambda_topology") == "router",
+            provisioned_concurrency=int(provisioned_concurrency)
+            if provisioned_concurrency
+            else None,
+            max_batch_size=int(self.node.try_get_context("max_batch_size") or 10),
+            layers=layers,
+            repo_metrics=self.node.try_get_context("repo_metrics") in (True, "true"),
+            rounds_queue_url=self.rounds_queue.queue_url,
+            async_service=self.node.try_get_context("async_service") in (True, "true"),
+            parallel_repo_calls=self.node.try_get_context("parallel_repo_calls")
+            in (True, "true"),
+            schema_responses=self.node.try_get_context("schema_responses")
+            in (True, "true"),
+            dynamodb_client=self.node.try_get_context("dynamodb_client")
+            in (True, "true"),
+            sessions_cache_ttl=float(sessions_cache_ttl)
+            if sessions_cache_ttl
+            else None,
+        )
+
+        self.round_deadlines = round_deadlines_consumer(
+            self, self.api, self.rounds_queue, self.policy, asset_dir, layers
         )
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 from aws_cdk.core import Construct, Stack
 from aws_cdk.aws_appsync import (
@@ -9,41 +9,98 @@ from aws_cdk.aws_appsync import (
 )
 
 from aws_cdk.aws_iam import Policy
-from aws_cdk.aws_lambda import Code, Function, Runtime
+from aws_cdk.aws_lambda import (
+    Alias,
+    Code,
+    Function,
+    IFunction,
+    ILayerVersion,
+    Runtime,
+)
 
+# Controllers read the field arguments from the top level of the event; the
+# selection is forwarded under "info" so reads can be narrowed to it.
+REQUEST_TEMPLATE = """
+#set($payload = {})
+$util.qr($payload.putAll($util.defaultIfNull($context.arguments, {})))
+$util.qr($payload.put("info", {
+  "fieldName": $context.info.fieldName,
+  "parentTypeName": $context.info.parentTypeName,
+  "variables": $context.info.variables,
+  "selectionSetList": $context.info.selectionSetList,
+  "selectionSetGraphQL": $context.info.selectionSetGraphQL
+}))
+{
+  "version": "2017-02-28",
+  "operation": "Invoke",
+  "payload": $util.toJson($payload)
+}
+"""
 
-def lambda_data_source(
+# Batched resolvers get one payload per parent object; AppSync groups up to
+# the resolver's MaxBatchSize of them into a single invocation.
+BATCH_REQUEST_TEMPLATE = """
+#set($payload = {})
+$util.qr($payload.putAll($util.defaultIfNull($context.arguments, {})))
+$util.qr($payload.put("source", $context.source))
+$util.qr($payload.put("info", {
+  "fieldName": $context.info.fieldName,
+  "parentTypeName": $context.info.parentTypeName,
+  "variables": $context.info.variables,
+  "selectionSetList": $context.info.selectionSetList,
+  "selectionSetGraphQL": $context.info.selectionSetGraphQL
+}))
+{
+  "version": "2018-05-29",
+  "operation": "BatchInvoke",
+  "payload": $util.toJson($payload)
+}
+"""
+
+
+def lambda_function(
     scope: Construct,
+    res_id: str,
     handler: str,
-    field_name: str,
-    type_name: str,
-    api: GraphQLApi,
     code: Code,
     policy: Policy,
     environment: Dict[str, str],
-) -> (Function, LambdaDataSource, Resolver):
-    request_mapping: MappingTemplate = MappingTemplate.lambda_request(
-        payload="$util.toJson($context.arguments)"
-    )
-
-    response_mapping: MappingTemplate = MappingTemplate.lambda_result()
-
+    layers: Optional[List[ILayerVersion]] = None,
+) -> Function:
     function: Function = Function(
         scope,
-        f"{field_name}Lambda",
+        res_id,
         code=code,
         runtime=Runtime("python3.7"),
         environment=environment,
-        handler=f"pointing_poker.aws.controllers.sessions.{handler}",
+        handler=handler,
+        layers=layers,
     )
 
     policy.attach_to_role(function.role)
 
-    source = api.add_lambda_data_source(f"{field_name}Source", "", function)
+    return function
+
+
+def lambda_resolver(
+    scope: Construct,
+    api: GraphQLApi,
+    source: LambdaDataSource,
+    field_name: str,
+    type_name: str,
+    max_batch_size: Optional[int] = None,
+) -> Resolver:
+    request_mapping: MappingTemplate = MappingTemplate.from_string(
+        BATCH_REQUEST_TEMPLATE if max_batch_size else REQUEST_TEMPLATE
+    )
+
+    response_mapping: MappingTemplate = MappingTemplate.lambda_result()
 
     resolver = Resolver(
         scope,
-        f"{field_name}Resolver",
+        f"{type_name}{field_name}Resolver"
+        if type_name not in ("Query", "Mutation")
+        else f"{field_name}Resolver",
         api=api,
         data_source=source,
         field_name=field_name,
@@ -52,4 +109,97 @@ def lambda_data_source(
         response_mapping_template=response_mapping,
     )
 
+    if max_batch_size:
+        resolver.node.default_child.add_property_override(
+            "MaxBatchSize", max_batch_size
+        )
+
+    return resolver
+
+
+def lambda_data_source(
+    scope: Construct,
+    handler: str,
+    field_name: str,
+    type_name: str,
+    api: GraphQLApi,
+    code: Code,
+    policy: Policy,
+    environment: Dict[str, str],
+    max_batch_size: Optional[int] = None,
+    layers: Optional[List[ILayerVersion]] = None,
+) -> (Function, LambdaDataSource, Resolver):
+    """Resolves one field with its own Lambda.
+
+    A max_batch_size turns the resolver into a BatchInvoke one, so the
+    handler receives a list of events.
+    """
+    res_id = (
+        f"{type_name}{field_name}"
+        if type_name not in ("Query", "Mutation")
+        else field_name
+    )
+
+    function = lambda_function(
+        scope,
+        f"{res_id}Lambda",
+        f"pointing_poker.aws.controllers.sessions.{handler}",
+        code,
+        policy,
+        environment,
+        layers,
+    )
+
+    source = api.add_lambda_data_source(f"{res_id}Source", "", function)
+
+    resolver = lambda_resolver(
+        scope, api, source, field_name, type_name, max_batch_size
+    )
+
     return function, source, resolver
+
+
+def router_data_source(
+    scope: Construct,
+    fields: List[Tuple[str, str, Optional[int]]],
+    api: GraphQLApi,
+    code: Code,
+    policy: Policy,
+    environment: Dict[str, str],
+    provisioned_concurrency: Optional[int] = None,
+    layers: Optional[List[ILayerVersion]] = None,
+) -> (Function, LambdaDataSource, List[Resolver]):
+    """Resolves every (field_name, type_name, max_batch_size) with one Lambda.
+
+    With provisioned_concurrency the data source targets a "live" alias
+    keeping that many environments warm for all operations together.
+    """
+    function = lambda_function(
+        scope,
+        "routerLambda",
+        "pointing_poker.aws.controllers.router.handler",
+        code,
+        policy,
+        environment,
+        layers,
+    )
+
+    target: IFunction = function
+
+    if provisioned_concurrency:
+        target = Alias(
+            scope,
+            "routerLambdaLive",
+            alias_name="live",
+            version=function.current_version,
+            provisioned_concurrent_executions=provisioned_concurrency,
+        )
+
+    source = api.add_lambda_data_source("routerSource", "", target)
+
+    resolvers = [
+        lambda_resolver(scope, api, source, field_name, type_name, max_batch_size)
+        for field_name, type_name, max_batch_size in fields
+    ]
+
+    return function, source, resolvers
@@ -0,0 +1,175 @@
+from compileall import compile_dir
+from os import environ, makedirs, path, remove, walk
+from py_compile import PycInvalidationMode
+from shutil import copyfile, rmtree
+from subprocess import run
+from sys import executable, version_info
+from tempfile import mkdtemp
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+RUNTIME_VERSION = (3, 7)
+
+STRIPPED_DIRS = {"__pycache__", "tests", "test"}
+
+STRIPPED_SUFFIXES = (".dist-info", ".egg-info")
+
+
+def _all_file_paths(directory):
+    return sorted(
+        path.join(root, filename)
+        for root, dirs, files in walk(directory)
+        for filename in files
+    )
+
+
+def install_requirements(requirements_path, target):
+    """Installs runtime dependencies into target.
+
+    boto3 and botocore are provided by the Lambda runtime and are not part
+    of the runtime requirements file.
+    """
+    run(
+        [
+            executable,
+            "-m",
+            "pip",
+            "install",
+            "--quiet",
+            "--no-compile",
+            "--target",
+            target,
+            "-r",
+            requirements_path,
+        ],
+        check=True,
+    )
+
+
+def strip_tree(directory, extra_dirs=()):
+    """Removes bytecode caches, tests and packaging metadata from directory."""
+    stripped_dirs = STRIPPED_DIRS.union(extra_dirs)
+
+    for root, dirs, files in walk(directory, topdown=True):
+        for name in list(dirs):
+            if name in stripped_dirs or name.endswith(STRIPPED_SUFFIXES):
+                rmtree(path.join(root, name))
+                dirs.remove(name)
+
+        for name in files:
+            if name.endswith((".pyc", ".pyo")) or (
+                name.startswith("test_") and name.endswith(".py")
+            ):
+                remove(path.join(root, name))
+
+
+def compile_tree(directory):
+    """Pre-compiles bytecode when building with the runtime's Python version.
+
+    Hash-based pycs are used because Lambda does not preserve source
+    modification times. Returns whether bytecode was written.
+    """
+    if version_info[:2] != RUNTIME_VERSION:
+        return False
+
+    return bool(
+        compile_dir(
+            directory, quiet=1, invalidation_mode=PycInvalidationMode.UNCHECKED_HASH,
+        )
+    )
+
+
+def zip_tree(directory, zip_path, prefix=""):
+    """Zips directory with fixed timestamps so unchanged builds hash the same."""
+    with ZipFile(zip_path, "w", compression=ZIP_DEFLATED) as archive:
+        for file_path in _all_file_paths(directory):
+            info = ZipInfo(
+                path.join(prefix, path.relpath(file_path, directory)),
+                date_time=(1980, 1, 1, 0, 0, 0),
+            )
+            info.external_attr = 0o644 << 16
+            info.compress_type = ZIP_DEFLATED
+
+            with open(file_path, "rb") as source:
+                archive.writestr(info, source.read())
+
+    return zip_path
+
+
+def copy_tree(source_dir, target_dir):
+    for file_path in _all_file_paths(source_dir):
+        destination = path.join(target_dir, path.relpath(file_path, source_dir))
+
+        makedirs(path.dirname(destination), exist_ok=True)
+
+        copyfile(file_path, destination)
+
+
+def measure_import(directories, module):
+    """Returns the seconds a fresh interpreter takes to import module."""
+    result = run(
+        [
+            executable,
+            "-c",
+            "from time import perf_counter; start = perf_counter(); "
+            f"import {module}; print(perf_counter() - start)",
+        ],
+        check=True,
+        capture_output=True,
+        env={
+            **environ,
+            "PYTHONPATH": ":".join(directories),
+            "SESSIONS_TABLE_NAME": "sessions",
+        },
+        text=True,
+    )
+
+    return float(result.stdout.strip())
+
+
+def build_artifacts(root_dir, output_dir, use_layer=False):
+    """Builds the function artifact and, with use_layer, a dependencies layer.
+
+    Returns the artifact paths together with their sizes and the import
+    time of the controllers, to track cold start regressions per build.
+    """
+    function_dir = mkdtemp("function", dir=output_dir)
+    dependencies_dir = mkdtemp("dependencies", dir=output_dir)
+
+    copy_tree(
+        path.join(root_dir, "pointing_poker"), path.join(function_dir, "pointing_poker")
+    )
+    copyfile(
+        path.join(root_dir, "schema.graphql"),
+        path.join(function_dir, "pointing_poker", "schema.graphql"),
+    )
+
+    install_requirements(
+        path.join(root_dir, "pointing_poker/aws/runtime-requirements.txt"),
+        dependencies_dir,
+    )
+
+    strip_tree(function_dir, extra_dirs={"resources"})
+    strip_tree(dependencies_dir)
+
+    for directory in (function_dir, dependencies_dir):
+        compile_tree(directory)
+
+    report = {"compiled": version_info[:2] == RUNTIME_VERSION}
+
+    if use_layer:
+        layer_zip = zip_tree(
+            dependencies_dir, path.join(output_dir, "layer.zip"), prefix="python"
+        )
+
+        report["layer"] = {"path": layer_zip, "bytes": path.getsize(layer_zip)}
+    else:
+        copy_tree(dependencies_dir, function_dir)
+
+    function_zip = zip_tree(function_dir, path.join(output_dir, "function.zip"))
+
+    report["function"] = {"path": function_zip, "bytes": path.getsize(function_zip)}
+    report["importSeconds"] = measure_import(
+        [function_dir, dependencies_dir], "pointing_poker.aws.controllers.sessions"
+    )
+
+    return report
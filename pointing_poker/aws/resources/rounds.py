@@ -0,0 +1,97 @@
+from typing import List, Optional
+
+from aws_cdk.core import Construct, Duration
+from aws_cdk.aws_appsync import GraphQLApi, MappingTemplate
+from aws_cdk.aws_iam import Policy, PolicyStatement
+from aws_cdk.aws_lambda import Code, Function, ILayerVersion
+from aws_cdk.aws_lambda_event_sources import SqsEventSource
+from aws_cdk.aws_sqs import DeadLetterQueue, Queue
+
+from pointing_poker.aws.resources.data_source import lambda_function
+
+# publishSessionDelta resolves to its own argument without touching a data
+# source, which is enough for AppSync to push it to subscribers.
+PUBLISH_REQUEST_TEMPLATE = """
+{
+  "version": "2017-02-28",
+  "payload": $util.toJson($context.arguments.delta)
+}
+"""
+
+PUBLISH_RESPONSE_TEMPLATE = "$util.toJson($context.result)"
+
+
+# Deadline messages the consumer failed on this many times are set aside.
+MAX_RECEIVE_COUNT = 5
+
+
+def rounds_queue(scope: Construct, res_id: str) -> Queue:
+    """Creates the queue of round deadlines, with a dead-letter queue.
+
+    A message that keeps failing, say for a round the API cannot stop, goes
+    to the dead-letter queue after MAX_RECEIVE_COUNT receives instead of
+    being retried until it expires.
+    """
+    return Queue(
+        scope,
+        res_id,
+        visibility_timeout=Duration.seconds(60),
+        dead_letter_queue=DeadLetterQueue(
+            max_receive_count=MAX_RECEIVE_COUNT,
+            queue=Queue(
+                scope, f"{res_id}-dead-letters", retention_period=Duration.days(14),
+            ),
+        ),
+    )
+
+
+def round_deadlines_consumer(
+    scope: Construct,
+    api: GraphQLApi,
+    queue: Queue,
+    policy: Policy,
+    asset_dir: str,
+    layers: Optional[List[ILayerVersion]] = None,
+) -> Function:
+    """Ends timed rounds as their deadline messages arrive on queue.
+
+    Rounds are stopped through the stopVoting mutation, so subscribers are
+    notified like when a moderator stops them, and the delta is published
+    through publishSessionDelta for sessionDeltas subscribers. The
+    function's role is only allowed those two mutations and signs its
+    requests, so no API key is handed to it.
+    """
+    api.add_none_data_source(
+        "publishSessionDelta", "Publishes session deltas to subscribers"
+    ).create_resolver(
+        type_name="Mutation",
+        field_name="publishSessionDelta",
+        request_mapping_template=MappingTemplate.from_string(PUBLISH_REQUEST_TEMPLATE),
+        response_mapping_template=MappingTemplate.from_string(
+            PUBLISH_RESPONSE_TEMPLATE
+        ),
+    )
+
+    function = lambda_function(
+        scope,
+        "roundDeadlinesLambda",
+        "pointing_poker.aws.controllers.rounds.round_deadlines",
+        Code.from_asset(asset_dir),
+        policy,
+        {"ROUNDS_QUEUE_URL": queue.queue_url, "APPSYNC_URL": api.graph_ql_url,},
+        layers,
+    )
+
+    function.add_to_role_policy(
+        PolicyStatement(
+            actions=["appsync:GraphQL"],
+            resources=[
+                f"{api.arn}/types/Mutation/fields/stopVoting",
+                f"{api.arn}/types/Mutation/fields/publishSessionDelta",
+            ],
+        )
+    )
+
+    function.add_event_source(SqsEventSource(queue))
+
+    return function
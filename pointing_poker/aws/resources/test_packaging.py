@@ -0,0 +1,55 @@
+from os import makedirs, path, walk
+from tempfile import mkdtemp
+from zipfile import ZipFile
+
+import unittest
+
+from pointing_poker.aws.resources.packaging import strip_tree, zip_tree
+
+
+def touch(root, name):
+    file_path = path.join(root, name)
+
+    makedirs(path.dirname(file_path), exist_ok=True)
+
+    with open(file_path, "w") as file:
+        file.write("")
+
+
+class PackagingTestCase(unittest.TestCase):
+    def test_strip_tree(self):
+        root = mkdtemp()
+
+        for name in [
+            "pkg/__init__.py",
+            "pkg/module.py",
+            "pkg/test_module.py",
+            "pkg/__pycache__/module.cpython-37.pyc",
+            "pkg/tests/test_other.py",
+            "pkg/resources/stack.py",
+            "pkg-1.0.dist-info/METADATA",
+        ]:
+            touch(root, name)
+
+        strip_tree(root, extra_dirs={"resources"})
+
+        remaining = sorted(
+            path.relpath(path.join(directory, name), root)
+            for directory, _, files in walk(root)
+            for name in files
+        )
+
+        self.assertEqual(remaining, ["pkg/__init__.py", "pkg/module.py"])
+
+    def test_zip_tree_is_reproducible(self):
+        root = mkdtemp()
+
+        touch(root, "pkg/__init__.py")
+
+        first = zip_tree(root, path.join(mkdtemp(), "first.zip"), prefix="python")
+        second = zip_tree(root, path.join(mkdtemp(), "second.zip"), prefix="python")
+
+        with open(first, "rb") as a, open(second, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+
+        self.assertEqual(ZipFile(first).namelist(), ["python/pkg/__init__.py"])
@@ -0,0 +1,42 @@
+from json import dumps
+from math import ceil
+from os import environ
+from time import time
+
+from boto3 import client
+
+# SQS delays a message by at most 15 minutes.
+MAX_DELAY_SECONDS = 900
+
+
+def delay_seconds(deadline, now=None):
+    """Returns how long to delay a message for deadline, up to what SQS allows."""
+    remaining = deadline - (time() if now is None else now)
+
+    return max(0, min(MAX_DELAY_SECONDS, ceil(remaining)))
+
+
+class RoundsSQSScheduler:
+    """Schedules the end of timed rounds as delayed SQS messages.
+
+    Each message carries the session, round and deadline. Rounds lasting
+    longer than an SQS delay arrive early; the consumer schedules them again
+    until their deadline passes.
+    """
+
+    def __init__(self, queue_url=None):
+        self.queue_url = environ["ROUNDS_QUEUE_URL"] if queue_url is None else queue_url
+        self.sqs = client("sqs")
+
+    def schedule(self, session_id, voting_round, deadline):
+        self.sqs.send_message(
+            QueueUrl=self.queue_url,
+            MessageBody=dumps(
+                {
+                    "sessionID": session_id,
+                    "votingRound": voting_round,
+                    "deadline": deadline,
+                }
+            ),
+            DelaySeconds=delay_seconds(deadline),
+        )
@@ -0,0 +1,33 @@
+import unittest
+from json import loads
+from unittest.mock import Mock, patch
+
+from pointing_poker.aws.schedulers import rounds
+from pointing_poker.aws.schedulers.rounds import (
+    MAX_DELAY_SECONDS,
+    RoundsSQSScheduler,
+    delay_seconds,
+)
+
+
+class RoundsSQSSchedulerTestCase(unittest.TestCase):
+    def test_delay_seconds(self):
+        self.assertEqual(delay_seconds(130, now=100.5), 30)
+        self.assertEqual(delay_seconds(100, now=200), 0)
+        self.assertEqual(delay_seconds(5000, now=0), MAX_DELAY_SECONDS)
+
+    def test_schedule(self):
+        scheduler = RoundsSQSScheduler("https://sqs.example.com/rounds")
+        scheduler.sqs = Mock()
+
+        with patch.object(rounds, "time", return_value=1000):
+            scheduler.schedule("session", 3, 1030)
+
+        kwargs = scheduler.sqs.send_message.call_args[1]
+
+        self.assertEqual(kwargs["QueueUrl"], "https://sqs.example.com/rounds")
+        self.assertEqual(kwargs["DelaySeconds"], 30)
+        self.assertEqual(
+            loads(kwargs["MessageBody"]),
+            {"sessionID": "session", "votingRound": 3, "deadline": 1030},
+        )
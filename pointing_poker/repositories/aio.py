@@ -0,0 +1,35 @@
+from asyncio import get_running_loop
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class AsyncSessionsRepo:
+    """Asyncio interface to a sessions repository.
+
+    Every public method of repo becomes a coroutine running the call on
+    executor, or else on a thread pool of max_concurrency workers; the pool
+    bounds the calls in flight across every event loop using it. It is kept
+    for the lifetime of the instance, so warm Lambda invocations reuse its
+    threads.
+    """
+
+    def __init__(self, repo, max_concurrency=8, executor=None):
+        self.repo = repo
+        self.executor = (
+            ThreadPoolExecutor(max_workers=max_concurrency)
+            if executor is None
+            else executor
+        )
+
+    def __getattr__(self, name):
+        attribute = getattr(self.repo, name)
+
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        async def call(*args, **kwargs):
+            return await get_running_loop().run_in_executor(
+                self.executor, partial(attribute, *args, **kwargs)
+            )
+
+        return call
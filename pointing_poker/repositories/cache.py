@@ -0,0 +1,333 @@
+from collections import OrderedDict
+from copy import deepcopy
+from pickle import dumps, loads
+from threading import Lock
+from time import monotonic
+
+
+class LocalSharedCache:
+    """In-process stand-in for a Redis-compatible shared cache.
+
+    Implements the part of the redis-py client used by CachingSessionsRepo,
+    so a redis.Redis instance can be passed in its place.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self._values.get(key, (None, None))
+
+            if expires_at is not None and expires_at <= monotonic():
+                del self._values[key]
+                return None
+
+            return value
+
+    def set(self, key, value, px=None):
+        with self._lock:
+            self._values[key] = (
+                value,
+                None if px is None else monotonic() + px / 1000,
+            )
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+
+class CachingSessionsRepo:
+    """Read-through session cache in front of a sessions repository.
+
+    Session reads are served from a bounded in-process LRU whose entries
+    expire after ttl seconds, then from the optional shared tier, and only
+    then from the wrapped repository. Every write drops the affected session
+    from both tiers. Entries held by other processes are only refreshed once
+    their ttl runs out; an expired local entry whose session is still at the
+    cached version is renewed after reading just the version instead of the
+    whole session.
+
+    get_session, which mutations validate against, always reads the wrapped
+    repository: a copy up to ttl old could miss a participant who just
+    joined through another process, or a round that just started.
+    """
+
+    def __init__(self, repo, max_sessions=128, ttl=1.0, shared=None):
+        self.repo = repo
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.shared = shared
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+        self._sessions = OrderedDict()
+        self._generations = {}
+        self._lock = Lock()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "sharedHits": self.shared_hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "size": len(self._sessions),
+        }
+
+    def invalidate(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._generations[session_id] = self._generations.get(session_id, 0) + 1
+
+        if self.shared is not None:
+            self.shared.delete(_shared_key(session_id))
+
+    def _lookup(self, session_id):
+        """Returns the cached session, if any, and whether it is still fresh."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+
+            if entry is None:
+                return None, False
+
+            session, expires_at = entry
+
+            if expires_at <= monotonic():
+                return session, False
+
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+
+            return session, True
+
+    def _revalidate(self, session_id, session, generation):
+        """Renews an expired entry if its session has not moved since."""
+        if "version" in session and (
+            self.repo.get_version(session_id) == session["version"]
+        ):
+            with self._lock:
+                self.revalidations += 1
+
+            self._store(session_id, session, generation)
+
+            return True
+
+        with self._lock:
+            if self._generations.get(session_id, 0) == generation:
+                self._sessions.pop(session_id, None)
+
+        return False
+
+    def _store(self, session_id, session, generation):
+        with self._lock:
+            if self._generations.get(session_id, 0) != generation:
+                return
+
+            self._sessions[session_id] = (session, monotonic() + self.ttl)
+            self._sessions.move_to_end(session_id)
+
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def get(self, session_id, fields=None, after=None, first=None):
+        """Reads a session; projected reads are served from the full session.
+
+        Resolvers only return the fields they were asked for, so the cached
+        session answers any selection of fields. Pages of participants are
+        read from the wrapped repository.
+        """
+        if after is not None or first is not None:
+            return self.repo.get(session_id, fields=fields, after=after, first=first)
+
+        session, fresh = self._lookup(session_id)
+
+        if fresh:
+            return deepcopy(session)
+
+        with self._lock:
+            generation = self._generations.get(session_id, 0)
+
+        if session is not None and self._revalidate(session_id, session, generation):
+            return deepcopy(session)
+
+        if self.shared is not None:
+            value = self.shared.get(_shared_key(session_id))
+
+            if value is not None:
+                session = loads(value)
+
+                with self._lock:
+                    self.shared_hits += 1
+
+                self._store(session_id, session, generation)
+
+                return deepcopy(session)
+
+        with self._lock:
+            self.misses += 1
+
+        session = self.repo.get(session_id)
+
+        if session is None:
+            return None
+
+        self._store(session_id, deepcopy(session), generation)
+
+        if self.shared is not None:
+            self.shared.set(
+                _shared_key(session_id), dumps(session), px=int(self.ttl * 1000)
+            )
+
+        return session
+
+    def get_session(self, session_id):
+        return self.repo.get_session(session_id)
+
+    def get_participant_in_session(self, session_id, participant_id):
+        return self.repo.get_participant_in_session(session_id, participant_id)
+
+    def get_participant(self, user_id):
+        return self.repo.get_participant(user_id)
+
+    def get_participant_sessions(self, participant_ids):
+        return self.repo.get_participant_sessions(participant_ids)
+
+    def get_version(self, session_id, consistent=False):
+        return self.repo.get_version(session_id, consistent=consistent)
+
+    def create(self, session, record_expiration):
+        try:
+            return self.repo.create(session, record_expiration)
+        finally:
+            self.invalidate(session["id"])
+
+    def set_reviewing_issue(self, session_id, issue, version=None):
+        try:
+            return self.repo.set_reviewing_issue(session_id, issue, version=version)
+        finally:
+            self.invalidate(session_id)
+
+    def set_voting_state(
+        self, session_id, value, expected=None, voting_round=None, version=None
+    ):
+        try:
+            return self.repo.set_voting_state(
+                session_id,
+                value,
+                expected=expected,
+                voting_round=voting_round,
+                version=version,
+            )
+        finally:
+            self.invalidate(session_id)
+
+    def start_round(
+        self,
+        session_id,
+        expected=None,
+        voting_round=None,
+        version=None,
+        tally=None,
+        deadline=None,
+    ):
+        try:
+            return self.repo.start_round(
+                session_id,
+                expected=expected,
+                voting_round=voting_round,
+                version=version,
+                tally=tally,
+                deadline=deadline,
+            )
+        finally:
+            self.invalidate(session_id)
+
+    def delete_session(self, session_id, version=None, participant_ids=()):
+        try:
+            return self.repo.delete_session(
+                session_id, version=version, participant_ids=participant_ids
+            )
+        finally:
+            self.invalidate(session_id)
+
+    def delete_participants(self, session_id, concurrency=4):
+        try:
+            return self.repo.delete_participants(session_id, concurrency=concurrency)
+        finally:
+            self.invalidate(session_id)
+
+    def add_participant(self, session_id, participant, record_expiration, version=None):
+        try:
+            return self.repo.add_participant(
+                session_id, participant, record_expiration, version=version
+            )
+        finally:
+            self.invalidate(session_id)
+
+    def remove_participant(
+        self,
+        session_id,
+        participant_id,
+        version=None,
+        tally=None,
+        voting_round=0,
+        previous=None,
+    ):
+        try:
+            return self.repo.remove_participant(
+                session_id,
+                participant_id,
+                version=version,
+                tally=tally,
+                voting_round=voting_round,
+                previous=previous,
+            )
+        finally:
+            self.invalidate(session_id)
+
+    def set_vote(
+        self, session_id, participant_id, vote, voting_round=0, version=None, tally=None
+    ):
+        try:
+            return self.repo.set_vote(
+                session_id,
+                participant_id,
+                vote,
+                voting_round=voting_round,
+                version=version,
+                tally=tally,
+            )
+        finally:
+            self.invalidate(session_id)
+
+    def cast_vote(
+        self,
+        session_id,
+        participant_id,
+        vote,
+        voting_round=0,
+        version=None,
+        tally=None,
+        previous=None,
+    ):
+        try:
+            return self.repo.cast_vote(
+                session_id,
+                participant_id,
+                vote,
+                voting_round=voting_round,
+                version=version,
+                tally=tally,
+                previous=previous,
+            )
+        finally:
+            self.invalidate(session_id)
+
+
+def _shared_key(session_id):
+    return f"pointing-poker:session:{session_id}"
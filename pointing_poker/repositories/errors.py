@@ -0,0 +1,2 @@
+class ConflictError(Exception):
+    """A write was rejected because the session changed since it was read."""
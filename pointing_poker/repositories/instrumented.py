@@ -0,0 +1,187 @@
+from collections import defaultdict
+from json import dumps
+from threading import Lock, local
+from time import perf_counter, time
+
+NAMESPACE = "PointingPoker"
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# CloudWatch accepts at most 100 values per metric in an EMF document.
+MAX_EMF_VALUES = 100
+
+_UNITS = {
+    "Calls": "Count",
+    "Errors": "Count",
+    "RoundTrips": "Count",
+    "ConsumedCapacity": "None",
+    "Items": "Count",
+    "ItemsDeleted": "Count",
+    "Retries": "Count",
+    "TimeSaved": "Milliseconds",
+    "Latency": "Milliseconds",
+}
+
+
+def _new_entry():
+    return {
+        "Calls": 0,
+        "Errors": 0,
+        "RoundTrips": 0,
+        "ConsumedCapacity": 0.0,
+        "Items": 0,
+        "ItemsDeleted": 0,
+        "Retries": 0,
+        "TimeSaved": 0.0,
+        "Latency": [],
+    }
+
+
+def _histogram(latencies):
+    buckets = {str(bound): 0 for bound in LATENCY_BUCKETS_MS}
+    buckets["+Inf"] = 0
+
+    for latency in latencies:
+        bound = next((bound for bound in LATENCY_BUCKETS_MS if latency <= bound), None)
+        buckets["+Inf" if bound is None else str(bound)] += 1
+
+    return buckets
+
+
+class RepoMetrics:
+    """Repository metrics keyed by controller handler and repository method.
+
+    handler and method tag everything recorded: the controllers set the
+    handler being served and InstrumentedSessionsRepo the repository method
+    in flight on each thread; threads that never set one, like the ones a
+    repository method starts, see the method set last. Round trips,
+    consumed capacity and the numbers of items returned and deleted are
+    reported by the storage layer through record_request, and the requests
+    it sent again through record_retry. flush writes one CloudWatch embedded
+    metric format document per handler and method.
+    """
+
+    def __init__(self, namespace=NAMESPACE, write=print):
+        self.namespace = namespace
+        self.write = write
+
+        self.handler = None
+
+        self._local = local()
+        self._last_method = None
+        self._entries = defaultdict(_new_entry)
+        self._lock = Lock()
+
+    @property
+    def method(self):
+        return getattr(self._local, "method", self._last_method)
+
+    @method.setter
+    def method(self, method):
+        self._local.method = method
+        self._last_method = method
+
+    def _entry(self, method):
+        return self._entries[(self.handler or "unknown", method or "unknown")]
+
+    def record_call(self, method, seconds, failed=False):
+        with self._lock:
+            entry = self._entry(method)
+
+            entry["Calls"] += 1
+            entry["Errors"] += int(failed)
+            entry["Latency"].append(seconds * 1000)
+
+    def record_request(self, consumed_capacity=0.0, items=0, deleted=0):
+        with self._lock:
+            entry = self._entry(self.method)
+
+            entry["RoundTrips"] += 1
+            entry["ConsumedCapacity"] += consumed_capacity
+            entry["Items"] += items
+            entry["ItemsDeleted"] += deleted
+
+    def record_retry(self, reason=None):
+        with self._lock:
+            self._entry(self.method)["Retries"] += 1
+
+    def record_time_saved(self, seconds):
+        """Records the time saved by making repository calls concurrently."""
+        with self._lock:
+            self._entry("concurrent")["TimeSaved"] += seconds * 1000
+
+    def snapshot(self):
+        """Returns the metrics recorded since the last flush."""
+        with self._lock:
+            return {
+                key: {
+                    **entry,
+                    "Latency": list(entry["Latency"]),
+                    "LatencyHistogram": _histogram(entry["Latency"]),
+                }
+                for key, entry in self._entries.items()
+            }
+
+    def flush(self):
+        with self._lock:
+            entries, self._entries = self._entries, defaultdict(_new_entry)
+
+        timestamp = int(time() * 1000)
+
+        for (handler, method), entry in entries.items():
+            self.write(
+                dumps(
+                    {
+                        "_aws": {
+                            "Timestamp": timestamp,
+                            "CloudWatchMetrics": [
+                                {
+                                    "Namespace": self.namespace,
+                                    "Dimensions": [["Handler", "Method"]],
+                                    "Metrics": [
+                                        {"Name": name, "Unit": unit}
+                                        for name, unit in _UNITS.items()
+                                    ],
+                                }
+                            ],
+                        },
+                        "Handler": handler,
+                        "Method": method,
+                        **entry,
+                        "Latency": entry["Latency"][:MAX_EMF_VALUES],
+                        "LatencyHistogram": _histogram(entry["Latency"]),
+                    }
+                )
+            )
+
+
+class InstrumentedSessionsRepo:
+    """Records the calls, errors and latency of every repository method."""
+
+    def __init__(self, repo, metrics):
+        self.repo = repo
+        self.metrics = metrics
+
+    def __getattr__(self, name):
+        attribute = getattr(self.repo, name)
+
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            previous = self.metrics.method
+            self.metrics.method = name
+
+            start = perf_counter()
+            failed = True
+
+            try:
+                result = attribute(*args, **kwargs)
+                failed = False
+
+                return result
+            finally:
+                self.metrics.record_call(name, perf_counter() - start, failed)
+                self.metrics.method = previous
+
+        return call
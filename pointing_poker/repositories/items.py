@@ -0,0 +1,192 @@
+REVIEWING_ISSUE_ATTRIBUTES = (
+    "reviewing_issue_title",
+    "reviewing_issue_description",
+    "reviewing_issue_url",
+)
+
+TALLY_COUNTERS = ("count", "sum", "abstentions")
+
+# The histogram has a bucket per point in the pointing range, so the range
+# is kept to at most this many points past pointingMin.
+MAX_POINTING_SPAN = 100
+
+DIRECTORY_PREFIX = "participant#"
+
+
+def directory_key(participant_id):
+    """Returns the key of the item pointing at a participant's current session."""
+    key = f"{DIRECTORY_PREFIX}{participant_id}"
+
+    return {"sessionID": key, "id": key}
+
+
+def new_tally():
+    """Returns the stored tally of a session without votes.
+
+    The histogram maps points, as strings, to the number of votes for them.
+    """
+    return {"count": 0, "sum": 0, "abstentions": 0, "histogram": {}}
+
+
+def _vote_tally(vote):
+    tally = new_tally()
+
+    if vote is None:
+        return tally
+
+    if vote["abstained"] or vote["points"] is None:
+        tally["abstentions"] = 1
+    else:
+        points = int(vote["points"])
+        tally.update(count=1, sum=points, histogram={str(points): 1})
+
+    return tally
+
+
+def tally_delta(previous, vote):
+    """Returns what replacing a participant's previous vote with vote adds to a tally.
+
+    Returns None when the tally does not change.
+    """
+    before, after = _vote_tally(previous), _vote_tally(vote)
+
+    delta = {key: after[key] - before[key] for key in TALLY_COUNTERS}
+    delta["histogram"] = {
+        points: after["histogram"].get(points, 0) - before["histogram"].get(points, 0)
+        for points in sorted({*before["histogram"], *after["histogram"]})
+    }
+    delta["histogram"] = {
+        points: count for points, count in delta["histogram"].items() if count
+    }
+
+    return delta if any(delta.values()) else None
+
+
+def add_tally(tally, delta):
+    """Returns a stored tally with delta applied."""
+    if delta is None:
+        return tally
+
+    histogram = dict(tally["histogram"])
+
+    for points, count in delta["histogram"].items():
+        histogram[points] = histogram.get(points, 0) + count
+
+    return {
+        **{key: tally[key] + delta[key] for key in TALLY_COUNTERS},
+        "histogram": histogram,
+    }
+
+
+def tally_of(votes):
+    """Returns the stored tally of votes."""
+    tally = new_tally()
+
+    for vote in votes:
+        tally = add_tally(tally, tally_delta(None, vote))
+
+    return tally
+
+
+def item_to_tally(tally, pointing_min, pointing_max):
+    """Maps a stored tally to its response shape.
+
+    The histogram lists every point between pointing_min and pointing_max,
+    plus any point voted outside of them. Ranges wider than
+    MAX_POINTING_SPAN, from before it was enforced, only list voted points.
+    """
+    histogram = {
+        int(points): int(count) for points, count in tally["histogram"].items() if count
+    }
+    voted = sorted(histogram)
+    count, total = int(tally["count"]), int(tally["sum"])
+    pointing_min, pointing_max = int(pointing_min), int(pointing_max)
+
+    if pointing_max - pointing_min > MAX_POINTING_SPAN:
+        pointing_range = range(0)
+    else:
+        pointing_range = range(pointing_min, pointing_max + 1)
+
+    return {
+        "count": count,
+        "sum": total,
+        "abstentions": int(tally["abstentions"]),
+        "min": voted[0] if voted else None,
+        "max": voted[-1] if voted else None,
+        "mean": total / count if count else None,
+        "consensus": len(voted) == 1,
+        "histogram": [
+            {"points": points, "count": histogram.get(points, 0)}
+            for points in sorted({*pointing_range, *voted})
+        ],
+    }
+
+
+def response_to_tally(tally):
+    """Maps a tally in response shape back to the stored tally."""
+    return {
+        **{key: tally[key] for key in TALLY_COUNTERS},
+        "histogram": {
+            str(bucket["points"]): bucket["count"]
+            for bucket in tally["histogram"]
+            if bucket["count"]
+        },
+    }
+
+
+def item_to_vote(item, voting_round=0):
+    """Returns the vote of a participant item that counts in voting_round, if any.
+
+    Votes are stamped with the round they were cast in and only count for
+    that round; items written before rounds existed are treated as round 0.
+    Moderator votes are kept across rounds.
+    """
+    if (
+        "points" not in item
+        or "abstained" not in item
+        or (not item["isModerator"] and item.get("votedRound", 0) != voting_round)
+    ):
+        return None
+
+    return {"points": item["points"], "abstained": item["abstained"]}
+
+
+def item_to_reviewing_issue(item):
+    """Returns the reviewing issue of a session item, {} when none was set."""
+    if not any(key in item for key in REVIEWING_ISSUE_ATTRIBUTES):
+        return {}
+
+    return {
+        "title": item.get("reviewing_issue_title"),
+        "description": item.get("reviewing_issue_description"),
+        "url": item.get("reviewing_issue_url"),
+    }
+
+
+def item_to_session_tally(item):
+    """Returns the tally of a session item in response shape, if it has one."""
+    if "tally" not in item:
+        return None
+
+    return item_to_tally(
+        item["tally"], item.get("pointingMin", 0), item.get("pointingMax", -1)
+    )
+
+
+def item_to_participant(item, voting_round=0):
+    """Maps a participant item to its response shape."""
+    return {
+        "id": item["id"],
+        "name": item["name"],
+        "isModerator": item["isModerator"],
+        "vote": item_to_vote(item, voting_round),
+    }
+
+
+def item_to_session(item):
+    return {
+        **item,
+        "version": item.get("version", 0),
+        "reviewingIssue": item_to_reviewing_issue(item),
+        "tally": item_to_session_tally(item),
+    }
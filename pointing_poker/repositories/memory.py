@@ -0,0 +1,496 @@
+from copy import deepcopy
+from threading import RLock
+from time import time
+
+from pointing_poker.repositories.errors import ConflictError
+from pointing_poker.repositories.models import Session
+from pointing_poker.repositories.items import (
+    add_tally,
+    directory_key,
+    item_to_participant,
+    item_to_session,
+    item_to_vote,
+    new_tally,
+)
+
+# DynamoDB does not expire items whose ttl is more than five years in the past.
+TTL_HORIZON = 5 * 365 * 24 * 60 * 60
+
+
+class InMemorySessionsRepo:
+    """Thread-safe in-memory counterpart of SessionsDynamoDBRepo.
+
+    Items are kept in the same single-table layout and writes apply the same
+    conditions and raise the same errors, so SessionService behaves as it
+    does against DynamoDB. Items past their ttl are treated as deleted, and
+    participants can be looked up by id through the participant directory or,
+    failing that, like through the id-index GSI.
+    Projections are not applied; reads always return every attribute.
+    """
+
+    def __init__(self, clock=time):
+        self.clock = clock
+
+        self._partitions = {}
+        self._index = {}
+        self._lock = RLock()
+
+    def _expired(self, item):
+        if "ttl" not in item:
+            return False
+
+        now = self.clock()
+
+        return now - TTL_HORIZON < item["ttl"] <= now
+
+    def _partition(self, session_id):
+        """Returns the unexpired items of a session keyed by id."""
+        partition = self._partitions.get(session_id, {})
+
+        for item_id in [key for key, item in partition.items() if self._expired(item)]:
+            self._delete(session_id, item_id)
+
+        return partition
+
+    def _item(self, session_id, item_id):
+        return self._partition(session_id).get(item_id)
+
+    def _put(self, item):
+        self._partitions.setdefault(item["sessionID"], {})[item["id"]] = item
+        self._index.setdefault(item["id"], set()).add(item["sessionID"])
+
+    def _delete(self, session_id, item_id):
+        partition = self._partitions.get(session_id, {})
+
+        if partition.pop(item_id, None) is None:
+            return
+
+        if not partition:
+            del self._partitions[session_id]
+
+        self._index[item_id].discard(session_id)
+
+        if not self._index[item_id]:
+            del self._index[item_id]
+
+    def _versioned_session(self, session_id, version):
+        """Returns the session item, provided it is still at version.
+
+        Without a version the session only has to exist.
+        """
+        item = self._item(session_id, session_id)
+
+        if item is None and version is None:
+            raise Exception(f"session with id {session_id} not found")
+
+        if version is not None and (item is None or item.get("version", 0) != version):
+            raise ConflictError(f"session with id {session_id} changed concurrently")
+
+        return item
+
+    def _past_deadline(self, session_item):
+        deadline = session_item.get("votingDeadline")
+
+        return deadline is not None and self.clock() >= deadline
+
+    def _voting_round(self, session_id):
+        return (self._item(session_id, session_id) or {}).get("votingRound", 0)
+
+    def create(self, session, record_expiration):
+        with self._lock:
+            self._put(
+                deepcopy(
+                    {
+                        **session,
+                        "sessionID": session["id"],
+                        "ttl": record_expiration,
+                        "type": "session",
+                        "version": 0,
+                        "tally": new_tally(),
+                    }
+                )
+            )
+
+    def get(self, session_id, fields=None, after=None, first=None):
+        with self._lock:
+            partition = self._partition(session_id)
+
+            session_item = partition.get(session_id)
+
+            if session_item is None:
+                return None
+
+            participant_items = []
+
+            if fields is None or "participants" in fields:
+                participant_items = sorted(
+                    (
+                        item
+                        for item in partition.values()
+                        if item.get("type", "") == "participant"
+                        and (after is None or item["id"] > after)
+                    ),
+                    key=lambda item: item["id"],
+                )[:first]
+
+            voting_round = session_item.get("votingRound", 0)
+
+            return deepcopy(
+                {
+                    **item_to_session(session_item),
+                    "participants": [
+                        item_to_participant(item, voting_round)
+                        for item in participant_items
+                    ],
+                }
+            )
+
+    def get_session(self, session_id):
+        with self._lock:
+            partition = self._partition(session_id)
+
+            session_item = partition.get(session_id)
+
+            if session_item is None:
+                return None
+
+            return deepcopy(
+                Session.from_items(
+                    session_item,
+                    sorted(
+                        (
+                            item
+                            for item in partition.values()
+                            if item.get("type", "") == "participant"
+                        ),
+                        key=lambda item: item["id"],
+                    ),
+                )
+            )
+
+    def get_participant_in_session(self, session_id, participant_id):
+        with self._lock:
+            item = self._item(session_id, participant_id)
+
+            if item is None or self._item(session_id, session_id) is None:
+                return None
+
+            return deepcopy(item_to_participant(item, self._voting_round(session_id)))
+
+    def _current_session(self, participant_id):
+        key = directory_key(participant_id)
+        pointer = self._item(key["sessionID"], key["id"])
+
+        return None if pointer is None else pointer["currentSession"]
+
+    def _point(self, session_id, participant_id, record_expiration):
+        self._put(
+            {
+                **directory_key(participant_id),
+                "type": "directory",
+                "currentSession": session_id,
+                "ttl": record_expiration,
+            }
+        )
+
+    def _unpoint(self, session_id, participant_id):
+        if self._current_session(participant_id) == session_id:
+            key = directory_key(participant_id)
+            self._delete(key["sessionID"], key["id"])
+
+    def get_participant(self, user_id):
+        with self._lock:
+            session_id = self._current_session(user_id)
+
+            if session_id is not None:
+                participant = self.get_participant_in_session(session_id, user_id)
+
+                return (
+                    None
+                    if participant is None
+                    else {**participant, "sessionID": session_id}
+                )
+
+            for session_id in sorted(self._index.get(user_id, ())):
+                item = self._item(session_id, user_id)
+
+                if item is not None:
+                    return deepcopy(
+                        {
+                            **item_to_participant(item, self._voting_round(session_id)),
+                            "sessionID": session_id,
+                        }
+                    )
+
+            return None
+
+    def get_participant_sessions(self, participant_ids):
+        with self._lock:
+            sessions = {
+                participant_id: self._current_session(participant_id)
+                for participant_id in participant_ids
+            }
+
+        return {
+            participant_id: session_id
+            for participant_id, session_id in sessions.items()
+            if session_id is not None
+        }
+
+    def get_version(self, session_id, consistent=False):
+        with self._lock:
+            item = self._item(session_id, session_id)
+
+            return None if item is None else item.get("version", 0)
+
+    def set_reviewing_issue(self, session_id, issue, version=None):
+        if not issue:
+            return
+
+        with self._lock:
+            item = self._versioned_session(session_id, version)
+
+            for key, value in issue.items():
+                item[f"reviewing_issue_{key}"] = value
+
+            return _next_version(item)
+
+    def _voting_state_item(self, session_id, expected, voting_round, version):
+        item = self._item(session_id, session_id)
+
+        if (
+            item is None
+            or (expected is not None and item.get("votingStarted") != expected)
+            or (voting_round is not None and item.get("votingRound", 0) != voting_round)
+            or (version is not None and item.get("version", 0) != version)
+        ):
+            raise ConflictError(
+                f"voting state of session with id {session_id} changed concurrently"
+            )
+
+        _next_version(item)
+
+        return item
+
+    def set_voting_state(
+        self, session_id, value, expected=None, voting_round=None, version=None
+    ):
+        with self._lock:
+            item = self._voting_state_item(session_id, expected, voting_round, version)
+
+            item["votingStarted"] = value
+
+            if not value:
+                item.pop("votingDeadline", None)
+
+            return deepcopy(item_to_session(item))
+
+    def start_round(
+        self,
+        session_id,
+        expected=None,
+        voting_round=None,
+        version=None,
+        tally=None,
+        deadline=None,
+    ):
+        with self._lock:
+            item = self._voting_state_item(session_id, expected, voting_round, version)
+
+            item["votingStarted"] = True
+            item["tally"] = deepcopy(new_tally() if tally is None else tally)
+            item["votingRound"] = item.get("votingRound", 0) + 1
+
+            if deadline is None:
+                item.pop("votingDeadline", None)
+            else:
+                item["votingDeadline"] = deadline
+
+            return item["votingRound"]
+
+    def delete_session(self, session_id, version=None, participant_ids=()):
+        with self._lock:
+            item = self._item(session_id, session_id)
+
+            if version is not None and (item is not None or version != 0):
+                self._versioned_session(session_id, version)
+
+            self._delete(session_id, session_id)
+
+            for participant_id in participant_ids:
+                self._unpoint(session_id, participant_id)
+
+    def delete_participants(self, session_id, concurrency=4):
+        """Deletes the participant items of a session and returns how many there were.
+
+        concurrency is ignored.
+        """
+        with self._lock:
+            participant_ids = [
+                item_id
+                for item_id, item in self._partition(session_id).items()
+                if item.get("type", "") == "participant"
+            ]
+
+            for participant_id in participant_ids:
+                self._delete(session_id, participant_id)
+
+        return len(participant_ids)
+
+    def add_participant(self, session_id, participant, record_expiration, version=None):
+        with self._lock:
+            session_item = self._versioned_session(session_id, version)
+
+            if self._item(session_id, participant["id"]) is not None:
+                raise Exception(
+                    f"participant with id {participant['id']} already exists"
+                )
+
+            self._put(
+                {
+                    "sessionID": session_id,
+                    "id": participant["id"],
+                    "name": participant["name"],
+                    "isModerator": participant["isModerator"],
+                    "ttl": record_expiration,
+                    "type": "participant",
+                }
+            )
+            self._point(session_id, participant["id"], record_expiration)
+
+            new_version = _next_version(session_item)
+
+        return None if version is None else new_version
+
+    def remove_participant(
+        self,
+        session_id,
+        participant_id,
+        version=None,
+        tally=None,
+        voting_round=0,
+        previous=None,
+    ):
+        with self._lock:
+            session_item = self._versioned_session(session_id, version)
+
+            item = self._item(session_id, participant_id)
+
+            if tally is not None and (
+                item is None or item_to_vote(item, voting_round) != previous
+            ):
+                raise ConflictError(
+                    f"vote of participant with id {participant_id} changed concurrently"
+                )
+
+            if item is None:
+                raise Exception(
+                    f"participant with id {participant_id} is not part of session with id {session_id}"
+                )
+
+            self._delete(session_id, participant_id)
+            self._unpoint(session_id, participant_id)
+
+            if tally is not None:
+                session_item["tally"] = add_tally(session_item["tally"], tally)
+
+            new_version = _next_version(session_item)
+
+        return None if version is None else new_version
+
+    def set_vote(
+        self, session_id, participant_id, vote, voting_round=0, version=None, tally=None
+    ):
+        with self._lock:
+            session_item = self._versioned_session(session_id, version)
+
+            if self._past_deadline(session_item):
+                raise Exception(f"session with id {session_id} is not accepting votes")
+
+            item = self._item(session_id, participant_id)
+
+            if item is None:
+                raise Exception("resource not found")
+
+            _write_vote(item, vote, voting_round)
+
+            if tally is not None:
+                session_item["tally"] = add_tally(session_item["tally"], tally)
+
+            new_version = _next_version(session_item)
+
+        return None if version is None else new_version
+
+    def cast_vote(
+        self,
+        session_id,
+        participant_id,
+        vote,
+        voting_round=0,
+        version=None,
+        tally=None,
+        previous=None,
+    ):
+        with self._lock:
+            session_item = self._item(session_id, session_id)
+
+            if version is not None and (
+                session_item is None or session_item.get("version", 0) != version
+            ):
+                raise ConflictError(
+                    f"session with id {session_id} changed concurrently"
+                )
+
+            if (
+                session_item is None
+                or session_item.get("closed") is not False
+                or session_item.get("votingStarted") is not True
+                or session_item.get("votingRound", 0) != voting_round
+                or self._past_deadline(session_item)
+                or (
+                    vote is not None
+                    and vote["points"] is not None
+                    and not session_item["pointingMin"]
+                    <= vote["points"]
+                    <= session_item["pointingMax"]
+                )
+            ):
+                raise Exception(f"session with id {session_id} is not accepting votes")
+
+            item = self._item(session_id, participant_id)
+
+            if item is None:
+                raise Exception(
+                    f"participant with id {participant_id} is not part of session with id {session_id}"
+                )
+
+            if tally is not None and item_to_vote(item, voting_round) != previous:
+                raise ConflictError(
+                    f"vote of participant with id {participant_id} changed concurrently"
+                )
+
+            _write_vote(item, vote, voting_round)
+
+            if tally is not None:
+                session_item["tally"] = add_tally(session_item["tally"], tally)
+
+            new_version = _next_version(session_item)
+
+        return None if version is None else new_version
+
+
+def _next_version(item):
+    item["version"] = item.get("version", 0) + 1
+
+    return item["version"]
+
+
+def _write_vote(item, vote, voting_round):
+    if vote is None:
+        for key in ("points", "abstained", "votedRound"):
+            item.pop(key, None)
+        return
+
+    item["points"] = vote["points"]
+    item["abstained"] = vote["abstained"]
+    item["votedRound"] = voting_round
@@ -0,0 +1,184 @@
+from pointing_poker.repositories.items import (
+    item_to_reviewing_issue,
+    item_to_session_tally,
+    item_to_vote,
+)
+
+
+class Vote:
+    __slots__ = ("points", "abstained")
+
+    def __init__(self, points, abstained):
+        self.points = points
+        self.abstained = abstained
+
+    @classmethod
+    def from_response(cls, vote):
+        return None if vote is None else cls(vote["points"], vote["abstained"])
+
+    def to_response(self):
+        return {"points": self.points, "abstained": self.abstained}
+
+
+class Participant:
+    __slots__ = ("id", "name", "is_moderator", "vote")
+
+    def __init__(self, id, name, is_moderator, vote=None):
+        self.id = id
+        self.name = name
+        self.is_moderator = is_moderator
+        self.vote = vote
+
+    @classmethod
+    def from_item(cls, item, voting_round=0):
+        """Builds a participant from its item, like item_to_participant."""
+        return cls(
+            item["id"],
+            item["name"],
+            item["isModerator"],
+            Vote.from_response(item_to_vote(item, voting_round)),
+        )
+
+    @classmethod
+    def from_response(cls, participant):
+        return cls(
+            participant["id"],
+            participant.get("name"),
+            participant.get("isModerator", False),
+            Vote.from_response(participant.get("vote")),
+        )
+
+    def to_response(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "isModerator": self.is_moderator,
+            "vote": None if self.vote is None else self.vote.to_response(),
+        }
+
+
+class Session:
+    """A session with its participants indexed by id.
+
+    participants keeps the order participants were read in, so responses
+    list them like the repositories do.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "created_at",
+        "expires_in",
+        "pointing_min",
+        "pointing_max",
+        "voting_started",
+        "voting_round",
+        "voting_deadline",
+        "closed",
+        "version",
+        "reviewing_issue",
+        "tally",
+        "participants",
+    )
+
+    def __init__(
+        self,
+        id,
+        name,
+        created_at,
+        expires_in,
+        pointing_min,
+        pointing_max,
+        voting_started=False,
+        voting_round=0,
+        voting_deadline=None,
+        closed=False,
+        version=0,
+        reviewing_issue=None,
+        tally=None,
+        participants=(),
+    ):
+        self.id = id
+        self.name = name
+        self.created_at = created_at
+        self.expires_in = expires_in
+        self.pointing_min = pointing_min
+        self.pointing_max = pointing_max
+        self.voting_started = voting_started
+        self.voting_round = voting_round
+        self.voting_deadline = voting_deadline
+        self.closed = closed
+        self.version = version
+        self.reviewing_issue = {} if reviewing_issue is None else reviewing_issue
+        self.tally = tally
+        self.participants = {
+            participant.id: participant for participant in participants
+        }
+
+    @classmethod
+    def from_items(cls, session_item, participant_items):
+        """Builds a session straight from its items, like item_to_session."""
+        voting_round = session_item.get("votingRound", 0)
+
+        return cls(
+            session_item["id"],
+            session_item.get("name"),
+            session_item.get("createdAt"),
+            session_item.get("expiresIn"),
+            session_item.get("pointingMin"),
+            session_item.get("pointingMax"),
+            session_item.get("votingStarted", False),
+            voting_round,
+            session_item.get("votingDeadline"),
+            session_item.get("closed", False),
+            session_item.get("version", 0),
+            item_to_reviewing_issue(session_item),
+            item_to_session_tally(session_item),
+            (Participant.from_item(item, voting_round) for item in participant_items),
+        )
+
+    @classmethod
+    def from_response(cls, session):
+        return cls(
+            session["id"],
+            session.get("name"),
+            session.get("createdAt"),
+            session.get("expiresIn"),
+            session.get("pointingMin"),
+            session.get("pointingMax"),
+            session.get("votingStarted", False),
+            session.get("votingRound", 0),
+            session.get("votingDeadline"),
+            session.get("closed", False),
+            session.get("version", 0),
+            session.get("reviewingIssue"),
+            session.get("tally"),
+            (
+                Participant.from_response(participant)
+                for participant in session.get("participants", ())
+            ),
+        )
+
+    def participant(self, participant_id):
+        return self.participants.get(participant_id)
+
+    def to_response(self):
+        """Returns the session in the shape AppSync resolves it from."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "createdAt": self.created_at,
+            "expiresIn": self.expires_in,
+            "pointingMin": self.pointing_min,
+            "pointingMax": self.pointing_max,
+            "votingStarted": self.voting_started,
+            "votingRound": self.voting_round,
+            "votingDeadline": self.voting_deadline,
+            "closed": self.closed,
+            "version": self.version,
+            "reviewingIssue": self.reviewing_issue,
+            "tally": self.tally,
+            "participants": [
+                participant.to_response() for participant in self.participants.values()
+            ],
+        }
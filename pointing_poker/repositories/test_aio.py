@@ -0,0 +1,38 @@
+from asyncio import gather, run
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+from unittest import TestCase
+from unittest.mock import Mock
+
+from pointing_poker.repositories.aio import AsyncSessionsRepo
+
+
+class AsyncSessionsRepoTestCase(TestCase):
+    def test_calls_run_concurrently(self):
+        barrier = Barrier(3, timeout=5)
+
+        repo = Mock()
+        repo.get.side_effect = lambda session_id: (barrier.wait(), session_id)[1]
+
+        async_repo = AsyncSessionsRepo(repo, max_concurrency=3)
+
+        async def read():
+            return await gather(*(async_repo.get(str(idx)) for idx in range(3)))
+
+        self.assertEqual(run(read()), ["0", "1", "2"])
+
+    def test_attributes_pass_through(self):
+        repo = Mock()
+        repo.ttl = 5
+
+        self.assertEqual(AsyncSessionsRepo(repo).ttl, 5)
+
+    def test_shared_executor(self):
+        repo = Mock()
+        repo.get.return_value = "session"
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            async_repo = AsyncSessionsRepo(repo, executor=executor)
+
+            self.assertIs(async_repo.executor, executor)
+            self.assertEqual(run(async_repo.get("id")), "session")
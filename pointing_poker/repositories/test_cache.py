@@ -0,0 +1,222 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+from pointing_poker.repositories import cache
+from pointing_poker.repositories.cache import CachingSessionsRepo, LocalSharedCache
+from pointing_poker.repositories.memory import InMemorySessionsRepo
+from pointing_poker.services.sessions import SessionService
+
+
+def session_factory(session_id="session"):
+    return {
+        "id": session_id,
+        "name": "test",
+        "votingStarted": False,
+        "participants": [{"id": "moderator", "isModerator": True, "vote": None}],
+    }
+
+
+class CachingSessionsRepoTestCase(TestCase):
+    def setUp(self) -> None:
+        self.repo = Mock()
+        self.repo.get.side_effect = lambda session_id, **_: session_factory(session_id)
+
+        self.cache = CachingSessionsRepo(self.repo, max_sessions=2, ttl=60)
+
+    def test_get_is_cached(self):
+        first = self.cache.get("session")
+        second = self.cache.get("session")
+
+        self.assertEqual(first, second)
+        self.repo.get.assert_called_once_with("session")
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_get_returns_copies(self):
+        self.cache.get("session")["participants"].append({"id": "other"})
+
+        self.assertEqual(len(self.cache.get("session")["participants"]), 1)
+
+    def test_missing_session_is_not_cached(self):
+        self.repo.get.side_effect = None
+        self.repo.get.return_value = None
+
+        self.assertIsNone(self.cache.get("bogus"))
+        self.assertIsNone(self.cache.get("bogus"))
+
+        self.assertEqual(self.repo.get.call_count, 2)
+
+    def test_projected_reads_are_cached(self):
+        self.cache.get("session", fields=["id", "participants", "participants/id"])
+        self.cache.get("session", fields=["id"])
+
+        self.repo.get.assert_called_once_with("session")
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_pages_bypass_cache(self):
+        self.cache.get("session", fields=["id"], first=10)
+
+        self.assertEqual(self.cache.stats()["misses"], 0)
+        self.repo.get.assert_called_with("session", fields=["id"], after=None, first=10)
+
+    def test_get_session_reads_through(self):
+        self.cache.get("session")
+
+        self.assertIs(
+            self.cache.get_session("session"), self.repo.get_session.return_value
+        )
+        self.repo.get_session.assert_called_once_with("session")
+
+    def test_writes_invalidate(self):
+        self.cache.get("session")
+
+        self.cache.cast_vote(
+            "session", "participant", {"points": 1}, voting_round=2, version=4
+        )
+
+        self.repo.cast_vote.assert_called_with(
+            "session",
+            "participant",
+            {"points": 1},
+            voting_round=2,
+            version=4,
+            tally=None,
+            previous=None,
+        )
+
+        self.cache.get("session")
+
+        self.assertEqual(self.repo.get.call_count, 2)
+
+    def test_failed_writes_invalidate(self):
+        self.cache.get("session")
+
+        self.repo.start_round.side_effect = Exception("failed to update item")
+
+        self.assertRaises(
+            Exception, lambda: self.cache.start_round("session", expected=False)
+        )
+
+        self.repo.start_round.assert_called_with(
+            "session",
+            expected=False,
+            voting_round=None,
+            version=None,
+            tally=None,
+            deadline=None,
+        )
+
+        self.cache.get("session")
+
+        self.assertEqual(self.repo.get.call_count, 2)
+
+    def test_lru_eviction(self):
+        self.cache.get("a")
+        self.cache.get("b")
+        self.cache.get("a")
+        self.cache.get("c")
+
+        self.cache.get("a")
+        self.cache.get("b")
+
+        self.assertEqual(
+            [call[0][0] for call in self.repo.get.call_args_list], ["a", "b", "c", "b"],
+        )
+
+    def test_ttl_expiry(self):
+        with patch.object(cache, "monotonic", return_value=100):
+            self.cache.get("session")
+
+        with patch.object(cache, "monotonic", return_value=159):
+            self.cache.get("session")
+
+        with patch.object(cache, "monotonic", return_value=161):
+            self.cache.get("session")
+
+        self.assertEqual(self.repo.get.call_count, 2)
+
+    def test_expired_entry_is_revalidated(self):
+        self.repo.get.side_effect = lambda session_id, **_: {
+            **session_factory(session_id),
+            "version": 3,
+        }
+        self.repo.get_version.return_value = 3
+
+        with patch.object(cache, "monotonic", return_value=100):
+            self.cache.get("session")
+
+        with patch.object(cache, "monotonic", return_value=161):
+            self.assertEqual(self.cache.get("session")["version"], 3)
+
+        with patch.object(cache, "monotonic", return_value=200):
+            self.cache.get("session")
+
+        self.repo.get.assert_called_once_with("session")
+        self.repo.get_version.assert_called_once_with("session")
+        self.assertEqual(self.cache.stats()["revalidations"], 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+        self.repo.get_version.return_value = 4
+
+        with patch.object(cache, "monotonic", return_value=300):
+            self.cache.get("session")
+
+        self.assertEqual(self.repo.get.call_count, 2)
+
+    def test_shared_tier(self):
+        shared = LocalSharedCache()
+
+        CachingSessionsRepo(self.repo, shared=shared).get("session")
+
+        other = CachingSessionsRepo(self.repo, shared=shared)
+
+        self.assertEqual(other.get("session"), session_factory())
+        self.assertEqual(other.stats()["sharedHits"], 1)
+        self.repo.get.assert_called_once_with("session")
+
+        other.remove_participant("session", "moderator")
+
+        self.assertIsNone(shared.get("pointing-poker:session:session"))
+
+
+class CachedSessionServiceTestCase(TestCase):
+    def test_mutations_see_writes_of_other_caches(self):
+        repo = InMemorySessionsRepo()
+        first = SessionService(CachingSessionsRepo(repo, ttl=60))
+        second = SessionService(CachingSessionsRepo(repo, ttl=60))
+
+        session = first.create_session(
+            {"name": "test", "pointingMin": 1, "pointingMax": 13},
+            {"id": str(uuid4()), "name": "moderator"},
+        )
+        participant_id = str(uuid4())
+
+        second.session(session["id"])
+        first.join_session(session["id"], {"id": participant_id, "name": "test"})
+        first.start_voting(session["id"])
+
+        session = second.set_vote(
+            session["id"], participant_id, {"points": 3, "abstained": False}
+        )
+
+        self.assertEqual(session["tally"]["count"], 1)
+
+
+class LocalSharedCacheTestCase(TestCase):
+    def test_expiry(self):
+        shared = LocalSharedCache()
+
+        with patch.object(cache, "monotonic", return_value=10):
+            shared.set("key", b"value", px=1000)
+            shared.set("forever", b"value")
+
+            self.assertEqual(shared.get("key"), b"value")
+
+        with patch.object(cache, "monotonic", return_value=11):
+            self.assertIsNone(shared.get("key"))
+            self.assertEqual(shared.get("forever"), b"value")
+
+        shared.delete("forever")
+
+        self.assertIsNone(shared.get("forever"))
@@ -0,0 +1,87 @@
+from json import loads
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import Mock
+
+from pointing_poker.repositories.instrumented import (
+    InstrumentedSessionsRepo,
+    RepoMetrics,
+)
+
+
+class InstrumentedSessionsRepoTestCase(TestCase):
+    def setUp(self) -> None:
+        self.lines = []
+        self.metrics = RepoMetrics(write=self.lines.append)
+
+        self.repo = Mock()
+        self.repo.get.side_effect = lambda session_id: self.metrics.record_request(
+            0.5, 3
+        )
+
+        self.instrumented = InstrumentedSessionsRepo(self.repo, self.metrics)
+
+    def test_records_calls_by_handler(self):
+        self.metrics.handler = "session"
+
+        self.instrumented.get("session")
+        self.instrumented.get("session")
+
+        entry = self.metrics.snapshot()[("session", "get")]
+
+        self.assertEqual(entry["Calls"], 2)
+        self.assertEqual(entry["RoundTrips"], 2)
+        self.assertEqual(entry["ConsumedCapacity"], 1.0)
+        self.assertEqual(entry["Items"], 6)
+        self.assertEqual(len(entry["Latency"]), 2)
+        self.assertEqual(sum(entry["LatencyHistogram"].values()), 2)
+        self.assertIsNone(self.metrics.method)
+
+    def test_records_errors(self):
+        self.repo.cast_vote.side_effect = Exception("failed to update item")
+
+        self.assertRaises(
+            Exception, lambda: self.instrumented.cast_vote("session", "p", None)
+        )
+
+        entry = self.metrics.snapshot()[("unknown", "cast_vote")]
+
+        self.assertEqual(entry["Calls"], 1)
+        self.assertEqual(entry["Errors"], 1)
+
+    def test_flush_writes_emf(self):
+        self.metrics.handler = "stopVoting"
+        self.instrumented.get("session")
+
+        self.metrics.flush()
+
+        document = loads(self.lines[0])
+
+        self.assertEqual(document["Handler"], "stopVoting")
+        self.assertEqual(document["Method"], "get")
+        self.assertEqual(document["Calls"], 1)
+        self.assertEqual(
+            document["_aws"]["CloudWatchMetrics"][0]["Dimensions"],
+            [["Handler", "Method"]],
+        )
+        self.assertEqual(self.metrics.snapshot(), {})
+
+    def test_method_per_thread(self):
+        self.metrics.handler = "session"
+        self.metrics.method = "get"
+
+        def record():
+            self.metrics.record_request()
+            self.metrics.method = "get_version"
+            self.metrics.record_request()
+
+        thread = Thread(target=record)
+        thread.start()
+        thread.join()
+
+        self.metrics.record_request()
+
+        snapshot = self.metrics.snapshot()
+
+        self.assertEqual(snapshot[("session", "get")]["RoundTrips"], 2)
+        self.assertEqual(snapshot[("session", "get_version")]["RoundTrips"], 1)
@@ -0,0 +1,104 @@
+from unittest import TestCase
+
+from pointing_poker.repositories.items import (
+    add_tally,
+    item_to_reviewing_issue,
+    item_to_tally,
+    item_to_vote,
+    new_tally,
+    response_to_tally,
+    tally_delta,
+    tally_of,
+)
+
+
+class TallyTestCase(TestCase):
+    def test_tally_delta(self):
+        five = {"points": 5, "abstained": False}
+        abstained = {"points": None, "abstained": True}
+
+        self.assertEqual(
+            tally_delta(None, five),
+            {"count": 1, "sum": 5, "abstentions": 0, "histogram": {"5": 1}},
+        )
+        self.assertEqual(
+            tally_delta(five, abstained),
+            {"count": -1, "sum": -5, "abstentions": 1, "histogram": {"5": -1}},
+        )
+        self.assertIsNone(tally_delta(five, dict(five)))
+        self.assertIsNone(tally_delta(None, None))
+
+    def test_add_tally(self):
+        tally = tally_of(
+            [{"points": 3, "abstained": False}, {"points": 5, "abstained": False}]
+        )
+
+        tally = add_tally(tally, tally_delta({"points": 3, "abstained": False}, None))
+
+        self.assertEqual(
+            tally,
+            {"count": 1, "sum": 5, "abstentions": 0, "histogram": {"3": 0, "5": 1}},
+        )
+        self.assertEqual(add_tally(tally, None), tally)
+
+    def test_item_to_tally(self):
+        tally = tally_of(
+            [
+                {"points": 1, "abstained": False},
+                {"points": 3, "abstained": False},
+                {"points": 5, "abstained": False},
+                {"points": None, "abstained": True},
+            ]
+        )
+
+        response = item_to_tally(tally, 1, 3)
+
+        self.assertEqual(
+            {key: response[key] for key in ("count", "sum", "abstentions")},
+            {"count": 3, "sum": 9, "abstentions": 1},
+        )
+        self.assertEqual((response["min"], response["max"]), (1, 5))
+        self.assertEqual(response["mean"], 3)
+        self.assertFalse(response["consensus"])
+        self.assertEqual(
+            [bucket["points"] for bucket in response["histogram"]], [1, 2, 3, 5]
+        )
+        self.assertEqual(response_to_tally(response), tally)
+
+    def test_empty_tally(self):
+        response = item_to_tally(new_tally(), 1, 2)
+
+        self.assertIsNone(response["mean"])
+        self.assertIsNone(response["min"])
+        self.assertFalse(response["consensus"])
+        self.assertEqual(
+            response["histogram"],
+            [{"points": 1, "count": 0}, {"points": 2, "count": 0}],
+        )
+
+    def test_wide_range_lists_voted_points(self):
+        tally = tally_of([{"points": 8, "abstained": False}])
+
+        self.assertEqual(
+            item_to_tally(tally, 0, 10 ** 9)["histogram"], [{"points": 8, "count": 1}]
+        )
+
+
+class ItemsTestCase(TestCase):
+    def test_item_to_vote(self):
+        item = {"isModerator": False, "points": 3, "abstained": False, "votedRound": 2}
+
+        self.assertEqual(item_to_vote(item, 2), {"points": 3, "abstained": False})
+        self.assertIsNone(item_to_vote(item, 3))
+        self.assertEqual(
+            item_to_vote({**item, "isModerator": True}, 3),
+            {"points": 3, "abstained": False},
+        )
+        self.assertIsNone(item_to_vote({"isModerator": False}, 0))
+
+    def test_item_to_reviewing_issue(self):
+        self.assertEqual(item_to_reviewing_issue({"id": "session"}), {})
+        self.assertEqual(
+            item_to_reviewing_issue({"reviewing_issue_title": "IS-1"}),
+            {"title": "IS-1", "description": None, "url": None},
+        )
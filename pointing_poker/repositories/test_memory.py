@@ -0,0 +1,370 @@
+from threading import Thread
+from time import time
+from unittest import TestCase
+from uuid import uuid4
+
+from pointing_poker.repositories.errors import ConflictError
+from pointing_poker.repositories.items import tally_delta
+from pointing_poker.repositories.memory import InMemorySessionsRepo
+
+
+def session_factory():
+    return {
+        "id": str(uuid4()),
+        "name": "test",
+        "pointingMax": 13,
+        "pointingMin": 1,
+        "votingStarted": False,
+        "closed": False,
+        "createdAt": int(time()),
+        "expiresIn": int(time() + 24 * 60 * 60),
+    }
+
+
+def participant_factory(is_moderator=False):
+    return {"id": str(uuid4()), "name": "test", "isModerator": is_moderator}
+
+
+class InMemorySessionsRepoTestCase(TestCase):
+    def setUp(self) -> None:
+        self.now = time()
+        self.repo = InMemorySessionsRepo(clock=lambda: self.now)
+
+        self.session = session_factory()
+        self.repo.create(self.session, record_expiration=self.session["expiresIn"])
+
+    def add_participant(self, is_moderator=False):
+        participant = participant_factory(is_moderator)
+
+        self.repo.add_participant(
+            self.session["id"], participant, record_expiration=self.session["expiresIn"]
+        )
+
+        return participant
+
+    def test_get_session(self):
+        participant = self.add_participant()
+
+        session = self.repo.get(self.session["id"])
+
+        self.assertEqual(session["name"], "test")
+        self.assertEqual(session["reviewingIssue"], {})
+        self.assertEqual(
+            session["participants"], [{**participant, "vote": None}],
+        )
+
+    def test_get_session_model(self):
+        participant = self.add_participant()
+
+        self.repo.start_round(self.session["id"])
+        self.repo.cast_vote(
+            self.session["id"],
+            participant["id"],
+            {"points": 3, "abstained": False},
+            voting_round=1,
+        )
+
+        session = self.repo.get_session(self.session["id"])
+
+        self.assertEqual(session.voting_round, 1)
+        self.assertEqual(session.participant(participant["id"]).vote.points, 3)
+        self.assertEqual(
+            session.to_response()["participants"][0]["id"], participant["id"]
+        )
+        self.assertIsNone(self.repo.get_session(str(uuid4())))
+
+    def test_get_missing_session(self):
+        self.assertIsNone(self.repo.get(str(uuid4())))
+
+    def test_get_returns_copies(self):
+        self.repo.get(self.session["id"])["participants"].append({})
+
+        self.assertEqual(self.repo.get(self.session["id"])["participants"], [])
+
+    def test_get_participants_page(self):
+        ids = sorted(self.add_participant()["id"] for _ in range(5))
+
+        session = self.repo.get(self.session["id"], after=ids[1], first=2)
+
+        self.assertEqual([p["id"] for p in session["participants"]], ids[2:4])
+        self.assertEqual(
+            self.repo.get(self.session["id"], fields=["id"])["participants"], []
+        )
+
+    def test_expired_items_are_gone(self):
+        participant = self.add_participant()
+
+        self.now = self.session["expiresIn"]
+
+        self.assertIsNone(self.repo.get(self.session["id"]))
+        self.assertIsNone(self.repo.get_participant(participant["id"]))
+
+    def test_distant_ttl_never_expires(self):
+        session = session_factory()
+        self.repo.create(session, record_expiration=0)
+
+        self.assertIsNotNone(self.repo.get(session["id"]))
+
+    def test_add_participant_conflicts(self):
+        participant = self.add_participant()
+
+        with self.assertRaises(Exception) as context:
+            self.repo.add_participant(self.session["id"], participant, 0)
+
+        self.assertEqual(
+            str(context.exception),
+            f"participant with id {participant['id']} already exists",
+        )
+
+    def test_get_participant(self):
+        participant = self.add_participant()
+
+        self.assertEqual(
+            self.repo.get_participant(participant["id"]),
+            {**participant, "vote": None, "sessionID": self.session["id"]},
+        )
+
+        self.repo.remove_participant(self.session["id"], participant["id"])
+
+        self.assertIsNone(self.repo.get_participant(participant["id"]))
+        self.assertIsNone(
+            self.repo.get_participant_in_session(self.session["id"], participant["id"])
+        )
+
+    def test_cast_vote(self):
+        participant = self.add_participant()
+        vote = {"points": 5, "abstained": False}
+
+        voting_round = self.repo.start_round(
+            self.session["id"], expected=False, voting_round=0
+        )
+        self.repo.cast_vote(
+            self.session["id"], participant["id"], vote, voting_round=voting_round
+        )
+
+        self.assertEqual(
+            self.repo.get_participant_in_session(self.session["id"], participant["id"])[
+                "vote"
+            ],
+            vote,
+        )
+
+        self.repo.start_round(self.session["id"])
+
+        self.assertIsNone(self.repo.get(self.session["id"])["participants"][0]["vote"])
+
+    def test_cast_vote_rejected(self):
+        participant = self.add_participant()
+
+        with self.assertRaises(Exception) as context:
+            self.repo.cast_vote(
+                self.session["id"], participant["id"], {"points": 1, "abstained": False}
+            )
+
+        self.assertEqual(
+            str(context.exception),
+            f"session with id {self.session['id']} is not accepting votes",
+        )
+
+        self.repo.start_round(self.session["id"])
+
+        vote = {"points": 3, "abstained": False}
+
+        with self.assertRaises(ConflictError):
+            self.repo.cast_vote(
+                self.session["id"],
+                participant["id"],
+                None,
+                voting_round=1,
+                tally=tally_delta(vote, None),
+                previous=vote,
+            )
+
+        with self.assertRaises(ConflictError):
+            self.repo.remove_participant(
+                self.session["id"],
+                participant["id"],
+                tally=tally_delta(vote, None),
+                voting_round=1,
+                previous=vote,
+            )
+
+        with self.assertRaises(Exception) as context:
+            self.repo.cast_vote(
+                self.session["id"], "bogus", None, voting_round=1,
+            )
+
+        self.assertEqual(
+            str(context.exception),
+            f"participant with id bogus is not part of session with id {self.session['id']}",
+        )
+
+    def test_set_voting_state_conflict(self):
+        self.repo.set_voting_state(self.session["id"], True, expected=False)
+
+        with self.assertRaises(Exception) as context:
+            self.repo.set_voting_state(self.session["id"], True, expected=False)
+
+        self.assertEqual(
+            str(context.exception),
+            f"voting state of session with id {self.session['id']} changed concurrently",
+        )
+
+    def test_concurrent_joins(self):
+        threads = [Thread(target=self.add_participant) for _ in range(20)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.repo.get(self.session["id"])["participants"]), 20)
+
+    def test_versioned_writes(self):
+        participant = participant_factory()
+
+        self.assertEqual(
+            self.repo.add_participant(self.session["id"], participant, 0, version=0), 1
+        )
+
+        with self.assertRaises(ConflictError):
+            self.repo.remove_participant(
+                self.session["id"], participant["id"], version=0
+            )
+
+        self.assertEqual(
+            self.repo.remove_participant(
+                self.session["id"], participant["id"], version=1
+            ),
+            2,
+        )
+        self.assertEqual(self.repo.get(self.session["id"])["version"], 2)
+
+    def test_every_write_moves_the_version(self):
+        session_id = self.session["id"]
+        participant = self.add_participant()
+
+        self.assertEqual(self.repo.get_version(session_id), 1)
+
+        self.repo.start_round(session_id)
+        self.repo.cast_vote(session_id, participant["id"], None, voting_round=1)
+        self.repo.set_voting_state(session_id, False)
+        self.assertEqual(self.repo.set_reviewing_issue(session_id, {"title": "a"}), 5)
+
+        self.assertEqual(self.repo.get_version(session_id), 5)
+        self.assertIsNone(self.repo.get_version("bogus"))
+
+    def test_unversioned_writes_require_the_session(self):
+        with self.assertRaises(Exception) as context:
+            self.repo.add_participant("bogus", participant_factory(), 0)
+
+        self.assertEqual(str(context.exception), "session with id bogus not found")
+
+        with self.assertRaises(Exception) as context:
+            self.repo.set_vote(self.session["id"], "bogus", None)
+
+        self.assertEqual(str(context.exception), "resource not found")
+
+    def test_tally(self):
+        session_id = self.session["id"]
+        participant = self.add_participant()
+
+        voting_round = self.repo.start_round(session_id)
+
+        self.repo.cast_vote(
+            session_id,
+            participant["id"],
+            {"points": 5, "abstained": False},
+            voting_round=voting_round,
+            tally=tally_delta(None, {"points": 5, "abstained": False}),
+        )
+
+        tally = self.repo.get(session_id)["tally"]
+
+        self.assertEqual(
+            (tally["count"], tally["sum"], tally["consensus"]), (1, 5, True)
+        )
+        self.assertEqual(len(tally["histogram"]), 13)
+
+        self.repo.start_round(session_id)
+
+        self.assertEqual(self.repo.get(session_id)["tally"]["count"], 0)
+
+    def test_remove_participant_moves_tally(self):
+        session_id = self.session["id"]
+        participant = self.add_participant()
+        vote = {"points": 5, "abstained": False}
+
+        voting_round = self.repo.start_round(session_id)
+        self.repo.cast_vote(
+            session_id,
+            participant["id"],
+            vote,
+            voting_round=voting_round,
+            tally=tally_delta(None, vote),
+        )
+
+        self.repo.remove_participant(
+            session_id, participant["id"], tally=tally_delta(vote, None)
+        )
+
+        tally = self.repo.get(session_id)["tally"]
+
+        self.assertEqual((tally["count"], tally["sum"]), (0, 0))
+
+    def test_voting_deadline(self):
+        session_id = self.session["id"]
+        participant = self.add_participant()
+
+        voting_round = self.repo.start_round(session_id, deadline=self.now + 30)
+
+        self.repo.cast_vote(session_id, participant["id"], None, voting_round)
+
+        self.now += 30
+
+        with self.assertRaises(Exception) as context:
+            self.repo.cast_vote(session_id, participant["id"], None, voting_round)
+
+        self.assertEqual(
+            str(context.exception),
+            f"session with id {session_id} is not accepting votes",
+        )
+
+        self.repo.set_voting_state(session_id, False)
+
+        self.assertNotIn("votingDeadline", self.repo.get(session_id))
+
+    def test_participant_directory(self):
+        participant = self.add_participant()
+        other = session_factory()
+        self.repo.create(other, record_expiration=other["expiresIn"])
+
+        self.repo.add_participant(other["id"], participant, other["expiresIn"])
+
+        self.assertEqual(
+            self.repo.get_participant(participant["id"])["sessionID"], other["id"]
+        )
+
+        self.repo.delete_session(
+            self.session["id"], participant_ids=[participant["id"]]
+        )
+
+        self.assertEqual(
+            self.repo.get_participant_sessions([participant["id"], "bogus"]),
+            {participant["id"]: other["id"]},
+        )
+
+        self.repo.delete_session(other["id"], participant_ids=[participant["id"]])
+
+        self.assertEqual(self.repo.get_participant_sessions([participant["id"]]), {})
+
+    def test_delete_participants(self):
+        participant = self.add_participant()
+        self.add_participant()
+
+        self.assertEqual(self.repo.delete_participants(self.session["id"]), 2)
+        self.assertEqual(self.repo.get(self.session["id"])["participants"], [])
+        self.assertIsNone(
+            self.repo.get_participant_in_session(self.session["id"], participant["id"])
+        )
@@ -0,0 +1,66 @@
+from unittest import TestCase
+
+from pointing_poker.repositories.items import new_tally
+from pointing_poker.repositories.models import Session, Vote
+
+
+def session_item(**attributes):
+    return {
+        "sessionID": "session",
+        "id": "session",
+        "type": "session",
+        "name": "test",
+        "pointingMin": 1,
+        "pointingMax": 3,
+        "votingStarted": True,
+        "votingRound": 2,
+        "closed": False,
+        "createdAt": 1,
+        "expiresIn": 2,
+        **attributes,
+    }
+
+
+def participant_item(participant_id, **attributes):
+    return {
+        "sessionID": "session",
+        "id": participant_id,
+        "type": "participant",
+        "name": participant_id,
+        "isModerator": False,
+        **attributes,
+    }
+
+
+class SessionTestCase(TestCase):
+    def test_from_items(self):
+        session = Session.from_items(
+            session_item(version=4, tally=new_tally()),
+            [
+                participant_item("current", points=2, abstained=False, votedRound=2),
+                participant_item("stale", points=3, abstained=False, votedRound=1),
+            ],
+        )
+
+        self.assertEqual(session.version, 4)
+        self.assertEqual(session.participant("current").vote.points, 2)
+        self.assertIsNone(session.participant("stale").vote)
+        self.assertIsNone(session.participant("bogus"))
+        self.assertEqual(session.tally["count"], 0)
+        self.assertEqual(session.reviewing_issue, {})
+
+    def test_response_round_trip(self):
+        session = Session.from_items(
+            session_item(reviewing_issue_title="IS-1"),
+            [participant_item("b"), participant_item("a")],
+        )
+        session.participant("a").vote = Vote(None, True)
+
+        response = session.to_response()
+
+        self.assertEqual([p["id"] for p in response["participants"]], ["b", "a"])
+        self.assertEqual(
+            response["participants"][1]["vote"], {"points": None, "abstained": True}
+        )
+        self.assertEqual(response["reviewingIssue"]["title"], "IS-1")
+        self.assertEqual(Session.from_response(response).to_response(), response)
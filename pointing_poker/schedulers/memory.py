@@ -0,0 +1,40 @@
+from heapq import heappop, heappush
+from threading import Lock
+from time import time
+
+
+class InMemoryRoundScheduler:
+    """In-process stand-in for RoundsSQSScheduler.
+
+    Deadlines are kept in memory and only acted on when run_due is called,
+    so timed rounds end deterministically in tests and offline runs.
+    """
+
+    def __init__(self, clock=time):
+        self.clock = clock
+
+        self._deadlines = []
+        self._lock = Lock()
+
+    def schedule(self, session_id, voting_round, deadline):
+        with self._lock:
+            heappush(self._deadlines, (deadline, session_id, voting_round))
+
+    def pending(self):
+        with self._lock:
+            return len(self._deadlines)
+
+    def run_due(self, end_round):
+        """Calls end_round(session_id, voting_round) for every deadline passed.
+
+        Returns what end_round returned for each of them, earliest first.
+        """
+        now = self.clock()
+        due = []
+
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, session_id, voting_round = heappop(self._deadlines)
+                due.append((session_id, voting_round))
+
+        return [end_round(session_id, voting_round) for session_id, voting_round in due]
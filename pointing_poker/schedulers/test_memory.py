@@ -0,0 +1,47 @@
+from unittest import TestCase
+
+from pointing_poker.repositories.memory import InMemorySessionsRepo
+from pointing_poker.schedulers.memory import InMemoryRoundScheduler
+from pointing_poker.services.sessions import SessionService
+
+
+class InMemoryRoundSchedulerTestCase(TestCase):
+    def setUp(self) -> None:
+        self.now = 100
+        self.scheduler = InMemoryRoundScheduler(clock=lambda: self.now)
+
+    def test_run_due(self):
+        self.scheduler.schedule("b", 1, 120)
+        self.scheduler.schedule("a", 2, 110)
+        self.scheduler.schedule("c", 1, 200)
+
+        self.assertEqual(self.scheduler.run_due(lambda *args: args), [])
+
+        self.now = 150
+
+        self.assertEqual(
+            self.scheduler.run_due(lambda *args: args), [("a", 2), ("b", 1)]
+        )
+        self.assertEqual(self.scheduler.pending(), 1)
+
+    def test_timed_round_ends(self):
+        service = SessionService(InMemorySessionsRepo(), scheduler=self.scheduler)
+
+        session = service.create_session(
+            {"name": "test", "pointingMin": 1, "pointingMax": 13},
+            {"id": "moderator", "name": "moderator"},
+        )
+
+        service.start_voting(session["id"], duration=30)
+
+        self.now = session["createdAt"] + 3600
+
+        (ended,) = self.scheduler.run_due(service.expire_round)
+
+        self.assertFalse(ended["votingStarted"])
+        self.assertFalse(service.session(session["id"])["votingStarted"])
+
+        service.start_voting(session["id"], duration=30)
+        service.stop_voting(session["id"])
+
+        self.assertEqual(self.scheduler.run_due(service.expire_round), [None])
@@ -0,0 +1,133 @@
+from asyncio import gather, get_running_loop
+from functools import partial
+
+from pointing_poker.repositories.aio import AsyncSessionsRepo
+
+
+class AsyncSessionService:
+    """Asyncio variant of SessionService.
+
+    Repository calls that do not depend on each other are issued together
+    on an AsyncSessionsRepo wrapping the repository of service, running them
+    on executor or at most max_concurrency at a time. Every other operation
+    runs the SessionService method as it is, as a coroutine on the same
+    thread pool.
+    """
+
+    def __init__(self, service, max_concurrency=8, executor=None):
+        self.service = service
+        self.repo = AsyncSessionsRepo(service.repo, max_concurrency, executor)
+
+    async def _run(self, func, *args, **kwargs):
+        return await get_running_loop().run_in_executor(
+            self.repo.executor, partial(func, *args, **kwargs)
+        )
+
+    def __getattr__(self, name):
+        attribute = getattr(self.service, name)
+
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        async def call(*args, **kwargs):
+            return await self._run(attribute, *args, **kwargs)
+
+        return call
+
+    async def set_vote(self, session_id, participant_id, vote, if_version=None):
+        """Like SessionService.set_vote, reading the session and participant together.
+
+        Only legacy votes read them separately; other votes read the session
+        alone, so they run SessionService.set_vote as it is.
+        """
+        if not self.service.legacy_set_vote:
+            return await self._run(
+                self.service.set_vote, session_id, participant_id, vote, if_version
+            )
+
+        session, participant = await gather(
+            self.repo.get_session(session_id),
+            self.repo.get_participant_in_session(session_id, participant_id),
+        )
+
+        return await self._run(
+            self.service.write_legacy_vote,
+            session_id,
+            participant_id,
+            vote,
+            session,
+            participant,
+            if_version,
+        )
+
+    async def sessions(self, session_ids):
+        """Reads each distinct session concurrently; missing sessions map to None."""
+        session_ids = list(dict.fromkeys(session_ids))
+
+        sessions = await gather(
+            *(self.repo.get(session_id) for session_id in session_ids)
+        )
+
+        return dict(zip(session_ids, sessions))
+
+    async def _current_session_ids(self, participant_ids):
+        if not participant_ids:
+            return {}
+
+        directory = await self.repo.get_participant_sessions(participant_ids)
+
+        missing = [
+            participant_id
+            for participant_id in dict.fromkeys(participant_ids)
+            if participant_id not in directory
+        ]
+
+        participants = await gather(
+            *(self.repo.get_participant(participant_id) for participant_id in missing)
+        )
+
+        for participant_id, participant in zip(missing, participants):
+            if participant is not None:
+                directory[participant_id] = participant["sessionID"]
+
+        return directory
+
+    async def current_sessions(self, participants):
+        """Returns the current session of each participant, or None if it has none.
+
+        The sessions of participants carrying a sessionID are read while the
+        others are looked up in the participant directory.
+        """
+        known = [
+            participant["sessionID"]
+            for participant in participants
+            if participant.get("sessionID")
+        ]
+
+        sessions, directory = await gather(
+            self.sessions(known),
+            self._current_session_ids(
+                [
+                    participant["id"]
+                    for participant in participants
+                    if not participant.get("sessionID")
+                ]
+            ),
+        )
+
+        sessions.update(
+            await self.sessions(
+                [
+                    session_id
+                    for session_id in directory.values()
+                    if session_id not in sessions
+                ]
+            )
+        )
+
+        return [
+            sessions.get(
+                participant.get("sessionID") or directory.get(participant["id"])
+            )
+            for participant in participants
+        ]
@@ -1,14 +1,180 @@
-from time import time
+from functools import partial
+from logging import getLogger
+from time import perf_counter, time
 from uuid import UUID
 
 from shortuuid import uuid
 
+from pointing_poker.repositories.errors import ConflictError
+from pointing_poker.repositories.items import (
+    MAX_POINTING_SPAN,
+    add_tally,
+    item_to_tally,
+    new_tally,
+    response_to_tally,
+    tally_delta,
+    tally_of,
+)
+from pointing_poker.repositories.models import Vote
+
+PARTICIPANT_JOINED = "PARTICIPANT_JOINED"
+PARTICIPANT_LEFT = "PARTICIPANT_LEFT"
+PARTICIPANT_VOTED = "PARTICIPANT_VOTED"
+VOTING_STATE_CHANGED = "VOTING_STATE_CHANGED"
+REVIEWING_ISSUE_CHANGED = "REVIEWING_ISSUE_CHANGED"
+SESSION_CLOSED = "SESSION_CLOSED"
+
+logger = getLogger(__name__)
+
+
+def _delta(session_id, version, kind, **changes):
+    """Describes a single change to a session.
+
+    version is the session version the change produced. Versions increase by
+    one with every change, so clients applying deltas in order can tell when
+    they missed one and need to read the whole session again.
+    """
+    return {"sessionID": session_id, "version": version, "kind": kind, **changes}
+
+
+def _moved_tally(session, delta):
+    """Returns the tally of a Session in response shape after applying delta."""
+    return item_to_tally(
+        add_tally(response_to_tally(session.tally), delta),
+        session.pointing_min,
+        session.pointing_max,
+    )
+
+
+def _check_version(session_id, version, if_version):
+    """Rejects a session read at version when the caller expected if_version.
+
+    A session at another version is not retried: the caller asked to change
+    the session only as they last saw it.
+    """
+    if if_version is not None and version != if_version:
+        raise Exception(
+            f"session with id {session_id} is at version {version}, not {if_version}"
+        )
+
+
+def _checked(session_id, session, if_version=None):
+    """Returns a Session read from the repository, which must be at if_version if given."""
+    if session is None:
+        raise Exception(f"session with id {session_id} not found")
+
+    _check_version(session_id, session.version, if_version)
+
+    return session
+
+
+def _version_after(written, read):
+    """Returns the version a write moved a session read at version read to.
+
+    Writes without ifVersion do not learn the version they produced, which
+    is then taken to be the one after read.
+    """
+    return read + 1 if written is None else written
+
+
+def _vote_of(participant):
+    return None if participant.vote is None else participant.vote.to_response()
+
+
+def _timed(call):
+    start = perf_counter()
+
+    return call(), perf_counter() - start
+
+
+def _in_round(session, voting_round):
+    return session["votingStarted"] and session.get("votingRound", 0) == voting_round
+
 
 class SessionService:
-    def __init__(self, repo):
+    def __init__(
+        self,
+        repo,
+        legacy_set_vote=False,
+        conflict_retries=3,
+        scheduler=None,
+        executor=None,
+    ):
         self.repo = repo
+        self.legacy_set_vote = legacy_set_vote
+        self.conflict_retries = conflict_retries
+        self.scheduler = scheduler
+        self.executor = executor
+
+        self.time_saved = 0.0
+        self.on_time_saved = None
+
+    def _concurrently(self, *calls):
+        """Returns the results of independent repository calls.
+
+        With an executor the calls are made at the same time on it, and the
+        wall time saved over making them one after the other is added to
+        time_saved and passed to on_time_saved.
+        """
+        if self.executor is None or len(calls) < 2:
+            return [call() for call in calls]
+
+        start = perf_counter()
+
+        results = [
+            future.result()
+            for future in [self.executor.submit(_timed, call) for call in calls]
+        ]
+
+        saved = max(
+            0.0, sum(seconds for _, seconds in results) - (perf_counter() - start)
+        )
+
+        self.time_saved += saved
+
+        if self.on_time_saved is not None:
+            self.on_time_saved(saved)
+
+        return [result for result, _ in results]
+
+    def _retrying(self, attempt):
+        """Runs attempt again when the session changed between its read and write."""
+        for _ in range(self.conflict_retries):
+            try:
+                return attempt()
+            except ConflictError:
+                pass
+
+        return attempt()
+
+    def _read(self, session_id, if_version=None):
+        """Reads the Session a vote starts from."""
+        return _checked(session_id, self.repo.get_session(session_id), if_version)
+
+    def _get(self, session_id, if_version=None):
+        """Reads the session a mutation other than a vote starts from, as a dict.
+
+        Only votes, which look their participant up by id, go through the
+        Session model; building it just to turn it into a dict costs more.
+        """
+        session = self.repo.get(session_id)
+
+        if session is None:
+            raise Exception(f"session with id {session_id} not found")
+
+        _check_version(session_id, session.get("version", 0), if_version)
+
+        return session
 
     def create_session(self, description, moderator):
+        if description["pointingMin"] > description["pointingMax"]:
+            raise Exception("pointingMin must not be greater than pointingMax")
+
+        if description["pointingMax"] - description["pointingMin"] > MAX_POINTING_SPAN:
+            raise Exception(
+                f"pointingMax must be at most {MAX_POINTING_SPAN} more than pointingMin"
+            )
+
         moderator["isModerator"] = True
 
         session_expiration = int(time() + (24 * 60 * 60))
@@ -24,24 +190,23 @@ class SessionService:
             "createdAt": int(time()),
             "expiresIn": session_expiration,
             "closed": False,
+            "version": 0,
         }
 
         self.repo.create(session, record_expiration=session_expiration)
 
         session["participants"] = [moderator]
+        session["tally"] = item_to_tally(
+            new_tally(), session["pointingMin"], session["pointingMax"]
+        )
 
-        self.repo.add_participant(
-            session_id, moderator, record_expiration=session_expiration
+        session["version"] = self.repo.add_participant(
+            session_id, moderator, record_expiration=session_expiration, version=0
         )
 
         return session
 
-    def set_reviewing_issue(self, session_id, issue):
-        session = self.repo.get(session_id)
-
-        if session is None:
-            raise Exception(f"session with id {session_id} not found")
-
+    def _set_reviewing_issue(self, session_id, issue, if_version=None):
         if not issue:
             issue = {
                 "title": None,
@@ -49,117 +214,453 @@ class SessionService:
                 "url": None,
             }
 
-        session["reviewingIssue"] = issue
+        def attempt():
+            session = self._get(session_id, if_version)
 
-        self.repo.set_reviewing_issue(session_id, session["reviewingIssue"])
+            session["reviewingIssue"] = issue
+            session["version"] = self.repo.set_reviewing_issue(
+                session_id, issue, version=if_version
+            )
 
-        return session
+            return (
+                session,
+                _delta(
+                    session_id,
+                    session["version"],
+                    REVIEWING_ISSUE_CHANGED,
+                    reviewingIssue=issue,
+                ),
+            )
 
-    def session(self, session_id):
-        session = self.repo.get(session_id)
+        return self._retrying(attempt)
+
+    def set_reviewing_issue(self, session_id, issue, if_version=None):
+        return self._set_reviewing_issue(session_id, issue, if_version)[0]
+
+    def set_reviewing_issue_delta(self, session_id, issue, if_version=None):
+        return self._set_reviewing_issue(session_id, issue, if_version)[1]
+
+    def session(self, session_id, fields=None, after=None, first=None):
+        session = self.repo.get(session_id, fields=fields, after=after, first=first)
 
         if session is None:
             raise Exception(f"session with id {session_id} not found")
 
         return session
 
-    def join_session(self, session_id, participant):
+    def _join_session(self, session_id, participant, if_version=None):
         participant["id"] = str(UUID(participant["id"], version=4))
 
-        session = self.repo.get(session_id)
-
-        if session is None:
-            raise Exception(f"session with id {session_id} not found")
-
         participant = {
             **participant,
             "isModerator": False,
         }
 
-        self.repo.add_participant(
-            session_id, participant, record_expiration=session["expiresIn"]
+        def attempt():
+            session = self._get(session_id, if_version)
+
+            session["version"] = _version_after(
+                self.repo.add_participant(
+                    session_id,
+                    participant,
+                    record_expiration=session["expiresIn"],
+                    version=if_version,
+                ),
+                session.get("version", 0),
+            )
+
+            session["participants"].append(participant)
+
+            return (
+                session,
+                _delta(
+                    session_id,
+                    session["version"],
+                    PARTICIPANT_JOINED,
+                    participant={**participant, "vote": None, "sessionID": session_id},
+                ),
+            )
+
+        return self._retrying(attempt)
+
+    def join_session(self, session_id, participant, if_version=None):
+        return self._join_session(session_id, participant, if_version)[0]
+
+    def join_session_delta(self, session_id, participant, if_version=None):
+        return self._join_session(session_id, participant, if_version)[1]
+
+    def _leave_session(self, session_id, participant_id, if_version=None):
+        def attempt():
+            session = self._get(session_id, if_version)
+
+            leaving = next(
+                (
+                    participant
+                    for participant in session["participants"]
+                    if participant["id"] == participant_id
+                ),
+                None,
+            )
+
+            if leaving is None:
+                raise Exception(
+                    f"participant with id {participant_id} is not part of session with id {session_id}"
+                )
+
+            vote = leaving.get("vote")
+
+            # The vote of a participant leaving mid-round stops counting.
+            tally = None if session.get("tally") is None else tally_delta(vote, None)
+
+            session["version"] = _version_after(
+                self.repo.remove_participant(
+                    session_id,
+                    participant_id,
+                    version=if_version,
+                    tally=tally,
+                    voting_round=session.get("votingRound", 0),
+                    previous=vote,
+                ),
+                session.get("version", 0),
+            )
+            session["participants"].remove(leaving)
+
+            if tally is not None:
+                session["tally"] = item_to_tally(
+                    add_tally(response_to_tally(session["tally"]), tally),
+                    session["pointingMin"],
+                    session["pointingMax"],
+                )
+
+            return (
+                session,
+                _delta(
+                    session_id,
+                    session["version"],
+                    PARTICIPANT_LEFT,
+                    participantID=participant_id,
+                    tally=session.get("tally"),
+                ),
+            )
+
+        return self._retrying(attempt)
+
+    def leave_session(self, session_id, participant_id, if_version=None):
+        return self._leave_session(session_id, participant_id, if_version)[0]
+
+    def leave_session_delta(self, session_id, participant_id, if_version=None):
+        return self._leave_session(session_id, participant_id, if_version)[1]
+
+    def set_vote(self, session_id, participant_id, vote, if_version=None):
+        if self.legacy_set_vote:
+            return self._legacy_set_vote(session_id, participant_id, vote, if_version)
+
+        session, _ = self._retrying(
+            lambda: self._cast_vote(session_id, participant_id, vote, if_version)
         )
 
-        session["participants"].append(participant)
+        return session.to_response()
 
-        return session
+    def set_vote_delta(self, session_id, participant_id, vote, if_version=None):
+        return self._retrying(
+            lambda: self._cast_vote(session_id, participant_id, vote, if_version)
+        )[1]
 
-    def leave_session(self, session_id, participant_id):
-        participant = self.repo.get_participant_in_session(session_id, participant_id)
+    def _cast_vote(self, session_id, participant_id, vote, if_version=None):
+        """Casts a vote; returns the Session it produced and its delta."""
+        session = self._read(session_id, if_version)
+
+        participant = session.participant(participant_id)
 
         if participant is None:
             raise Exception(
                 f"participant with id {participant_id} is not part of session with id {session_id}"
             )
 
-        self.repo.remove_participant(session_id, participant_id)
+        if session.closed:
+            raise Exception(f"session with id {session_id} is closed")
 
-        return self.repo.get(session_id)
+        if not session.voting_started:
+            raise Exception(f"voting has not started in session with id {session_id}")
 
-    def set_vote(self, session_id, participant_id, vote):
-        session = self.repo.get(session_id)
+        if session.voting_deadline is not None and time() >= session.voting_deadline:
+            raise Exception(f"voting has ended in session with id {session_id}")
 
-        if session is None:
-            raise Exception(f"session with id {session_id} not found")
+        if (
+            vote is not None
+            and vote["points"] is not None
+            and not session.pointing_min <= vote["points"] <= session.pointing_max
+        ):
+            raise Exception(
+                f"points must be between {session.pointing_min} and {session.pointing_max}"
+            )
 
-        participant = self.repo.get_participant_in_session(session_id, participant_id)
+        previous = _vote_of(participant)
+
+        # Sessions created before tallies existed get one when voting starts.
+        tally = None if session.tally is None else tally_delta(previous, vote)
+
+        # Only ifVersion guards the session version: concurrent votes each
+        # move it, and the tally stays right as long as the participant's
+        # vote is still the one the delta was computed from.
+        session.version = _version_after(
+            self.repo.cast_vote(
+                session_id,
+                participant_id,
+                vote,
+                voting_round=session.voting_round,
+                version=if_version,
+                tally=tally,
+                previous=previous,
+            ),
+            session.version,
+        )
+
+        participant.vote = Vote.from_response(vote)
+
+        if tally is not None:
+            session.tally = _moved_tally(session, tally)
+
+        return (
+            session,
+            _delta(
+                session_id,
+                session.version,
+                PARTICIPANT_VOTED,
+                participantID=participant_id,
+                vote=vote,
+                tally=session.tally,
+            ),
+        )
+
+    def _legacy_set_vote(self, session_id, participant_id, vote, if_version=None):
+        session, participant = self._concurrently(
+            lambda: self.repo.get_session(session_id),
+            lambda: self.repo.get_participant_in_session(session_id, participant_id),
+        )
+
+        return self.write_legacy_vote(
+            session_id, participant_id, vote, session, participant, if_version
+        )
+
+    def write_legacy_vote(
+        self, session_id, participant_id, vote, session, participant, if_version=None
+    ):
+        """Writes a vote read the legacy way: the session and participant separately.
+
+        session and participant are what repo.get_session and
+        repo.get_participant_in_session returned, for callers that read them
+        on their own, like AsyncSessionService.
+        """
+        session = _checked(session_id, session, if_version)
 
         if participant is None:
             raise Exception(
                 f"participant with id {participant_id} is not part of session with id {session_id}"
             )
 
-        self.repo.set_vote(session_id, participant_id, vote)
+        tally = (
+            None if session.tally is None else tally_delta(participant["vote"], vote)
+        )
+
+        version = self.repo.set_vote(
+            session_id,
+            participant_id,
+            vote,
+            voting_round=session.voting_round,
+            version=if_version,
+            tally=tally,
+        )
 
-        participant_idx = [
-            i
-            for i, value in enumerate(session["participants"])
-            if value["id"] == participant_id
-        ][0]
+        if version is not None:
+            session.version = version
 
-        session["participants"][participant_idx]["vote"] = vote
+        if tally is not None:
+            session.tally = _moved_tally(session, tally)
 
-        return session
+        member = session.participant(participant_id)
 
-    def start_voting(self, session_id: str):
-        session = self.repo.get(session_id)
+        if member is not None:
+            member.vote = Vote.from_response(vote)
 
-        if session is None:
-            raise Exception(f"session with id {session_id} not found")
+        return session.to_response()
+
+    def start_voting(self, session_id: str, if_version=None, duration=None):
+        """Starts a voting round, which ends by itself after duration seconds if given.
+
+        Votes are rejected past the deadline of a timed round; the scheduler,
+        when there is one, stops the round then. The new round's tally comes
+        from the moderator votes read, so the write is guarded by the session
+        version and retried with a fresh read when anything else lands first.
+        """
+        if duration is not None and duration <= 0:
+            raise Exception("durationInSecs must be greater than 0")
+
+        deadline = None if duration is None else int(time()) + duration
+
+        def attempt():
+            session = self._get(session_id, if_version)
+
+            version = session.get("version", 0)
+
+            # Moderator votes carry over into the new round, and so does their tally.
+            tally = tally_of(
+                participant["vote"]
+                for participant in session["participants"]
+                if participant["isModerator"] and participant.get("vote") is not None
+            )
+
+            session["votingRound"] = self.repo.start_round(
+                session_id,
+                expected=session["votingStarted"],
+                voting_round=session.get("votingRound", 0),
+                version=version,
+                tally=tally,
+                deadline=deadline,
+            )
+
+            for participant in session["participants"]:
+                if not participant["isModerator"]:
+                    participant["vote"] = None
+
+            session["tally"] = item_to_tally(
+                tally, session["pointingMin"], session["pointingMax"]
+            )
+
+            session["votingStarted"] = True
+            session["votingDeadline"] = deadline
+            session["version"] = version + 1
 
-        self.repo.set_voting_state(session_id, True)
+            return session
 
-        for idx, participant in enumerate(session["participants"]):
-            if not participant["isModerator"]:
-                session["participants"][idx]["vote"] = None
-                self.repo.set_vote(session_id, participant["id"], None)
+        session = self._retrying(attempt)
 
-        session["votingStarted"] = True
+        if deadline is not None and self.scheduler is not None:
+            self.scheduler.schedule(session_id, session["votingRound"], deadline)
 
         return session
 
-    def stop_voting(self, session_id: str):
-        session = self.repo.get(session_id)
+    def start_voting_delta(self, session_id: str, if_version=None, duration=None):
+        session = self.start_voting(session_id, if_version, duration)
 
-        if session is None:
-            raise Exception(f"session with id {session_id} not found")
+        return _delta(
+            session_id,
+            session["version"],
+            VOTING_STATE_CHANGED,
+            votingStarted=True,
+            votingDeadline=session["votingDeadline"],
+            tally=session["tally"],
+        )
 
-        self.repo.set_voting_state(session_id, False)
+    def _stop_voting(self, session, if_version=None):
+        """Stops voting in the round session was read in.
+
+        Only the voting state and round guard the write, which moves the
+        session to its next version whatever it is at by then: votes, joins
+        and leaves landing after the read do not keep the moderator from
+        stopping the round. With if_version the session must still be at it.
+        """
+        session.pop("votingDeadline", None)
+        session.update(
+            self.repo.set_voting_state(
+                session["id"],
+                False,
+                expected=session["votingStarted"],
+                voting_round=session.get("votingRound", 0),
+                version=if_version,
+            )
+        )
 
-        return self.repo.get(session_id)
+        return session
 
-    def close_session(self, session_id: str):
-        session = self.repo.get(session_id)
+    def stop_voting(self, session_id: str, if_version=None, voting_round=None):
+        """Stops voting; with voting_round, only while that round is still on.
 
-        if session is None:
-            raise Exception(f"session with id {session_id} not found")
+        Stopping a given round is retried when the session changes in the
+        meantime, since the round check keeps it from stopping a later one.
+        """
+        if voting_round is None:
+            return self._stop_voting(self._get(session_id, if_version), if_version)
+
+        def attempt():
+            session = self._get(session_id, if_version)
+
+            if not _in_round(session, voting_round):
+                raise Exception(
+                    f"voting round {voting_round} of session with id {session_id} is over"
+                )
+
+            return self._stop_voting(session, if_version)
+
+        return self._retrying(attempt)
+
+    def expire_round(self, session_id: str, voting_round):
+        """Stops a timed round whose deadline passed.
+
+        Returns None when the round already ended some other way.
+        """
+
+        def attempt():
+            session = self.repo.get(session_id)
+
+            if session is None or not _in_round(session, voting_round):
+                return None
+
+            return self._stop_voting(session)
 
-        self.repo.delete_session(session_id)
+        return self._retrying(attempt)
 
-        session["closed"] = True
+    def stop_voting_delta(self, session_id: str, if_version=None, voting_round=None):
+        session = self.stop_voting(session_id, if_version, voting_round)
+
+        return _delta(
+            session_id, session["version"], VOTING_STATE_CHANGED, votingStarted=False
+        )
+
+    def close_session(self, session_id: str, if_version=None):
+        def attempt():
+            session = self._get(session_id, if_version)
+
+            self.repo.delete_session(
+                session_id,
+                version=if_version,
+                participant_ids=[p["id"] for p in session["participants"]],
+            )
+
+            session["closed"] = True
+            session["version"] = session.get("version", 0) + 1
+
+            return session
+
+        session = self._retrying(attempt)
+
+        start = perf_counter()
+
+        try:
+            deleted = self.repo.delete_participants(session_id)
+        except Exception:
+            # The session is closed either way; participant items left
+            # behind expire with their ttl.
+            logger.exception(
+                "failed to delete participants of session with id %s after %.3f s",
+                session_id,
+                perf_counter() - start,
+            )
+        else:
+            logger.info(
+                "deleted %s participants of session with id %s in %.3f s",
+                deleted,
+                session_id,
+                perf_counter() - start,
+            )
 
         return session
 
+    def close_session_delta(self, session_id: str, if_version=None):
+        session = self.close_session(session_id, if_version)
+
+        return _delta(session_id, session["version"], SESSION_CLOSED, closed=True)
+
     def participant(self, participant_id: str):
         participant = self.repo.get_participant(participant_id)
 
@@ -167,3 +668,17 @@ class SessionService:
             raise Exception(f"participant with id {participant_id} was not found")
 
         return participant
+
+    def participant_sessions(self, participant_ids):
+        """Maps participant ids to the id of their current session, if any."""
+        return self.repo.get_participant_sessions(participant_ids)
+
+    def sessions(self, session_ids):
+        """Reads each distinct session once; missing sessions map to None."""
+        session_ids = list(dict.fromkeys(session_ids))
+
+        sessions = self._concurrently(
+            *[partial(self.repo.get, session_id) for session_id in session_ids]
+        )
+
+        return dict(zip(session_ids, sessions))
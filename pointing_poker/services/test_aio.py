@@ -0,0 +1,73 @@
+from asyncio import run
+from unittest import TestCase
+from uuid import uuid4
+
+from pointing_poker.repositories.memory import InMemorySessionsRepo
+from pointing_poker.services.aio import AsyncSessionService
+from pointing_poker.services.sessions import SessionService
+
+
+class AsyncSessionServiceTestCase(TestCase):
+    def setUp(self) -> None:
+        self.service = SessionService(InMemorySessionsRepo(), legacy_set_vote=True)
+        self.async_service = AsyncSessionService(self.service, max_concurrency=4)
+
+        self.session = self.service.create_session(
+            {"name": "test", "pointingMin": 1, "pointingMax": 13},
+            {"id": str(uuid4()), "name": "moderator"},
+        )
+
+        self.participant = {"id": str(uuid4()), "name": "participant"}
+        self.service.join_session(self.session["id"], self.participant)
+
+    def test_set_vote(self):
+        session_id = self.session["id"]
+        vote = {"points": 5, "abstained": False}
+
+        run(self.async_service.start_voting(session_id))
+
+        session = run(
+            self.async_service.set_vote(session_id, self.participant["id"], vote)
+        )
+
+        voted = {p["id"]: p["vote"] for p in session["participants"]}
+
+        self.assertEqual(voted[self.participant["id"]], vote)
+        self.assertEqual(session["tally"]["count"], 1)
+        self.assertEqual(
+            self.service.session(session_id)["tally"]["count"], 1,
+        )
+
+    def test_set_vote_checks_the_version(self):
+        with self.assertRaises(Exception) as context:
+            run(
+                self.async_service.set_vote(
+                    self.session["id"], self.participant["id"], None, if_version=0
+                )
+            )
+
+        self.assertEqual(
+            str(context.exception),
+            f"session with id {self.session['id']} is at version 2, not 0",
+        )
+
+    def test_current_sessions(self):
+        other = self.service.create_session(
+            {"name": "other", "pointingMin": 1, "pointingMax": 13},
+            {"id": str(uuid4()), "name": "moderator"},
+        )
+
+        sessions = run(
+            self.async_service.current_sessions(
+                [
+                    {"id": self.participant["id"]},
+                    {"id": "bogus"},
+                    {"id": other["participants"][0]["id"], "sessionID": other["id"]},
+                ]
+            )
+        )
+
+        self.assertEqual(
+            [session and session["id"] for session in sessions],
+            [self.session["id"], None, other["id"]],
+        )
@@ -1,10 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
 from unittest import TestCase
-from unittest.mock import Mock
-from time import time
+from unittest.mock import ANY, Mock, patch
+from time import sleep, time
 from uuid import uuid4
 
 from shortuuid import uuid
 
+from pointing_poker.repositories.errors import ConflictError
+from pointing_poker.repositories.items import item_to_tally, new_tally
+from pointing_poker.repositories.memory import InMemorySessionsRepo
+from pointing_poker.repositories.models import Session
 from pointing_poker.services.sessions import SessionService
 
 
@@ -25,12 +31,41 @@ def session_factory():
 class SessionsServiceTestCase(TestCase):
     def setUp(self) -> None:
         self.repo = Mock()
+        self.repo.get_session.side_effect = self._get_session
         self.service = SessionService(self.repo)
 
+    def _get_session(self, session_id):
+        session = self.repo.get(session_id)
+
+        return None if session is None else Session.from_response(session)
+
+    def test_create_session_checks_pointing_range(self):
+        moderator = {"id": "id", "name": "test"}
+
+        for (pointing_min, pointing_max), message in [
+            ((5, 1), "pointingMin must not be greater than pointingMax"),
+            ((0, 101), "pointingMax must be at most 100 more than pointingMin"),
+        ]:
+            with self.assertRaises(Exception) as context:
+                self.service.create_session(
+                    {
+                        "name": "test",
+                        "pointingMin": pointing_min,
+                        "pointingMax": pointing_max,
+                    },
+                    moderator,
+                )
+
+            self.assertEqual(str(context.exception), message)
+
+        self.repo.create.assert_not_called()
+
     def test_create_session(self):
         description = {"name": "test", "pointingMax": 100, "pointingMin": 1}
         moderator = {"id": "id", "name": "test"}
 
+        self.repo.add_participant.return_value = 1
+
         session = self.service.create_session(
             description=description, moderator=moderator
         )
@@ -54,8 +89,12 @@ class SessionsServiceTestCase(TestCase):
         self.assertTrue(participant["isModerator"])
 
         self.repo.add_participant.assert_called_with(
-            session["id"], participant, record_expiration=session["expiresIn"]
+            session["id"],
+            participant,
+            record_expiration=session["expiresIn"],
+            version=0,
         )
+        self.assertEqual(session["version"], 1)
 
     def test_set_reviewing_issue(self):
         issue = {
@@ -72,7 +111,9 @@ class SessionsServiceTestCase(TestCase):
 
         self.repo.get.assert_called_with(expected_session["id"])
 
-        self.repo.set_reviewing_issue.assert_called_with(expected_session["id"], issue)
+        self.repo.set_reviewing_issue.assert_called_with(
+            expected_session["id"], issue, version=None
+        )
 
         self.assertEqual(session["reviewingIssue"]["title"], issue["title"])
         self.assertEqual(session["reviewingIssue"]["description"], issue["description"])
@@ -97,7 +138,9 @@ class SessionsServiceTestCase(TestCase):
         session = self.service.set_reviewing_issue(expected_session["id"], issue)
 
         self.repo.set_reviewing_issue.assert_called_with(
-            expected_session["id"], {"title": None, "description": None, "url": None}
+            expected_session["id"],
+            {"title": None, "description": None, "url": None},
+            version=None,
         )
 
         self.assertEqual(session["reviewingIssue"]["title"], None)
@@ -111,10 +154,25 @@ class SessionsServiceTestCase(TestCase):
 
         session = self.service.session(expected_session["id"])
 
-        self.repo.get.assert_called_with(expected_session["id"])
+        self.repo.get.assert_called_with(
+            expected_session["id"], fields=None, after=None, first=None
+        )
 
         self.assertEqual(expected_session, session)
 
+    def test_session_page(self):
+        expected_session = session_factory()
+
+        self.repo.get.return_value = expected_session
+
+        self.service.session(
+            expected_session["id"], fields=["id", "participants"], after="a", first=5
+        )
+
+        self.repo.get.assert_called_with(
+            expected_session["id"], fields=["id", "participants"], after="a", first=5
+        )
+
     def test_session_not_found(self):
         self.repo.session.return_value = None
 
@@ -158,22 +216,70 @@ class SessionsServiceTestCase(TestCase):
     def test_leave_session(self):
         expected_session = session_factory()
 
-        participant = {"id": str(uuid4())}
+        participant = {"id": str(uuid4()), "name": "test", "isModerator": False}
+
+        expected_session["participants"].append(participant)
 
         self.repo.get.return_value = expected_session
+        self.repo.remove_participant.return_value = 1
 
-        self.service.leave_session(expected_session["id"], participant["id"])
+        session = self.service.leave_session(expected_session["id"], participant["id"])
 
-        self.repo.get_participant_in_session.assert_called_with(
+        self.repo.remove_participant.assert_called_with(
+            expected_session["id"],
+            participant["id"],
+            version=None,
+            tally=None,
+            voting_round=0,
+            previous=None,
+        )
+
+        self.assertNotIn(
+            participant["id"], [member["id"] for member in session["participants"]]
+        )
+        self.assertEqual(session["version"], 1)
+
+    def test_leave_session_moves_tally(self):
+        expected_session = {
+            **session_factory(),
+            "pointingMin": 1,
+            "pointingMax": 3,
+            "votingStarted": True,
+            "tally": item_to_tally(
+                {"count": 1, "sum": 2, "abstentions": 0, "histogram": {"2": 1}}, 1, 3
+            ),
+        }
+
+        participant = {
+            "id": str(uuid4()),
+            "name": "test",
+            "isModerator": False,
+            "vote": {"points": 2, "abstained": False},
+        }
+
+        expected_session["participants"].append(participant)
+
+        self.repo.get.return_value = expected_session
+        self.repo.remove_participant.return_value = 1
+
+        delta = self.service.leave_session_delta(
             expected_session["id"], participant["id"]
         )
 
         self.repo.remove_participant.assert_called_with(
-            expected_session["id"], participant["id"]
+            expected_session["id"],
+            participant["id"],
+            version=None,
+            tally={"count": -1, "sum": -2, "abstentions": 0, "histogram": {"2": -1}},
+            voting_round=0,
+            previous={"points": 2, "abstained": False},
         )
 
+        self.assertEqual(delta["tally"]["count"], 0)
+        self.assertEqual(delta["tally"]["histogram"][1], {"points": 2, "count": 0})
+
     def test_leave_session_session_not_found(self):
-        self.repo.get_participant_in_session.return_value = None
+        self.repo.get.return_value = session_factory()
 
         self.assertRaises(
             Exception,
@@ -182,6 +288,205 @@ class SessionsServiceTestCase(TestCase):
         )
 
     def test_set_vote(self):
+        expected_session = {
+            **session_factory(),
+            "pointingMin": 1,
+            "pointingMax": 100,
+            "votingStarted": True,
+        }
+
+        participant = {
+            "id": str(uuid4()),
+            "isModerator": False,
+            "vote": {"points": 1, "abstained": False},
+        }
+
+        expected_session["participants"].append(participant)
+
+        self.repo.get.return_value = expected_session
+
+        vote = {"points": 8, "abstained": False}
+
+        session = self.service.set_vote(expected_session["id"], participant["id"], vote)
+
+        self.assertEqual(session["participants"][1]["vote"], vote)
+
+        self.repo.get.assert_called_once_with(expected_session["id"])
+
+        self.repo.get_participant_in_session.assert_not_called()
+
+        self.repo.cast_vote.assert_called_with(
+            expected_session["id"],
+            participant["id"],
+            vote,
+            voting_round=0,
+            version=None,
+            tally=None,
+            previous={"points": 1, "abstained": False},
+        )
+
+    def test_timed_round(self):
+        scheduler = Mock()
+        self.service = SessionService(self.repo, scheduler=scheduler)
+
+        session = session_factory()
+
+        self.repo.get.return_value = session
+        self.repo.start_round.return_value = 2
+
+        with patch("pointing_poker.services.sessions.time", return_value=1000.5):
+            result = self.service.start_voting(session["id"], duration=30)
+
+        self.assertEqual(result["votingDeadline"], 1030)
+        self.assertEqual(self.repo.start_round.call_args[1]["deadline"], 1030)
+        scheduler.schedule.assert_called_once_with(session["id"], 2, 1030)
+
+        self.assertRaises(
+            Exception, lambda: self.service.start_voting(session["id"], duration=0)
+        )
+
+    def test_set_vote_past_deadline(self):
+        session = {
+            **session_factory(),
+            "votingStarted": True,
+            "votingDeadline": int(time()) - 1,
+        }
+
+        self.repo.get.return_value = session
+
+        with self.assertRaises(Exception) as context:
+            self.service.set_vote(session["id"], session["participants"][0]["id"], None)
+
+        self.assertEqual(
+            str(context.exception),
+            f"voting has ended in session with id {session['id']}",
+        )
+        self.repo.cast_vote.assert_not_called()
+
+    def test_stop_voting_round(self):
+        session = {
+            **session_factory(),
+            "votingStarted": True,
+            "votingRound": 2,
+            "votingDeadline": 1030,
+        }
+
+        self.repo.get.side_effect = lambda session_id: dict(session)
+        self.repo.set_voting_state.return_value = {"votingStarted": False}
+
+        with self.assertRaises(Exception) as context:
+            self.service.stop_voting(session["id"], voting_round=1)
+
+        self.assertEqual(
+            str(context.exception),
+            f"voting round 1 of session with id {session['id']} is over",
+        )
+        self.assertIsNone(self.service.expire_round(session["id"], 1))
+        self.repo.set_voting_state.assert_not_called()
+
+        result = self.service.expire_round(session["id"], 2)
+
+        self.assertFalse(result["votingStarted"])
+        self.assertNotIn("votingDeadline", result)
+        self.repo.set_voting_state.assert_called_once_with(
+            session["id"], False, expected=True, voting_round=2, version=None
+        )
+
+    def test_set_vote_moves_tally(self):
+        session = {
+            **session_factory(),
+            "pointingMin": 1,
+            "pointingMax": 3,
+            "votingStarted": True,
+            "tally": item_to_tally(
+                {"count": 1, "sum": 2, "abstentions": 0, "histogram": {"2": 1}}, 1, 3
+            ),
+        }
+
+        participant = {
+            "id": str(uuid4()),
+            "isModerator": False,
+            "vote": {"points": 2, "abstained": False},
+        }
+
+        session["participants"].append(participant)
+
+        self.repo.get.return_value = session
+
+        result = self.service.set_vote(
+            session["id"], participant["id"], {"points": 3, "abstained": False}
+        )
+
+        self.assertEqual(
+            self.repo.cast_vote.call_args[1]["tally"],
+            {"count": 0, "sum": 1, "abstentions": 0, "histogram": {"2": -1, "3": 1}},
+        )
+        self.assertEqual(result["tally"]["min"], 3)
+        self.assertEqual(result["tally"]["mean"], 3)
+        self.assertEqual(
+            [bucket["count"] for bucket in result["tally"]["histogram"]], [0, 0, 1]
+        )
+
+    def test_set_vote_voting_not_started(self):
+        session = session_factory()
+
+        participant = {"id": str(uuid4()), "isModerator": False, "vote": None}
+
+        session["participants"].append(participant)
+
+        self.repo.get.return_value = session
+
+        with self.assertRaises(Exception) as ctx:
+            self.service.set_vote(
+                session["id"], participant["id"], {"points": 1, "abstained": False}
+            )
+
+        self.assertEqual(
+            ctx.exception.args[0],
+            f"voting has not started in session with id {session['id']}",
+        )
+
+        self.repo.cast_vote.assert_not_called()
+
+    def test_set_vote_points_out_of_range(self):
+        session = {
+            **session_factory(),
+            "pointingMin": 1,
+            "pointingMax": 13,
+            "votingStarted": True,
+        }
+
+        participant = {"id": str(uuid4()), "isModerator": False, "vote": None}
+
+        session["participants"].append(participant)
+
+        self.repo.get.return_value = session
+
+        with self.assertRaises(Exception) as ctx:
+            self.service.set_vote(
+                session["id"], participant["id"], {"points": 20, "abstained": False}
+            )
+
+        self.assertEqual(ctx.exception.args[0], "points must be between 1 and 13")
+
+        self.repo.cast_vote.assert_not_called()
+
+    def test_set_vote_not_in_session(self):
+        session = {**session_factory(), "votingStarted": True}
+
+        self.repo.get.return_value = session
+
+        with self.assertRaises(Exception) as ctx:
+            self.service.set_vote(session["id"], "bogus", None)
+
+        self.assertEqual(
+            ctx.exception.args[0],
+            f"participant with id bogus is not part of session with id {session['id']}",
+        )
+
+    def test_legacy_set_vote(self):
+        self.service = SessionService(self.repo, legacy_set_vote=True)
+
         expected_session = session_factory()
 
         participant = {
@@ -210,7 +515,62 @@ class SessionsServiceTestCase(TestCase):
         )
 
         self.repo.set_vote.assert_called_with(
-            expected_session["id"], participant["id"], vote
+            expected_session["id"],
+            participant["id"],
+            vote,
+            voting_round=0,
+            version=None,
+            tally=None,
+        )
+
+    def test_if_version_mismatch(self):
+        session = {**session_factory(), "version": 3}
+
+        self.repo.get.return_value = session
+
+        with self.assertRaises(Exception) as context:
+            self.service.stop_voting(session["id"], if_version=2)
+
+        self.assertEqual(
+            str(context.exception),
+            f"session with id {session['id']} is at version 3, not 2",
+        )
+
+        self.repo.get.assert_called_once_with(session["id"])
+        self.repo.set_voting_state.assert_not_called()
+
+    def test_if_version_is_not_retried(self):
+        session = {**session_factory(), "version": 3}
+
+        self.repo.get.side_effect = [session, {**session, "version": 4}]
+        self.repo.set_reviewing_issue.side_effect = ConflictError("changed")
+
+        with self.assertRaises(Exception) as context:
+            self.service.set_reviewing_issue(session["id"], None, if_version=3)
+
+        self.assertNotIsInstance(context.exception, ConflictError)
+        self.assertEqual(self.repo.set_reviewing_issue.call_count, 1)
+
+    def test_legacy_set_vote_if_version(self):
+        self.service = SessionService(self.repo, legacy_set_vote=True)
+
+        session = {**session_factory(), "version": 2}
+
+        self.repo.get.return_value = session
+        self.repo.set_vote.return_value = 3
+
+        result = self.service.set_vote(
+            session["id"], session["participants"][0]["id"], None, if_version=2
+        )
+
+        self.assertEqual(result["version"], 3)
+        self.repo.set_vote.assert_called_with(
+            session["id"],
+            session["participants"][0]["id"],
+            None,
+            voting_round=0,
+            version=2,
+            tally=None,
         )
 
     def test_set_vote_session_not_found(self):
@@ -248,15 +608,28 @@ class SessionsServiceTestCase(TestCase):
 
         self.repo.get.return_value = expected_session
 
+        self.repo.start_round.return_value = 3
+
         session = self.service.start_voting(expected_session["id"])
 
         self.repo.get.assert_called_with(expected_session["id"])
 
-        self.repo.set_voting_state.assert_called_with(expected_session["id"], True)
+        self.repo.start_round.assert_called_once_with(
+            expected_session["id"],
+            expected=False,
+            voting_round=0,
+            version=0,
+            tally=new_tally(),
+            deadline=None,
+        )
+
+        self.repo.set_vote.assert_not_called()
 
         self.assertTrue(session["votingStarted"])
 
-        self.assertNotIn("vote", session["participants"][0])
+        self.assertEqual(session["votingRound"], 3)
+
+        self.assertIsNone(session["participants"][0].get("vote"))
 
         self.assertIsNone(session["participants"][1]["vote"])
 
@@ -270,17 +643,34 @@ class SessionsServiceTestCase(TestCase):
         )
 
     def test_stop_voting(self):
-        expected_session = session_factory()
+        expected_session = {
+            **session_factory(),
+            "votingStarted": True,
+            "votingRound": 2,
+        }
 
         self.repo.get.return_value = expected_session
 
+        self.repo.set_voting_state.return_value = {
+            "id": expected_session["id"],
+            "votingStarted": False,
+            "votingRound": 2,
+            "reviewingIssue": {},
+        }
+
         session = self.service.stop_voting(expected_session["id"])
 
-        self.repo.get.assert_called_with(expected_session["id"])
+        self.repo.get.assert_called_once_with(expected_session["id"])
 
-        self.repo.set_voting_state.assert_called_with(expected_session["id"], False)
+        self.repo.set_voting_state.assert_called_with(
+            expected_session["id"], False, expected=True, voting_round=2, version=None
+        )
 
         self.assertFalse(session["votingStarted"])
+        self.assertEqual(
+            [participant["id"] for participant in session["participants"]],
+            [participant["id"] for participant in expected_session["participants"]],
+        )
 
     def test_stop_voting_session_not_found(self):
         self.repo.get.return_value = None
@@ -300,7 +690,11 @@ class SessionsServiceTestCase(TestCase):
 
         self.repo.get.assert_called_with(expected_session["id"])
 
-        self.repo.delete_session.assert_called_with(expected_session["id"])
+        self.repo.delete_session.assert_called_with(
+            expected_session["id"],
+            version=None,
+            participant_ids=[expected_session["participants"][0]["id"]],
+        )
 
         self.assertTrue(session["closed"])
 
@@ -334,3 +728,358 @@ class SessionsServiceTestCase(TestCase):
             lambda: self.service.participant("bogus"),
             msg="participant with id bogus not found",
         )
+
+    def test_sessions(self):
+        first = session_factory()
+        second = session_factory()
+
+        self.repo.get.side_effect = lambda session_id: {
+            first["id"]: first,
+            second["id"]: second,
+        }.get(session_id)
+
+        sessions = self.service.sessions(
+            [first["id"], second["id"], first["id"], "bogus"]
+        )
+
+        self.assertEqual(
+            sessions, {first["id"]: first, second["id"]: second, "bogus": None}
+        )
+
+        self.assertEqual(self.repo.get.call_count, 3)
+
+    def test_concurrent_repo_calls(self):
+        barrier = Barrier(2, timeout=5)
+        session = session_factory()
+        participant = session["participants"][0]
+
+        def wait(value):
+            barrier.wait()
+            sleep(0.01)
+
+            return value
+
+        self.repo.get.side_effect = lambda session_id: wait(session)
+        self.repo.get_participant_in_session.side_effect = lambda *_: wait(
+            {**participant, "vote": None}
+        )
+
+        saved = []
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.service = SessionService(
+                self.repo, legacy_set_vote=True, executor=executor
+            )
+            self.service.on_time_saved = saved.append
+
+            self.service.set_vote(session["id"], participant["id"], None)
+
+        self.assertGreater(self.service.time_saved, 0)
+        self.assertEqual(saved, [self.service.time_saved])
+
+    def test_set_vote_delta(self):
+        expected_session = {
+            **session_factory(),
+            "pointingMin": 1,
+            "pointingMax": 100,
+            "votingStarted": True,
+            "version": 4,
+        }
+
+        participant = {"id": str(uuid4()), "isModerator": False, "vote": None}
+
+        expected_session["participants"].append(participant)
+
+        self.repo.get.return_value = expected_session
+        self.repo.cast_vote.return_value = 5
+
+        vote = {"points": 8, "abstained": False}
+
+        delta = self.service.set_vote_delta(
+            expected_session["id"], participant["id"], vote
+        )
+
+        self.assertEqual(
+            delta,
+            {
+                "sessionID": expected_session["id"],
+                "version": 5,
+                "kind": "PARTICIPANT_VOTED",
+                "participantID": participant["id"],
+                "vote": vote,
+                "tally": None,
+            },
+        )
+
+    def test_set_vote_retries_on_conflict(self):
+        expected_session = {
+            **session_factory(),
+            "pointingMin": 1,
+            "pointingMax": 100,
+            "votingStarted": True,
+        }
+
+        participant = {"id": str(uuid4()), "isModerator": False, "vote": None}
+
+        expected_session["participants"].append(participant)
+
+        self.repo.get.side_effect = lambda session_id: {
+            **expected_session,
+            "version": self.repo.get.call_count,
+        }
+        self.repo.cast_vote.side_effect = [ConflictError("changed"), 3]
+
+        vote = {"points": 8, "abstained": False}
+
+        session = self.service.set_vote(expected_session["id"], participant["id"], vote)
+
+        self.assertEqual(session["version"], 3)
+        self.assertEqual(self.repo.get.call_count, 2)
+        self.repo.cast_vote.assert_called_with(
+            expected_session["id"],
+            participant["id"],
+            vote,
+            voting_round=0,
+            version=None,
+            tally=None,
+            previous=None,
+        )
+
+    def test_conflict_retries_are_bounded(self):
+        self.repo.get.return_value = session_factory()
+        self.repo.set_reviewing_issue.side_effect = ConflictError("changed")
+
+        service = SessionService(self.repo, conflict_retries=2)
+
+        self.assertRaises(
+            ConflictError, lambda: service.set_reviewing_issue("id", {"title": "IS-1"})
+        )
+        self.assertEqual(self.repo.set_reviewing_issue.call_count, 3)
+
+    def test_join_session_delta(self):
+        participant = {"id": str(uuid4()), "name": "test"}
+
+        expected_session = session_factory()
+
+        self.repo.get.return_value = expected_session
+        self.repo.add_participant.return_value = 1
+
+        delta = self.service.join_session_delta(expected_session["id"], participant)
+
+        self.assertEqual(delta["kind"], "PARTICIPANT_JOINED")
+        self.assertEqual(delta["version"], 1)
+        self.assertEqual(
+            delta["participant"],
+            {
+                **participant,
+                "isModerator": False,
+                "vote": None,
+                "sessionID": expected_session["id"],
+            },
+        )
+
+    def test_voting_state_deltas(self):
+        self.repo.get.return_value = {**session_factory(), "version": 2}
+        self.repo.start_round.return_value = 1
+
+        delta = self.service.start_voting_delta("id")
+
+        self.assertEqual(delta["version"], 3)
+        self.assertTrue(delta["votingStarted"])
+
+        self.repo.get.return_value = {**session_factory(), "votingStarted": True}
+        self.repo.set_voting_state.return_value = {"votingStarted": False, "version": 7}
+
+        delta = self.service.stop_voting_delta("id")
+
+        self.assertEqual(
+            delta,
+            {
+                "sessionID": "id",
+                "version": 7,
+                "kind": "VOTING_STATE_CHANGED",
+                "votingStarted": False,
+            },
+        )
+
+    def test_close_session_deletes_participants(self):
+        self.repo.get.return_value = session_factory()
+        self.repo.delete_participants.side_effect = Exception("failed to delete items")
+
+        with self.assertLogs("pointing_poker.services.sessions", "ERROR") as logs:
+            session = self.service.close_session("id")
+
+        self.assertTrue(session["closed"])
+        self.repo.delete_participants.assert_called_once_with("id")
+        self.assertIn(
+            "failed to delete participants of session with id id", logs.output[0]
+        )
+        self.assertIn("failed to delete items", logs.output[0])
+
+        self.repo.delete_participants.side_effect = None
+        self.repo.delete_participants.return_value = 3
+
+        with patch(
+            "pointing_poker.services.sessions.perf_counter", side_effect=[1.0, 1.25]
+        ), self.assertLogs("pointing_poker.services.sessions", "INFO") as logs:
+            self.service.close_session("id")
+
+        self.assertEqual(
+            logs.output,
+            [
+                "INFO:pointing_poker.services.sessions:"
+                "deleted 3 participants of session with id id in 0.250 s"
+            ],
+        )
+
+    def test_close_session_delta(self):
+        self.repo.get.return_value = {**session_factory(), "version": 2}
+
+        delta = self.service.close_session_delta("id")
+
+        self.repo.delete_session.assert_called_with(
+            "id", version=None, participant_ids=[ANY]
+        )
+        self.assertEqual(delta["kind"], "SESSION_CLOSED")
+        self.assertEqual(delta["version"], 3)
+
+
+class InterleavedWritesTestCase(TestCase):
+    def setUp(self) -> None:
+        self.repo = InMemorySessionsRepo()
+        self.service = SessionService(self.repo)
+
+        self.session = self.service.create_session(
+            {"name": "test", "pointingMin": 1, "pointingMax": 13},
+            {"id": str(uuid4()), "name": "moderator"},
+        )
+        self.moderator_id = self.session["participants"][0]["id"]
+        self.participant_id = str(uuid4())
+
+        self.service.join_session(
+            self.session["id"], {"id": self.participant_id, "name": "test"}
+        )
+        self.service.start_voting(self.session["id"])
+
+    def vote_after_read(self, participant_id, points):
+        """Casts a vote right after the next session read, before its write."""
+        get = self.repo.get
+
+        def read_then_vote(session_id):
+            session = get(session_id)
+
+            self.repo.get = get
+            self.service.set_vote(
+                session_id, participant_id, {"points": points, "abstained": False}
+            )
+
+            return session
+
+        self.repo.get = read_then_vote
+
+    def test_stop_voting_after_a_vote_lands(self):
+        self.vote_after_read(self.participant_id, 3)
+
+        session = self.service.stop_voting(self.session["id"])
+
+        self.assertFalse(session["votingStarted"])
+        self.assertEqual(
+            session["version"], self.repo.get_session(self.session["id"]).version
+        )
+        self.assertEqual(session["tally"]["count"], 1)
+
+    def test_start_voting_after_a_vote_lands(self):
+        self.vote_after_read(self.moderator_id, 5)
+
+        session = self.service.start_voting(self.session["id"])
+
+        self.assertEqual(session["votingRound"], 2)
+        self.assertEqual(session["tally"]["count"], 1)
+        self.assertEqual(
+            session["version"], self.repo.get_session(self.session["id"]).version
+        )
+
+
+class DelayedSessionsRepo(InMemorySessionsRepo):
+    """InMemorySessionsRepo taking about as long as DynamoDB to read and write."""
+
+    def get_session(self, session_id):
+        sleep(0.005)
+
+        return super().get_session(session_id)
+
+    def get(self, session_id, fields=None, after=None, first=None):
+        sleep(0.005)
+
+        return super().get(session_id, fields, after, first)
+
+    def add_participant(self, *args, **kwargs):
+        sleep(0.01)
+
+        return super().add_participant(*args, **kwargs)
+
+    def cast_vote(self, *args, **kwargs):
+        sleep(0.01)
+
+        return super().cast_vote(*args, **kwargs)
+
+
+class ConcurrentWritesTestCase(TestCase):
+    def setUp(self) -> None:
+        self.repo = DelayedSessionsRepo()
+        self.service = SessionService(self.repo)
+
+        self.session = self.service.create_session(
+            {"name": "test", "pointingMin": 1, "pointingMax": 13},
+            {"id": str(uuid4()), "name": "moderator"},
+        )
+
+    def run_concurrently(self, calls):
+        """Runs calls at once and returns the exceptions they raised."""
+        barrier = Barrier(len(calls))
+
+        def run(call):
+            barrier.wait()
+
+            try:
+                call()
+            except Exception as err:
+                return err
+
+        with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+            return [err for err in executor.map(run, calls) if err is not None]
+
+    def test_unguarded_joins_and_votes_do_not_conflict(self):
+        session_id = self.session["id"]
+        participant_ids = [str(uuid4()) for _ in range(20)]
+
+        self.assertEqual(
+            self.run_concurrently(
+                [
+                    lambda participant_id=participant_id: self.service.join_session(
+                        session_id, {"id": participant_id, "name": "test"}
+                    )
+                    for participant_id in participant_ids
+                ]
+            ),
+            [],
+        )
+
+        self.service.start_voting(session_id)
+
+        self.assertEqual(
+            self.run_concurrently(
+                [
+                    lambda participant_id=participant_id: self.service.set_vote(
+                        session_id, participant_id, {"points": 3, "abstained": False}
+                    )
+                    for participant_id in participant_ids
+                ]
+            ),
+            [],
+        )
+
+        session = self.repo.get_session(session_id)
+
+        self.assertEqual(len(session.participants), 21)
+        self.assertEqual((session.tally["count"], session.tally["sum"]), (20, 60))